@@ -0,0 +1,267 @@
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+# ✅ Ledgers scanned for anomalies
+#   group    -> flows are scored against the history of their own category
+#   flows    -> amount columns scored as daily totals and as single entries
+#   name     -> who / what, part of the duplicate key (amount, date, name)
+#   ref      -> voucher / cheque reference shown with an alert
+ANOMALY_SOURCES = {
+    "cashbook": {
+        "group": "Payment_category",
+        "flows": ["Cash_In", "Cash_Out"],
+        "name": "Name",
+        "ref": "Voucher_No",
+    },
+    "bankbook": {
+        "group": "fund_source",
+        "flows": ["Deposit_Amount", "Withdrawal_Amount"],
+        "name": "Particulars",
+        "ref": "Bank_Ref",
+    },
+}
+
+ALL_GROUPS = "(all)"
+WINDOW = 30          # trailing observations a value is compared with
+MIN_HISTORY = 5      # fewer observations than this are not scored
+Z_LIMIT = 3.0
+ROBUST_LIMIT = 3.5
+
+ALERT_COLUMNS = ["Date", "Check", "Group", "Measure", "Amount", "Expected", "Score", "Reference", "Name"]
+SCORE_COLUMNS = ["Expected", "Z", "Robust"]
+
+
+def trailing_scores(values, keys, window=WINDOW, min_history=MIN_HISTORY, targets=None):
+    # Scores of values[targets] against the previous `window` values with the
+    # same key (rows sorted by key, then time), all rows at once:
+    #   Z      -> (x - mean) / std
+    #   Robust -> (x - median) / (1.4826 * MAD), mean absolute deviation if MAD is 0
+    n = len(values)
+    targets = np.arange(n) if targets is None else np.asarray(targets, dtype=np.int64)
+    if n == 0 or len(targets) == 0:
+        return pd.DataFrame(np.full((len(targets), 3), np.nan), columns=SCORE_COLUMNS)
+    new_key = np.r_[True, keys[1:] != keys[:-1]]
+    key_start = np.maximum.accumulate(np.where(new_key, np.arange(n), 0))
+    lags = targets[:, None] - np.arange(window, 0, -1)[None, :]
+    valid = lags >= key_start[targets][:, None]
+    history = np.where(valid, values[np.clip(lags, 0, None)], np.nan)
+    enough = valid.sum(axis=1) >= min_history
+    x = values[targets]
+    with warnings.catch_warnings(), np.errstate(all="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(history, axis=1)
+        std = np.nanstd(history, axis=1, ddof=1)
+        median = np.nanmedian(history, axis=1)
+        deviation = np.abs(history - median[:, None])
+        mad = 1.4826 * np.nanmedian(deviation, axis=1)
+        mean_ad = 1.2533 * np.nanmean(deviation, axis=1)
+        spread = np.where(mad > 0, mad, mean_ad)
+        z = np.where(std > 0, (x - mean) / std, np.nan)
+        robust = np.where(spread > 0, (x - median) / spread, np.nan)
+    return pd.DataFrame({
+        "Expected": np.where(enough, median, np.nan),
+        "Z": np.where(enough, z, np.nan),
+        "Robust": np.where(enough, robust, np.nan),
+    })
+
+
+def _entries(frame, source):
+    # One row per non-zero flow: (Measure, Group, Date, Amount, Row, Reference, Name)
+    parts = []
+    for flow in source["flows"]:
+        amount = frame[flow].to_numpy(dtype="float64")
+        used = np.flatnonzero(amount != 0)
+        parts.append(pd.DataFrame({
+            "Measure": flow,
+            "Group": frame[source["group"]].astype("string").fillna("(none)").to_numpy()[used],
+            "Date": frame["Date"].to_numpy()[used],
+            "Amount": amount[used],
+            "Row": used,
+            "Reference": frame[source["ref"]].astype("string").to_numpy()[used],
+            "Name": frame[source["name"]].astype("string").to_numpy()[used],
+        }))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _daily(entries):
+    # Daily total per category and for the whole ledger, on days with activity
+    entries = entries.dropna(subset=["Date"]).assign(Date=lambda e: e["Date"].dt.normalize())
+    per_group = entries.groupby(["Measure", "Group", "Date"], sort=False)["Amount"].sum()
+    overall = entries.groupby(["Measure", "Date"], sort=False)["Amount"].sum()
+    overall = pd.concat({ALL_GROUPS: overall}, names=["Group"]).reorder_levels(["Measure", "Group", "Date"])
+    return pd.concat([per_group, overall]).reset_index()
+
+
+def _calendar(daily):
+    # Every (Measure, Group) series on every day from its first entry to the
+    # last day of the ledger, idle days as 0: a day without deposits is a drop
+    # to zero, and trailing windows count calendar days, not active days
+    if daily.empty:
+        return daily
+    first = daily.groupby(["Measure", "Group"], sort=False)["Date"].min()
+    counts = ((daily["Date"].max() - first).dt.days + 1).to_numpy()
+    series = np.repeat(np.arange(len(first)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    calendar = pd.DataFrame({
+        "Measure": first.index.get_level_values("Measure")[series],
+        "Group": first.index.get_level_values("Group")[series],
+        "Date": first.to_numpy()[series] + offsets.astype("timedelta64[D]"),
+    })
+    calendar = calendar.merge(daily, on=["Measure", "Group", "Date"], how="left")
+    calendar["Amount"] = calendar["Amount"].fillna(0.0)
+    return calendar
+
+
+def _sort(table, by):
+    return table.sort_values(by, kind="stable").reset_index(drop=True)
+
+
+def _rescore(table, since):
+    # Scores rows whose key saw a change at or before their date, and rows not
+    # scored yet (days added by the calendar); the rest keep their scores
+    keys = table.groupby(["Measure", "Group"], sort=False).ngroup().to_numpy()
+    if since is None or "Expected" not in table.columns:
+        targets = np.arange(len(table))
+    else:
+        first = table[["Measure", "Group"]].merge(since, on=["Measure", "Group"], how="left")["Since"]
+        changed = (table["Date"] >= first).to_numpy(dtype=bool) | table["Expected"].isna().to_numpy()
+        targets = np.flatnonzero(changed)
+    scores = trailing_scores(table["Amount"].to_numpy(dtype="float64"), keys, targets=targets)
+    for col in SCORE_COLUMNS:
+        if col not in table.columns:
+            table[col] = np.nan
+        values = table[col].to_numpy(dtype="float64", copy=True)
+        values[targets] = scores[col].to_numpy()
+        table[col] = values
+    return table
+
+
+def _flagged(table):
+    return table[(table["Robust"].abs() > ROBUST_LIMIT) | (table["Z"].abs() > Z_LIMIT)]
+
+
+# ✅ Anomaly alerts per ledger, maintained incrementally
+# Entries (single non-zero flows) and daily totals per category (every calendar
+# day, idle days as 0) are scored against their own trailing history with a
+# z-score and a MAD-based robust score; duplicates are rows sharing (amount,
+# date, name). Appended rows are merged in and only the scores their dates can
+# influence are recomputed; a rewrite of existing rows rescans the ledger.
+# Pages read precomputed alerts of their own store version: the alerts of the
+# previous ingest are kept until the next one, as the watcher syncs before it
+# swaps the store in.
+class AnomalyDetector:
+    def __init__(self, sources=None):
+        self.sources = sources or ANOMALY_SOURCES
+        self._state = {}
+        self._alerts = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def sync(self, ledger, frame, version):
+        source = self.sources.get(ledger)
+        if source is None or self._versions.get(ledger) == version:
+            return 0
+        row_hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+        with self._lock:
+            state = self._state.get(ledger)
+            old = state["row_hashes"] if state is not None else None
+            appended = old is not None and len(old) <= len(row_hashes) and np.array_equal(old, row_hashes[:len(old)])
+            new_rows = frame.iloc[len(old):] if appended else frame
+            offset = len(old) if appended else 0
+            previous = self._versions.get(ledger)
+            alerts = self._alerts.get(ledger, {}).get(previous)
+            if len(new_rows) or not appended:
+                state = self._update(state if appended else None, new_rows, offset, source)
+                state["row_hashes"] = row_hashes
+                self._state[ledger] = state
+                alerts = self._collect(state)
+            # The previous version's alerts stay readable for sessions still on it
+            kept = {previous: self._alerts[ledger][previous]} if previous is not None else {}
+            self._alerts[ledger] = {**kept, version: alerts}
+            self._versions[ledger] = version
+        return len(new_rows)
+
+    def _update(self, state, rows, offset, source):
+        entries = _entries(rows, source)
+        entries["Row"] += offset
+        daily = _daily(entries)
+        key = pd.DataFrame({
+            "Date": rows["Date"].dt.normalize(),
+            "Amount": sum(rows[flow].astype("float64") * (1 if i == 0 else -1) for i, flow in enumerate(source["flows"])),
+            "Name": rows[source["name"]].astype("string").str.strip().str.casefold(),
+        })
+        # Rows without an amount never count as duplicates
+        dup_hashes = np.where((key["Amount"] == 0).to_numpy(), np.uint64(0), pd.util.hash_pandas_object(key, index=False).to_numpy())
+
+        if state is None:
+            return {
+                "entries": _rescore(_sort(entries, ["Measure", "Group", "Date", "Row"]), None),
+                "daily": _rescore(_sort(_calendar(daily), ["Measure", "Group", "Date"]), None),
+                "dup_hashes": dup_hashes,
+            }
+
+        # Appended rows only move the scores of their own category from their date on
+        since = daily.groupby(["Measure", "Group"], sort=False)["Date"].min().rename("Since").reset_index()
+        merged = pd.concat([state["daily"], daily], ignore_index=True)
+        merged = merged.groupby(["Measure", "Group", "Date"], sort=False, as_index=False).agg(
+            Amount=("Amount", "sum"), **{col: (col, "first") for col in SCORE_COLUMNS}
+        )
+        entry_since = entries.groupby(["Measure", "Group"], sort=False)["Date"].min().rename("Since").reset_index()
+        return {
+            "entries": _rescore(_sort(pd.concat([state["entries"], entries], ignore_index=True), ["Measure", "Group", "Date", "Row"]), entry_since),
+            "daily": _rescore(_sort(_calendar(merged), ["Measure", "Group", "Date"]), since),
+            "dup_hashes": np.concatenate([state["dup_hashes"], dup_hashes]),
+        }
+
+    def _collect(self, state):
+        parts = []
+        # Daily totals only count against a usually active series: a category
+        # idle on most days has a median of 0, and its busy days are judged by
+        # the entry check instead
+        daily = _flagged(state["daily"])
+        daily = daily[daily["Expected"] > 0]
+        if not daily.empty:
+            parts.append(daily.assign(
+                Check=np.where(daily["Amount"] > daily["Expected"], "Daily spike", "Daily drop"),
+                Score=daily["Robust"].fillna(daily["Z"]),
+                Reference=pd.NA, Name=pd.NA,
+            ))
+        entries = _flagged(state["entries"])
+        if not entries.empty:
+            parts.append(entries.assign(Check="Unusual entry", Score=entries["Robust"].fillna(entries["Z"])))
+
+        hashes = pd.Series(state["dup_hashes"])
+        copies = hashes.map(hashes.value_counts())
+        duplicate = (hashes != 0) & (copies > 1)
+        if duplicate.any():
+            rows = state["entries"][state["entries"]["Row"].isin(np.flatnonzero(duplicate.to_numpy()))]
+            rows = rows.drop_duplicates("Row")
+            parts.append(rows.assign(
+                Check="Duplicate", Expected=np.nan,
+                Score=copies.to_numpy()[rows["Row"].to_numpy()].astype("float64"),
+            ))
+
+        if not parts:
+            return pd.DataFrame(columns=ALERT_COLUMNS)
+        alerts = pd.concat(parts, ignore_index=True)[ALERT_COLUMNS]
+        alerts["Score"] = alerts["Score"].astype("float64").round(2)
+        return alerts.sort_values(["Date", "Check"], ascending=[False, True], kind="stable").reset_index(drop=True)
+
+    # --- queries ---
+    def alerts(self, ledger, start=None, end=None, version=None):
+        # Alerts of the store `version` (current or previous ingest), else the latest
+        with self._lock:
+            kept = self._alerts.get(ledger, {})
+            alerts = kept.get(version, kept.get(self._versions.get(ledger)))
+        if alerts is None:
+            return pd.DataFrame(columns=ALERT_COLUMNS)
+        mask = pd.Series(True, index=alerts.index)
+        if start is not None:
+            mask &= alerts["Date"] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= alerts["Date"] < pd.Timestamp(end) + pd.Timedelta(days=1)
+        return alerts[mask].reset_index(drop=True)
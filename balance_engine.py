@@ -0,0 +1,157 @@
+import copy
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# ✅ Accounts kept by the balance engine
+#   account  -> fixed account name, or the column naming the account of a row
+#   inflow / outflow -> amount columns added to / taken from the balance
+BALANCE_SOURCES = {
+    "cashbook": {"account": "Cash", "inflow": "Cash_In", "outflow": "Cash_Out"},
+    "bankbook": {"account_column": "fund_source", "inflow": "Deposit_Amount", "outflow": "Withdrawal_Amount"},
+}
+
+
+class _Account:
+    # Movements sorted by date; prefix[i] is the balance before movement i.
+    # The three arrays are swapped in together, so lock-free readers never see
+    # dates and prefix sums of different versions.
+    def __init__(self):
+        self.arrays = (
+            np.empty(0, dtype="datetime64[ns]"),
+            np.empty(0, dtype="float64"),
+            np.zeros(1, dtype="float64"),
+        )
+
+    def add(self, dates, amounts):
+        # dates / amounts already sorted by date (stable, file order within a day)
+        if len(dates) == 0:
+            return
+        booked, booked_amounts, prefix = self.arrays
+        if len(booked) == 0 or dates[0] >= booked[-1]:
+            # Later than everything booked so far: extend the prefix sums
+            self.arrays = (
+                np.concatenate([booked, dates]),
+                np.concatenate([booked_amounts, amounts]),
+                np.concatenate([prefix, prefix[-1] + np.cumsum(amounts)]),
+            )
+            return
+        # Back-dated movements: insert them after the booked ones of the same day
+        # and recompute the prefix sums from the first insertion point only
+        at = np.searchsorted(booked, dates, side="right")
+        first = int(at[0])
+        new_amounts = np.insert(booked_amounts, at, amounts)
+        self.arrays = (
+            np.insert(booked, at, dates),
+            new_amounts,
+            np.concatenate([prefix[:first + 1], prefix[first] + np.cumsum(new_amounts[first:])]),
+        )
+
+    def total(self):
+        return float(self.arrays[2][-1])
+
+    def before(self, ts):
+        # Balance of the movements dated strictly before ts: one binary search
+        dates, _, prefix = self.arrays
+        return float(prefix[np.searchsorted(dates, np.datetime64(ts, "ns"), side="left")])
+
+
+def _day_after(day):
+    return pd.Timestamp(day).normalize() + pd.Timedelta(days=1)
+
+
+# ✅ Running balances per account, maintained incrementally
+# Every account keeps its movements sorted by date with their prefix sums, so
+# the balance at any date is a binary search: opening and closing balances of
+# a date range are two O(log N) lookups. Appended rows are merged into the
+# sorted movements and only the prefix sums after the earliest of them are
+# recomputed; a rewrite of existing rows rebuilds the ledger's accounts.
+# Rows without a date cannot be placed in time and are left out.
+# Queries name the store version they read: the accounts of the previous ingest
+# are kept (copied on write) until the next one, as the watcher syncs before it
+# swaps the store in.
+class BalanceEngine:
+    def __init__(self, sources=None):
+        self.sources = sources or BALANCE_SOURCES
+        self._accounts = {}
+        self._row_hashes = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def _movements(self, ledger, frame):
+        source = self.sources[ledger]
+        frame = frame[frame["Date"].notna()]
+        amount = frame[source["inflow"]].astype("float64") - frame[source["outflow"]].astype("float64")
+        if "account_column" in source:
+            account = frame[source["account_column"]].astype("string").fillna("(none)")
+        else:
+            account = pd.Series(source["account"], index=frame.index)
+        moves = pd.DataFrame(
+            {"Account": account.to_numpy(), "Date": frame["Date"].to_numpy(), "Amount": amount.to_numpy()},
+            index=frame.index,
+        )
+        return moves.sort_values("Date", kind="stable")
+
+    def sync(self, ledger, frame, version):
+        if ledger not in self.sources or self._versions.get(ledger) == version:
+            return 0
+        hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+        with self._lock:
+            old = self._row_hashes.get(ledger)
+            appended = old is not None and len(old) <= len(hashes) and np.array_equal(old, hashes[:len(old)])
+            new_rows = frame.iloc[len(old):] if appended else frame
+            previous = self._versions.get(ledger)
+            kept = {previous: self._accounts[ledger][previous]} if previous is not None else {}
+            accounts = dict(kept[previous]) if appended else {}
+            for name, moves in self._movements(ledger, new_rows).groupby("Account", sort=False):
+                # A copy, so the previous version's account keeps its arrays
+                account = accounts[name] = copy.copy(accounts.get(name)) if name in accounts else _Account()
+                account.add(moves["Date"].to_numpy(), moves["Amount"].to_numpy())
+            self._accounts[ledger] = {**kept, version: accounts}
+            self._row_hashes[ledger] = hashes
+            self._versions[ledger] = version
+        return len(new_rows)
+
+    # --- queries ---
+    def _booked(self, ledger, version):
+        # Accounts of the store `version` (current or previous ingest), else the latest
+        kept = self._accounts.get(ledger, {})
+        if version in kept:
+            return kept[version]
+        return next(reversed(kept.values()), {})
+
+    def accounts(self, ledger, version=None):
+        return sorted(self._booked(ledger, version))
+
+    def balance(self, ledger, account, as_of=None, version=None):
+        # Closing balance at the end of the day `as_of` (everything when None)
+        booked = self._booked(ledger, version).get(account)
+        if booked is None:
+            return 0.0
+        if as_of is None:
+            return booked.total()
+        return booked.before(_day_after(as_of))
+
+    def opening_closing(self, ledger, start=None, end=None, version=None):
+        # Opening (before `start`) and closing (end of `end`) balance per account
+        rows = []
+        for name, booked in sorted(self._booked(ledger, version).items()):
+            opening = booked.before(pd.Timestamp(start).normalize()) if start is not None else 0.0
+            closing = booked.before(_day_after(end)) if end is not None else booked.total()
+            rows.append((name, opening, closing))
+        return pd.DataFrame(rows, columns=["Account", "Opening_Balance", "Closing_Balance"])
+
+    def running(self, ledger, frame, version=None):
+        # Balance of the row's account after each row of `frame`, in date order
+        # (file order within a day). `frame` must hold every row of its date
+        # range, as load_range returns it; the opening is looked up per account.
+        moves = self._movements(ledger, frame)
+        booked = self._booked(ledger, version)
+        opening = {
+            name: booked.get(name, _Account()).before(first)
+            for name, first in moves.groupby("Account", sort=False)["Date"].min().items()
+        }
+        balance = moves.groupby("Account", sort=False)["Amount"].cumsum() + moves["Account"].map(opening)
+        return balance.reindex(frame.index)
@@ -0,0 +1,150 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# ✅ RFM segment rules, checked in order (scores are 1-5, 5 = best)
+RFM_SEGMENTS = [
+    ("Champions", lambda r, f, m: (r >= 4) & (f >= 4) & (m >= 4)),
+    ("Loyal", lambda r, f, m: (f >= 4)),
+    ("Big Spenders", lambda r, f, m: (m >= 4)),
+    ("New", lambda r, f, m: (r >= 4) & (f <= 2)),
+    ("At Risk", lambda r, f, m: (r <= 2) & (f >= 3)),
+    ("Hibernating", lambda r, f, m: (r <= 2)),
+]
+
+
+def _score(values, ascending=True):
+    # Quintile score from the rank, so ties and tiny customer lists still work
+    if len(values) == 0:
+        return pd.Series(dtype="int8", index=values.index)
+    pct = values.rank(method="average", pct=True, ascending=ascending)
+    return np.ceil(pct * 5).clip(1, 5).astype("int8")
+
+
+def _aggregate(rows):
+    rows = rows[rows["customer_name"].notna()]
+    customer = rows["customer_name"].astype(str)
+    unpaid = ~(rows["payment_status"].astype("string") == "Paid").fillna(False)
+    table = pd.DataFrame({
+        "customer": customer,
+        "date": rows["date"],
+        "amount": rows["total_amount"].astype("float64"),
+        "outstanding": rows["total_amount"].astype("float64").where(unpaid, 0.0),
+    }).groupby("customer").agg(
+        First_Purchase=("date", "min"),
+        Last_Purchase=("date", "max"),
+        Frequency=("amount", "size"),
+        Monetary=("amount", "sum"),
+        Outstanding=("outstanding", "sum"),
+    )
+    # Sales without a payment method don't vote for one ("nan" must not win)
+    paid = rows["payment_method"].notna()
+    methods = pd.crosstab(customer[paid], rows.loc[paid, "payment_method"].astype(str))
+    return table, methods
+
+
+# ✅ Per-customer aggregate table, maintained incrementally
+# Appended sales rows are aggregated on their own and merged into the table;
+# only a rewrite of existing rows triggers a full rebuild. Rankings and RFM
+# scores are refreshed once per ingest, so top-k and segment queries are
+# slices of a precomputed order rather than a groupby + sort per rerun.
+# Queries name the store version they read: the table of the previous ingest is
+# kept until the next one, as the watcher syncs before it swaps the store in.
+class CustomerAnalytics:
+    def __init__(self):
+        self.table = None
+        self._methods = None
+        self._order = []
+        self._row_hashes = None
+        self._version = None
+        self._kept = {}
+        self._lock = threading.Lock()
+
+    def sync(self, sales, version):
+        if self._version == version:
+            return 0
+        hashes = pd.util.hash_pandas_object(sales, index=False).to_numpy()
+        with self._lock:
+            old = self._row_hashes
+            appended = old is not None and len(old) <= len(hashes) and np.array_equal(old, hashes[:len(old)])
+            if appended:
+                new_rows = sales.iloc[len(old):]
+            else:
+                self.table, self._methods = None, None
+                new_rows = sales
+            if len(new_rows):
+                self._merge(*_aggregate(new_rows))
+            self._refresh(sales["date"].max())
+            self._row_hashes = hashes
+            previous = self._version
+            kept = {previous: self._kept[previous]} if previous is not None else {}
+            self._kept = {**kept, version: (self.table, self._order)}
+            self._version = version
+        return len(new_rows)
+
+    def _merge(self, part, methods):
+        if self.table is None:
+            self.table, self._methods = part, methods
+            return
+        index = self.table.index.union(part.index)
+        old = self.table.reindex(index)
+        new = part.reindex(index)
+        merged = pd.DataFrame(index=index)
+        merged["First_Purchase"] = pd.concat([old["First_Purchase"], new["First_Purchase"]], axis=1).min(axis=1)
+        merged["Last_Purchase"] = pd.concat([old["Last_Purchase"], new["Last_Purchase"]], axis=1).max(axis=1)
+        for col in ["Frequency", "Monetary", "Outstanding"]:
+            merged[col] = old[col].fillna(0) + new[col].fillna(0)
+        merged["Frequency"] = merged["Frequency"].astype("int64")
+        self.table = merged
+        self._methods = self._methods.add(methods, fill_value=0)
+
+    def _refresh(self, as_of):
+        if self.table is None or self.table.empty:
+            self._order = []
+            return
+        # A shallow copy (copy-on-write): the previous version's table keeps its columns
+        table = self.table = self.table.copy(deep=False)
+        # Blank for customers none of whose sales name a method
+        counts = self._methods.reindex(table.index, fill_value=0)
+        preferred = counts.idxmax(axis=1) if not counts.columns.empty else pd.Series(index=table.index, dtype=object)
+        table["Preferred_Method"] = preferred.where(counts.sum(axis=1) > 0)
+        table["Recency_Days"] = (as_of - table["Last_Purchase"]).dt.days
+        table["R"] = _score(table["Recency_Days"], ascending=False)
+        table["F"] = _score(table["Frequency"])
+        table["M"] = _score(table["Monetary"])
+        segment = pd.Series("Regular", index=table.index)
+        assigned = pd.Series(False, index=table.index)
+        for name, rule in RFM_SEGMENTS:
+            hit = rule(table["R"], table["F"], table["M"]) & ~assigned
+            segment[hit] = name
+            assigned |= hit
+        table["Segment"] = segment
+        # Customers ranked by spend once per ingest; top-k is then a slice
+        self._order = table.sort_values("Monetary", ascending=False, kind="stable").index.tolist()
+
+    # --- queries ---
+    def _at(self, version):
+        # (table, order) of the store `version` (current or previous ingest), else the latest
+        if version in self._kept:
+            return self._kept[version]
+        return next(reversed(self._kept.values()), (None, []))
+
+    def top(self, k=1, version=None):
+        with self._lock:
+            table, order = self._at(version)
+            if table is None:
+                return pd.DataFrame()
+            return table.loc[order[:k]].rename_axis("customer_name").reset_index()
+
+    def segments(self, version=None):
+        with self._lock:
+            table, _ = self._at(version)
+            if table is None:
+                return pd.DataFrame(columns=["Segment", "Customers", "Monetary", "Outstanding"])
+            return table.groupby("Segment").agg(
+                Customers=("Frequency", "size"),
+                Monetary=("Monetary", "sum"),
+                Outstanding=("Outstanding", "sum"),
+            ).reset_index().sort_values("Monetary", ascending=False)
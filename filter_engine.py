@@ -0,0 +1,123 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# ✅ Treat "every option ticked" as no filter at all
+def as_filter(selected, options):
+    if set(options) <= set(selected):
+        return None
+    return list(selected)
+
+
+# ✅ Filter engine for multiselect-driven views
+# Each dimension is stored once as categorical codes. Bitmaps (packed bits, one
+# per value) are built on first use, a selection is the OR of its value
+# bitmaps, and the page state is the AND of the selected dimensions plus an
+# optional date window found by binary search on the sorted dates.
+# Results are cached per dimension and per full widget state, so toggling one
+# supplier only rebuilds that supplier dimension's bitmap.
+class FilterEngine:
+    def __init__(self, frame, dimensions, date_column=None, cache_size=64):
+        self.frame = frame
+        self.n_rows = len(frame)
+        self._codes = {}
+        self._present = {}
+        self._lookup = {}
+        self._bitmaps = {dim: {} for dim in dimensions}
+        for dim in dimensions:
+            values = frame[dim]
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype("category")
+            self._codes[dim] = values.cat.codes.to_numpy()
+            self._present[dim] = frozenset(np.unique(self._codes[dim]).tolist()) - {-1}
+            self._lookup[dim] = {value: code for code, value in enumerate(values.cat.categories)}
+
+        self._date_order = None
+        if date_column is not None:
+            dates = frame[date_column].to_numpy(dtype="datetime64[ns]")
+            self._date_order = np.argsort(dates, kind="stable")
+            self._sorted_dates = dates[self._date_order]
+
+        self._cache_size = cache_size
+        self._selection_cache = OrderedDict()
+        self._result_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- cache helpers ---
+    def _cached(self, cache, key, build):
+        with self._lock:
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+        value = build()
+        with self._lock:
+            cache[key] = value
+            if len(cache) > self._cache_size:
+                cache.popitem(last=False)
+        return value
+
+    # --- bitmaps ---
+    def _value_bitmap(self, dim, code):
+        bitmaps = self._bitmaps[dim]
+        with self._lock:
+            bitmap = bitmaps.get(code)
+        if bitmap is None:
+            built = np.packbits(self._codes[dim] == code)
+            with self._lock:
+                # Another session may have built it meanwhile: keep the first copy
+                bitmap = bitmaps.setdefault(code, built)
+        return bitmap
+
+    def _union(self, dim, codes):
+        all_codes = self._present[dim]
+        if len(codes) * 2 <= len(all_codes):
+            bitmap = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+            for code in codes:
+                np.bitwise_or(bitmap, self._value_bitmap(dim, code), out=bitmap)
+            return bitmap
+        # Most values selected: cheaper to remove the few unselected ones (and blanks)
+        bitmap = np.packbits(self._codes[dim] != -1)
+        for code in all_codes - codes:
+            np.bitwise_and(bitmap, np.invert(self._value_bitmap(dim, code)), out=bitmap)
+        return bitmap
+
+    def _dimension_bitmap(self, dim, selected):
+        lookup = self._lookup[dim]
+        codes = frozenset(lookup[v] for v in selected if v in lookup)
+        return self._cached(self._selection_cache, (dim, codes), lambda: self._union(dim, codes))
+
+    def _date_bitmap(self, start, end):
+        def build():
+            lo = np.searchsorted(self._sorted_dates, np.datetime64(pd.Timestamp(start), "ns"), side="left")
+            hi = np.searchsorted(self._sorted_dates, np.datetime64(pd.Timestamp(end), "ns"), side="right")
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[self._date_order[lo:hi]] = True
+            return np.packbits(mask)
+        return self._cached(self._selection_cache, ("__date__", start, end), build)
+
+    # --- public API ---
+    def select(self, selections, date_range=None):
+        # selections: {dimension: list of values or None (= no filter)}
+        active = tuple(sorted(
+            (dim, frozenset(values)) for dim, values in selections.items() if values is not None
+        ))
+        key = (active, date_range)
+
+        def build():
+            bitmaps = [self._dimension_bitmap(dim, values) for dim, values in active]
+            if date_range is not None and self._date_order is not None:
+                bitmaps.append(self._date_bitmap(*date_range))
+            if not bitmaps:
+                return np.arange(self.n_rows)
+            combined = bitmaps[0].copy()
+            for bitmap in bitmaps[1:]:
+                np.bitwise_and(combined, bitmap, out=combined)
+            return np.flatnonzero(np.unpackbits(combined, count=self.n_rows))
+
+        return self._cached(self._result_cache, key, build)
+
+    def filter(self, selections, date_range=None):
+        return self.frame.iloc[self.select(selections, date_range)]
@@ -0,0 +1,74 @@
+import numpy as np
+
+
+# ✅ Forecast models, run in the forecast worker processes
+# Kept apart from forecasting.py and main.py: the workers start from a
+# forkserver that imports only this module (numpy, no pandas, no Streamlit).
+
+SEASON = 7                              # weekly pattern in daily takings
+ALPHAS = np.linspace(0.05, 0.95, 19)    # smoothing levels tried for every series
+BACKTEST_DAYS = 28                      # held-out tail used to pick the model
+SHORT_HISTORY = "Too little history"    # model of series too short to backtest
+
+
+def seasonal_naive(values, horizon, season=SEASON):
+    # Each day repeats the same weekday of the last observed week
+    steps = np.arange(horizon) % season
+    return values[:, values.shape[1] - season + steps]
+
+
+def exponential_smoothing(values, alphas=ALPHAS):
+    # Simple exponential smoothing for every series and every alpha at once:
+    # one pass over the days on an (alphas x series) level matrix, keeping the
+    # alpha with the smallest one-step-ahead squared error per series
+    level = np.repeat(values[None, :, 0], len(alphas), axis=0)
+    sse = np.zeros_like(level)
+    weight = alphas[:, None]
+    for t in range(1, values.shape[1]):
+        error = values[:, t] - level
+        sse += error * error
+        level += weight * error
+    best = np.argmin(sse, axis=0)
+    series = np.arange(values.shape[0])
+    return level[best, series], alphas[best]
+
+
+def fit_batch(values, horizon, season=SEASON, backtest_days=BACKTEST_DAYS):
+    # Plain arrays in, plain arrays out.
+    # Both models are scored on the held-out tail; each series keeps the better one.
+    # Without a tail to score on (fewer than 4 days) the forecast is the last
+    # smoothed level, flagged as SHORT_HISTORY with no alpha and no error.
+    n, days = values.shape
+    holdout = min(backtest_days, days // 4)
+    train = values[:, :days - holdout]
+    mae = {}
+    if holdout and train.shape[1] >= 1:
+        level, _ = exponential_smoothing(train)
+        mae["Exponential smoothing"] = np.abs(values[:, days - holdout:] - level[:, None]).mean(axis=1)
+    if holdout and train.shape[1] >= 2 * season:
+        guess = seasonal_naive(train, holdout, season)
+        mae["Seasonal naive"] = np.abs(values[:, days - holdout:] - guess).mean(axis=1)
+
+    level, alpha = exponential_smoothing(values)
+    smooth = np.repeat(level[:, None], horizon, axis=1)
+    if not mae:
+        return {
+            "forecast": np.clip(smooth, 0, None),
+            "model": np.full(n, SHORT_HISTORY),
+            "alpha": np.full(n, np.nan),
+            "mae": np.full(n, np.nan),
+        }
+    if "Seasonal naive" in mae:
+        use_naive = mae["Seasonal naive"] < mae["Exponential smoothing"]
+        forecast = np.where(use_naive[:, None], seasonal_naive(values, horizon, season), smooth)
+        error = np.where(use_naive, mae["Seasonal naive"], mae["Exponential smoothing"])
+    else:
+        use_naive = np.zeros(n, dtype=bool)
+        forecast = smooth
+        error = mae["Exponential smoothing"]
+    return {
+        "forecast": np.clip(forecast, 0, None),
+        "model": np.where(use_naive, "Seasonal naive", "Exponential smoothing"),
+        "alpha": np.where(use_naive, np.nan, alpha),
+        "mae": error,
+    }
@@ -0,0 +1,269 @@
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from forecast_worker import SHORT_HISTORY, fit_batch
+
+try:
+    from multiprocessing import forkserver, popen_forkserver, reduction, spawn, util
+    from multiprocessing.context import ForkServerContext, ForkServerProcess, set_spawning_popen
+except ImportError:
+    # No forkserver on this platform: forecasts run on threads
+    ForkServerContext = None
+
+
+# ✅ Forecast series: name -> (ledger, date column, group column, value column)
+# Every member of the group column is one daily series; all members of a
+# series set are fitted together as the rows of one matrix.
+FORECAST_SERIES = {
+    "Sales by category": ("sales", "date", "category", "total_amount"),
+    "Sales by payment method": ("sales", "date", "payment_method", "total_amount"),
+    "Cash in by category": ("cashbook", "Date", "Payment_category", "Cash_In"),
+    "Cash out by category": ("cashbook", "Date", "Payment_category", "Cash_Out"),
+}
+
+SUMMARY_COLUMNS = ["Member", "Model", "Alpha", "Backtest_MAE", "Last_30_Days", "Next_Month"]
+DAILY_COLUMNS = ["Member", "Date", "Kind", "Value"]
+
+
+def daily_matrix(frame, date_column, group_column, value_column):
+    # Members x calendar days, days without entries as 0
+    rows = frame[frame[date_column].notna() & frame[group_column].notna()]
+    if rows.empty:
+        return [], pd.DatetimeIndex([]), np.zeros((0, 0))
+    table = rows.groupby([rows[group_column].astype(str), rows[date_column].dt.normalize()])[value_column].sum()
+    table = table.unstack(fill_value=0)
+    days = pd.date_range(table.columns.min(), table.columns.max(), freq="D")
+    table = table.reindex(columns=days, fill_value=0).sort_index()
+    return table.index.tolist(), days, table.to_numpy(dtype="float64")
+
+
+def next_month_horizon(last_day):
+    # Days after the last observation up to the end of the following month
+    month = pd.Period(last_day, freq="M") + 1
+    return (month.end_time.normalize() - pd.Timestamp(last_day).normalize()).days, month
+
+
+def _content_key(members, days, values):
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update("\x1f".join(members).encode())
+    digest.update(np.asarray(days, dtype="datetime64[ns]").tobytes())
+    digest.update(np.ascontiguousarray(values).tobytes())
+    return digest.hexdigest()
+
+
+def _slug(name):
+    return "".join(ch if ch.isalnum() else "_" for ch in name.lower())
+
+
+if ForkServerContext is not None:
+    class _WorkerPopen(popen_forkserver.Popen):
+        # Forkserver launch without the parent's __main__. Streamlit installs the
+        # page script as __main__, and a worker would otherwise run it again
+        # before its first fit; fit_batch only needs forecast_worker, which the
+        # fork server has already imported.
+        def _launch(self, process_obj):
+            prep_data = spawn.get_preparation_data(process_obj._name)
+            prep_data.pop("init_main_from_name", None)
+            prep_data.pop("init_main_from_path", None)
+            buf = io.BytesIO()
+            set_spawning_popen(self)
+            try:
+                reduction.dump(prep_data, buf)
+                reduction.dump(process_obj, buf)
+            finally:
+                set_spawning_popen(None)
+            self.sentinel, w = forkserver.connect_to_new_process(self._fds)
+            _parent_w = os.dup(w)
+            self.finalizer = util.Finalize(self, util.close_fds, (_parent_w, self.sentinel))
+            with open(w, "wb", closefd=True) as f:
+                f.write(buf.getbuffer())
+            self.pid = forkserver.read_signed(self.sentinel)
+
+    class _WorkerProcess(ForkServerProcess):
+        @staticmethod
+        def _Popen(process_obj):
+            return _WorkerPopen(process_obj)
+
+    class _WorkerContext(ForkServerContext):
+        Process = _WorkerProcess
+
+
+# ✅ Forecasts per series set, fitted off the request path
+# refresh() runs with every ingest: it rolls the ledgers up to daily matrices
+# and hashes them. An unchanged matrix keeps its fit; a changed one is sent to
+# a process pool (started again if a worker dies), and its result is written
+# to warehouse/forecasts/ keyed by the hash, so a restart on the same data
+# reuses the saved fit. Pages only read the latest finished fit and never
+# wait, except for the very first one.
+class ForecastService:
+    def __init__(self, root, workers=None):
+        self.root = root
+        self.workers = workers or min(2, os.cpu_count() or 1)
+        self._results = {}
+        self._pending = {}
+        self._errors = {}
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # forkserver, not fork: forking the threaded server can copy a lock
+                # held by another thread into the worker. The server preloads only
+                # forecast_worker, and workers start without the page's __main__.
+                if ForkServerContext is not None and "forkserver" in multiprocessing.get_all_start_methods():
+                    context = _WorkerContext()
+                    context.set_forkserver_preload(["forecast_worker"])
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=context)
+                else:
+                    self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="forecast")
+            return self._pool
+
+    def _submit(self, values, horizon):
+        for attempt in range(2):
+            pool = self._executor()
+            try:
+                return pool, pool.submit(fit_batch, values, horizon)
+            except BrokenProcessPool:
+                self._drop(pool)
+                if attempt:
+                    raise
+
+    def _drop(self, pool):
+        # A worker died (killed, out of memory): the next fit starts a new pool
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _paths(self, name, key):
+        base = os.path.join(self.root, f"{_slug(name)}-{key}")
+        return base + ".summary.parquet", base + ".daily.parquet"
+
+    def refresh(self, store):
+        for name, (ledger, date_column, group_column, value_column) in FORECAST_SERIES.items():
+            members, days, values = daily_matrix(store.frame(ledger), date_column, group_column, value_column)
+            key = _content_key(members, days, values)
+            with self._lock:
+                done = self._results.get(name)
+                pending = self._pending.get(name)
+                if (done is not None and done["key"] == key) or (pending is not None and pending[0] == key):
+                    continue
+            saved = self._load(name, key)
+            if saved is not None:
+                with self._lock:
+                    self._results[name] = saved
+                continue
+            if not members:
+                continue
+            horizon, month = next_month_horizon(days[-1])
+            finished = threading.Event()
+            with self._lock:
+                self._pending[name] = (key, finished)
+            try:
+                pool, future = self._submit(values, horizon)
+            except Exception:
+                self._finish(name, key, None, members, days, values, month, traceback.format_exc(limit=3))
+                continue
+            future.add_done_callback(
+                lambda f, name=name, key=key, pool=pool, args=(members, days, values, month): self._finish(name, key, f, *args, pool=pool)
+            )
+
+    def _finish(self, name, key, future, members, days, values, month, error=None, pool=None):
+        result = None
+        if future is not None:
+            try:
+                result = _tables(key, members, days, values, month, future.result())
+                self._save(name, result)
+            except BrokenProcessPool:
+                self._drop(pool)
+                error = traceback.format_exc(limit=3)
+            except Exception:
+                error = traceback.format_exc(limit=3)
+        with self._lock:
+            if result is not None:
+                self._results[name] = result
+            if error is None:
+                self._errors.pop(name, None)
+            else:
+                self._errors[name] = error
+            pending = self._pending.get(name)
+            if pending is not None and pending[0] == key:
+                del self._pending[name]
+                pending[1].set()
+
+    def _save(self, name, result):
+        os.makedirs(self.root, exist_ok=True)
+        prefix = f"{_slug(name)}-"
+        for filename in os.listdir(self.root):
+            if filename.startswith(prefix):
+                os.remove(os.path.join(self.root, filename))
+        for table, path in zip((result["summary"], result["daily"]), self._paths(name, result["key"])):
+            table.to_parquet(path + ".tmp", index=False)
+            os.replace(path + ".tmp", path)
+
+    def _load(self, name, key):
+        summary_path, daily_path = self._paths(name, key)
+        if not (os.path.exists(summary_path) and os.path.exists(daily_path)):
+            return None
+        daily = pd.read_parquet(daily_path)
+        # The forecast always runs to the end of the projected month
+        month = pd.Period(daily.loc[daily["Kind"] == "Forecast", "Date"].max(), freq="M")
+        return {"key": key, "summary": pd.read_parquet(summary_path), "daily": daily, "month": month}
+
+    # --- queries ---
+    def result(self, name, wait=None):
+        # Latest finished fit; waits up to `wait` seconds only if there is none yet
+        with self._lock:
+            result = self._results.get(name)
+            pending = self._pending.get(name)
+        if result is None and pending is not None and wait:
+            pending[1].wait(wait)
+            with self._lock:
+                result = self._results.get(name)
+        return result
+
+    def pending(self, name):
+        with self._lock:
+            return name in self._pending
+
+    def error(self, name):
+        with self._lock:
+            return self._errors.get(name)
+
+
+def _tables(key, members, days, values, month, fit):
+    horizon = fit["forecast"].shape[1]
+    future_days = pd.date_range(days[-1] + pd.Timedelta(days=1), periods=horizon, freq="D")
+    in_month = (future_days >= month.start_time) & (future_days <= month.end_time)
+    summary = pd.DataFrame({
+        "Member": members,
+        "Model": fit["model"],
+        "Alpha": fit["alpha"],
+        "Backtest_MAE": fit["mae"],
+        "Last_30_Days": values[:, -30:].sum(axis=1),
+        "Next_Month": fit["forecast"][:, in_month].sum(axis=1),
+    })[SUMMARY_COLUMNS].sort_values("Next_Month", ascending=False, kind="stable").reset_index(drop=True)
+    actual = pd.DataFrame({
+        "Member": np.repeat(members, len(days)),
+        "Date": np.tile(days, len(members)),
+        "Kind": "Actual",
+        "Value": values.ravel(),
+    })
+    forecast = pd.DataFrame({
+        "Member": np.repeat(members, horizon),
+        "Date": np.tile(future_days, len(members)),
+        "Kind": "Forecast",
+        "Value": fit["forecast"].ravel(),
+    })
+    daily = pd.concat([actual, forecast], ignore_index=True)[DAILY_COLUMNS]
+    return {"key": key, "summary": summary, "daily": daily, "month": month}
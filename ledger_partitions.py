@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import threading
+import weakref
+
+import pandas as pd
+
+
+MANIFEST = "_manifest.json"
+UNDATED = "undated"
+
+
+# Every PartitionedLedger still in use: its manifest's files must stay on disk
+_live = weakref.WeakSet()
+_live_lock = threading.Lock()
+
+
+def _json_value(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+def month_groups(frame, date_column):
+    # (month key, row labels, content hash) of every month of the frame
+    keys = frame[date_column].dt.strftime("%Y-%m").fillna(UNDATED)
+    hashes = pd.util.hash_pandas_object(frame, index=False)
+    for key, rows in keys.groupby(keys, sort=True).groups.items():
+        yield key, rows, hashlib.blake2b(hashes.loc[rows].to_numpy().tobytes(), digest_size=16).hexdigest()
+
+
+# ✅ One ledger stored as one parquet file per month
+#   warehouse/partitions/<ledger>/2025-08-<content hash>.parquet
+#   warehouse/partitions/<ledger>/_manifest.json   rows, min/max date, content hash
+# Readers use the min/max statistics to open only the months that overlap the
+# requested range; rows without a date live in "undated" and are only read
+# for whole-ledger loads. Parsed partitions are kept in memory per content hash.
+# Month files are named by their content and never overwritten: a store built
+# from an older manifest keeps reading its own months after a rebuild, and a
+# file is only deleted once no ledger object in the process refers to it.
+class PartitionedLedger:
+    def __init__(self, root, date_column):
+        self.root = root
+        self.date_column = date_column
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.manifest = self._load_manifest()
+        with _live_lock:
+            _live.add(self)
+
+    def _load_manifest(self):
+        path = os.path.join(self.root, MANIFEST)
+        if not os.path.exists(path):
+            return {"source_version": None, "partitions": {}, "categories": {}, "strings": []}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    @property
+    def source_version(self):
+        # JSON turns the (name, mtime, size) tuples into lists; compare as files_version builds it
+        version = self.manifest.get("source_version")
+        return tuple(tuple(entry) for entry in version) if version is not None else None
+
+    # --- write ---
+    def write(self, frame, source_version, schema_version=None):
+        os.makedirs(self.root, exist_ok=True)
+        partitions = {}
+        for key, rows, digest in month_groups(frame, self.date_column):
+            part = frame.loc[rows].reset_index(drop=True)
+            filename = f"{key}-{digest}.parquet"
+            path = os.path.join(self.root, filename)
+            if not os.path.exists(path):
+                tmp = path + ".tmp"
+                part.to_parquet(tmp, index=False)
+                os.replace(tmp, path)
+            part_dates = part[self.date_column]
+            partitions[key] = {
+                "file": filename,
+                "rows": len(part),
+                "min_date": None if key == UNDATED else part_dates.min().isoformat(),
+                "max_date": None if key == UNDATED else part_dates.max().isoformat(),
+                "hash": digest,
+            }
+        manifest = {
+            "source_version": list(source_version),
+            "schema_version": schema_version,
+            "date_column": self.date_column,
+            "partitions": partitions,
+            "categories": {
+                col: [_json_value(v) for v in frame[col].cat.categories]
+                for col in frame.columns if isinstance(frame[col].dtype, pd.CategoricalDtype)
+            },
+            "strings": [col for col in frame.columns if isinstance(frame[col].dtype, pd.StringDtype)],
+            "columns": list(frame.columns),
+        }
+        tmp = os.path.join(self.root, MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp, os.path.join(self.root, MANIFEST))
+        self.manifest = manifest
+        self.remove_unused()
+
+    def remove_unused(self):
+        # Month files no live ledger of this directory reads any more
+        root = os.path.abspath(self.root)
+        with _live_lock:
+            used = {
+                entry["file"]
+                for ledger in list(_live) if os.path.abspath(ledger.root) == root
+                for entry in ledger.manifest.get("partitions", {}).values()
+            }
+        for filename in os.listdir(self.root):
+            if filename.endswith(".parquet") and filename not in used:
+                os.remove(os.path.join(self.root, filename))
+
+    # --- read ---
+    def date_bounds(self):
+        entries = [e for k, e in self.manifest["partitions"].items() if k != UNDATED]
+        if not entries:
+            return None, None
+        return (
+            pd.Timestamp(min(e["min_date"] for e in entries)),
+            pd.Timestamp(max(e["max_date"] for e in entries)),
+        )
+
+    def keys_for(self, start=None, end=None):
+        if start is None and end is None:
+            return list(self.manifest["partitions"])
+        start = pd.Timestamp(start) if start is not None else pd.Timestamp.min
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp.max
+        return [
+            key for key, e in self.manifest["partitions"].items()
+            if key != UNDATED and pd.Timestamp(e["min_date"]) <= end and pd.Timestamp(e["max_date"]) >= start
+        ]
+
+    def _read_part(self, key, keep=True):
+        entry = self.manifest["partitions"][key]
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == entry["hash"]:
+                return cached[1]
+        part = pd.read_parquet(os.path.join(self.root, entry["file"]))
+        for col, categories in self.manifest.get("categories", {}).items():
+            if col in part.columns:
+                part[col] = part[col].astype(pd.CategoricalDtype(categories))
+        for col in self.manifest.get("strings", []):
+            if col in part.columns:
+                part[col] = part[col].astype("string[pyarrow]")
+        if keep:
+            with self._lock:
+                self._cache[key] = (entry["hash"], part)
+        return part
+
+    def read(self, start=None, end=None):
+        keys = self.keys_for(start, end)
+        # A whole-ledger read is kept by the caller, so do not hold the months twice
+        whole = start is None and end is None
+        parts = [self._read_part(key, keep=not whole) for key in keys]
+        if whole:
+            with self._lock:
+                self._cache.clear()
+        if not parts:
+            return self._empty()
+        frame = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0].copy(deep=False)
+        if start is not None or end is not None:
+            dates = frame[self.date_column]
+            mask = pd.Series(True, index=frame.index)
+            if start is not None:
+                mask &= dates >= pd.Timestamp(start)
+            if end is not None:
+                mask &= dates <= pd.Timestamp(end)
+            frame = frame[mask]
+        return frame
+
+    def _empty(self):
+        columns = self.manifest.get("columns", [self.date_column])
+        frame = pd.DataFrame({col: pd.Series(dtype=object) for col in columns})
+        frame[self.date_column] = pd.Series(dtype="datetime64[ns]")
+        return frame
+
+    def partitions_read(self, start=None, end=None):
+        return len(self.keys_for(start, end)), len(self.manifest["partitions"])
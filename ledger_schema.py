@@ -0,0 +1,194 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+
+# ✅ Column schemas for the four ledgers
+#   category -> pandas categorical (enum-like fields: names, categories, methods)
+#   string   -> Arrow-backed string (ids, references, free text)
+#   int      -> integer downcast to the smallest type that fits (quantities)
+#   money    -> int64 or float64, never downcast: totals and products of
+#               amounts must not overflow or lose cents
+#   date     -> datetime64, parsed with an optional fixed format
+# `aliases` maps the spelling found in the Excel files to the name used in the app,
+# `fill` gives the value written into empty categorical cells.
+# Validation (ledger_validation.py): every listed column is required,
+# `nonnegative` amounts may not be below zero, and `unique` is the voucher /
+# invoice number that may appear only once.
+# Bump when compact_frame's output types change: partitions written under
+# another version are rebuilt from the workbooks
+SCHEMA_VERSION = 2
+
+SALES_SCHEMA = {
+    "aliases": {"sold_by": "Sold_By"},
+    "columns": {
+        "date": ("date", "%Y-%m-%d"),
+        "invoice_id": "string",
+        "Sold_By": "category",
+        "customer_name": "category",
+        "product_id": "category",
+        "product_name": "category",
+        "category": "category",
+        "size": "category",
+        "colour": "category",
+        "quantity": "int",
+        "unit_price": "money",
+        "discount": "money",
+        "total_amount": "money",
+        "payment_method": "category",
+        "bank_name": "category",
+        "payment_status": "category",
+    },
+    "fill": {},
+    "nonnegative": ["quantity", "unit_price", "discount", "total_amount"],
+    "unique": "invoice_id",
+}
+
+CASHBOOK_SCHEMA = {
+    "aliases": {},
+    "columns": {
+        "Date": ("date", "%Y-%m-%d"),
+        "Voucher_No": "string",
+        "Description": "string",
+        "Name": "category",
+        "Payment_category": "category",
+        "Reference": "string",
+        "Cash_In": "money",
+        "Cash_Out": "money",
+        "Balance": "money",
+    },
+    "fill": {"Payment_category": "Uncategorized"},
+    "nonnegative": ["Cash_In", "Cash_Out"],
+    "unique": "Voucher_No",
+}
+
+BANKBOOK_SCHEMA = {
+    "aliases": {},
+    "columns": {
+        "Date": ("date", "%Y-%m-%d"),
+        "Cheque_No": "string",
+        "Particulars": "string",
+        "fund_source": "category",
+        "Deposit_Amount": "money",
+        "Withdrawal_Amount": "money",
+        "Balance": "money",
+        "Bank_Ref": "string",
+    },
+    "fill": {},
+    "nonnegative": ["Deposit_Amount", "Withdrawal_Amount"],
+    "unique": "Bank_Ref",
+}
+
+PURCHASE_SCHEMA = {
+    "aliases": {},
+    "columns": {
+        "Date": ("date", "%d-%m-%Y"),
+        "Vouchar_no": "string",
+        "Supplier_name": "category",
+        "Product_code": "category",
+        "Product_name": "category",
+        "Product_Category": "category",
+        "Payment_cetagory": "category",
+        "Purchase_rate": "money",
+        "Discount": "money",
+        "Amount": "money",
+        "Payable": "money",
+        "Receivedable": "money",
+    },
+    "fill": {},
+    "nonnegative": ["Purchase_rate", "Discount", "Amount", "Payable", "Receivedable"],
+    "unique": "Vouchar_no",
+}
+
+LEDGER_SCHEMAS = {
+    "sales": SALES_SCHEMA,
+    "cashbook": CASHBOOK_SCHEMA,
+    "bankbook": BANKBOOK_SCHEMA,
+    "purchase": PURCHASE_SCHEMA,
+}
+
+
+def frame_nbytes(df):
+    # Deep size so object/string columns are counted with their payload
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _to_date(series, fmt):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    parsed = pd.to_datetime(series, format=fmt, errors="coerce")
+    # Excel sometimes hands back real dates mixed with text; convert those as they
+    # are. Text off the format stays NaT for the bad_date check: parsed any other
+    # way, "03-04-2025" could come back with day and month swapped.
+    is_date = series.map(lambda value: isinstance(value, (datetime.date, np.datetime64)), na_action="ignore")
+    retry = parsed.isna() & is_date.fillna(False).astype(bool)
+    if retry.any():
+        parsed[retry] = pd.to_datetime(series[retry], errors="coerce")
+    return parsed
+
+
+def _to_category(series, fill=None):
+    if fill is not None:
+        series = series.astype(object).where(series.notna(), fill)
+    out = series.astype("category")
+    if fill is not None and fill not in out.cat.categories:
+        out = out.cat.add_categories([fill])
+    return out
+
+
+def _downcast_float(series):
+    if not pd.api.types.is_float_dtype(series) or series.dtype == np.float32:
+        return series
+    small = series.astype(np.float32)
+    same = (small.astype(np.float64) == series) | (series.isna() & small.isna())
+    return small if same.all() else series
+
+
+def _to_number(series, kind):
+    values = pd.to_numeric(series, errors="coerce")
+    if kind == "money":
+        return values.astype(np.int64 if pd.api.types.is_integer_dtype(values) else np.float64)
+    if pd.api.types.is_integer_dtype(values):
+        return pd.to_numeric(values, downcast="integer")
+    return _downcast_float(values)
+
+
+def compact_frame(df, schema):
+    df = df.rename(columns=schema.get("aliases", {}))
+    fills = schema.get("fill", {})
+    out = {}
+    for col in df.columns:
+        spec = schema["columns"].get(col)
+        series = df[col]
+        kind, fmt = spec if isinstance(spec, tuple) else (spec, None)
+
+        if kind == "date":
+            out[col] = _to_date(series, fmt)
+        elif kind == "category":
+            out[col] = _to_category(series, fills.get(col))
+        elif kind == "string":
+            out[col] = series.astype("string[pyarrow]")
+        elif kind in ("int", "money"):
+            out[col] = _to_number(series, kind)
+        elif pd.api.types.is_float_dtype(series):
+            # Unlisted columns (e.g. empty Notes) only get a lossless downcast
+            out[col] = _downcast_float(series)
+        else:
+            out[col] = series
+    return pd.DataFrame(out, index=df.index)
+
+
+def memory_report(raw_frames, compact_frames):
+    rows = []
+    for name, raw in raw_frames.items():
+        before = frame_nbytes(raw)
+        after = frame_nbytes(compact_frames[name])
+        rows.append({
+            "Dataset": name,
+            "Rows": len(raw),
+            "Bytes_Before": before,
+            "Bytes_After": after,
+            "Saved_%": round(100 * (1 - after / before), 1) if before else 0.0,
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,163 @@
+import os
+import threading
+
+import pandas as pd
+
+from ledger_partitions import UNDATED, PartitionedLedger, month_groups
+from ledger_schema import LEDGER_SCHEMAS, SCHEMA_VERSION, compact_frame
+from ledger_validation import REPORT_COLUMNS, validate_frame
+
+
+# ✅ Date column of each ledger (used for month partitions and range reads)
+LEDGER_DATE_COLUMNS = {
+    "sales": "date",
+    "cashbook": "Date",
+    "bankbook": "Date",
+    "purchase": "Date",
+}
+
+QUARANTINE_FILE = "_quarantine.csv"
+REPORT_FILE = "_quality.csv"
+
+
+# ✅ Version of the source files: changes whenever any ledger is saved
+def files_version(paths):
+    version = []
+    for name, path in sorted(paths.items()):
+        stat = os.stat(path)
+        version.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+
+# ✅ One read-only copy of every ledger, shared by all sessions
+# Callers get shallow copies: the column buffers are shared, and with pandas
+# copy-on-write enabled a page that assigns, renames or fills a column only
+# copies that column for itself, never the shared frame.
+# Ledgers backed by month partitions are loaded lazily: a date-range read only
+# opens the overlapping months, even once the whole history is in memory for
+# the pages that need it, and the whole history is read on first use.
+# Rows that failed validation at ingest are kept apart in `quarantine`.
+class LedgerStore:
+    def __init__(self, frames, version, partitions=None, quarantine=None, quality=None):
+        self._frames = dict(frames)
+        self._partitions = partitions or {}
+        self._quarantine = quarantine or {}
+        self._quality = quality or {}
+        self.version = version
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def names(self):
+        return list(dict.fromkeys(list(self._frames) + list(self._partitions)))
+
+    def _full(self, name):
+        frame = self._frames.get(name)
+        if frame is None:
+            with self._lock:
+                frame = self._frames.get(name)
+                if frame is None:
+                    frame = self._frames[name] = self._partitions[name].read()
+        return frame
+
+    def frame(self, name):
+        return self._full(name).copy(deep=False)
+
+    def frame_range(self, name, start=None, end=None):
+        if name in self._partitions and (start is not None or end is not None):
+            return self._partitions[name].read(start, end)
+        frame = self._full(name)
+        dates = frame[LEDGER_DATE_COLUMNS[name]]
+        mask = pd.Series(True, index=frame.index)
+        if start is not None:
+            mask &= dates >= pd.Timestamp(start)
+        if end is not None:
+            mask &= dates <= pd.Timestamp(end)
+        return frame[mask]
+
+    def date_bounds(self, name):
+        if name in self._partitions:
+            return self._partitions[name].date_bounds()
+        dates = self._full(name)[LEDGER_DATE_COLUMNS[name]]
+        return dates.min(), dates.max()
+
+    def months(self, name):
+        # "YYYY-MM" keys of the months that have rows
+        if name in self._partitions:
+            return [key for key in self._partitions[name].keys_for() if key != UNDATED]
+        return sorted(self._full(name)[LEDGER_DATE_COLUMNS[name]].dropna().dt.strftime("%Y-%m").unique())
+
+    def month_hashes(self, name):
+        # "YYYY-MM" -> content hash of the month's rows, as in the partition manifest
+        if name in self._partitions:
+            parts = self._partitions[name].manifest["partitions"]
+            return {key: entry["hash"] for key, entry in parts.items() if key != UNDATED}
+        with self._lock:
+            if name not in self._hashes:
+                frame = self._frames[name]
+                self._hashes[name] = {
+                    key: digest for key, _, digest in month_groups(frame, LEDGER_DATE_COLUMNS[name]) if key != UNDATED
+                }
+            return self._hashes[name]
+
+    def quarantine(self, name):
+        return self._quarantine.get(name, pd.DataFrame(columns=["Excel_Row", "Issues"]))
+
+    def quality_report(self):
+        parts = [report for report in self._quality.values() if not report.empty]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=REPORT_COLUMNS)
+
+    def nbytes(self):
+        return {name: int(df.memory_usage(index=True, deep=True).sum()) for name, df in self._frames.items()}
+
+
+def build_store(paths, partition_root=None, closed=None):
+    # Take the version before reading so an edit made mid-load shows up as a new version
+    version = files_version(paths)
+    frames, partitions, quarantine, quality = {}, {}, {}, {}
+    for name, path in paths.items():
+        source_version = files_version({name: path})
+        ledger = None
+        if partition_root is not None:
+            ledger = PartitionedLedger(os.path.join(partition_root, name), LEDGER_DATE_COLUMNS[name])
+            partitions[name] = ledger
+            if ledger.source_version == source_version and ledger.manifest.get("schema_version") == SCHEMA_VERSION:
+                # Partitions already match the workbook and the schema: nothing to read now
+                quarantine[name], quality[name] = _load_quality(ledger.root)
+                ledger.remove_unused()
+                continue
+        raw = pd.read_excel(path)
+        schema = LEDGER_SCHEMAS[name]
+        frame, quarantine[name], quality[name] = validate_frame(name, raw, compact_frame(raw, schema), schema)
+        if closed is not None:
+            # Months already closed keep their frozen rows, whatever the workbook says now
+            frame = closed.freeze(name, frame, LEDGER_DATE_COLUMNS[name])
+        if ledger is not None:
+            # Quality files first: the manifest written last marks the ledger as current
+            _save_quality(ledger.root, quarantine[name], quality[name])
+            ledger.write(frame, source_version, SCHEMA_VERSION)
+            # Keep month order so the in-memory frame matches later partition reads
+            frame = ledger.read()
+        frames[name] = frame
+    return LedgerStore(frames, version, partitions, quarantine, quality)
+
+
+def _save_quality(root, quarantine, report):
+    os.makedirs(root, exist_ok=True)
+    for table, filename in ((quarantine, QUARANTINE_FILE), (report, REPORT_FILE)):
+        path = os.path.join(root, filename)
+        table.to_csv(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+
+
+def _load_quality(root):
+    tables = []
+    for filename in (QUARANTINE_FILE, REPORT_FILE):
+        path = os.path.join(root, filename)
+        tables.append(pd.read_csv(path, dtype="string") if os.path.exists(path) else pd.DataFrame())
+    quarantine, report = tables
+    # Cells stay as the text they were quarantined with; the counters are numbers
+    if "Excel_Row" in quarantine.columns:
+        quarantine["Excel_Row"] = quarantine["Excel_Row"].astype("int64")
+    if "Rows" in report.columns:
+        report["Rows"] = report["Rows"].astype("int64")
+    return quarantine, report
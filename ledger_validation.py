@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+
+REPORT_COLUMNS = ["Ledger", "Check", "Column", "Rows"]
+
+
+def _missing_column(kind, fill, length):
+    # Typed stand-in for a column the workbook does not have
+    if kind == "money":
+        return pd.Series(np.zeros(length, dtype=np.int64))
+    if kind == "int":
+        return pd.Series(np.zeros(length, dtype=np.int8))
+    if kind == "date":
+        return pd.Series(pd.NaT, index=range(length), dtype="datetime64[ns]")
+    if kind == "string":
+        return pd.Series(pd.NA, index=range(length), dtype="string[pyarrow]")
+    categories = [fill] if fill is not None else []
+    return pd.Series(fill, index=range(length), dtype=pd.CategoricalDtype(categories))
+
+
+# ✅ Vectorized data-quality checks, run once per ingest
+#   missing_column   -> column added with a typed default, no row is quarantined
+#   bad_date         -> a date cell that could not be parsed
+#   bad_number       -> an amount / quantity cell that is not a number
+#   negative_amount  -> a `nonnegative` column below zero
+#   duplicate_key    -> the voucher / invoice number was already used above
+# Rows failing a row check go to the quarantine table with the original cell
+# values and the Excel row number; the clean frame keeps the schema dtypes and
+# has empty amount cells as 0, so pages can use it without re-coercing.
+def validate_frame(name, raw, frame, schema):
+    raw = raw.rename(columns=schema.get("aliases", {}))
+    frame = frame.reset_index(drop=True)
+    raw = raw.reset_index(drop=True)
+    fills = schema.get("fill", {})
+    report = []
+    masks = []
+
+    for col, spec in schema["columns"].items():
+        kind, _ = spec if isinstance(spec, tuple) else (spec, None)
+        if col not in frame.columns:
+            frame[col] = _missing_column(kind, fills.get(col), len(frame))
+            report.append((name, "missing_column", col, len(frame)))
+            continue
+        if kind == "date":
+            masks.append(("bad_date", col, raw[col].notna() & frame[col].isna()))
+        elif kind in ("int", "money"):
+            masks.append(("bad_number", col, raw[col].notna() & frame[col].isna()))
+
+    for col in schema.get("nonnegative", []):
+        if col in raw.columns:
+            masks.append(("negative_amount", col, (frame[col] < 0).fillna(False)))
+
+    key = schema.get("unique")
+    if key in raw.columns:
+        masks.append(("duplicate_key", key, frame[key].notna() & frame[key].duplicated(keep="first")))
+
+    bad = pd.Series(False, index=frame.index)
+    reasons = pd.Series("", index=frame.index)
+    for check, col, mask in masks:
+        mask = mask.to_numpy(dtype=bool)
+        if mask.any():
+            report.append((name, check, col, int(mask.sum())))
+            bad |= mask
+            reasons = reasons + np.where(mask, f"{check}:{col}; ", "")
+
+    quarantine = raw[bad].astype("string")
+    quarantine.insert(0, "Excel_Row", quarantine.index + 2)
+    quarantine.insert(1, "Issues", reasons[bad].str.rstrip("; ").astype("string"))
+    quarantine = quarantine.reset_index(drop=True)
+
+    clean = frame[~bad].reset_index(drop=True)
+    for col, spec in schema["columns"].items():
+        if spec in ("int", "money") and clean[col].isna().any():
+            clean[col] = clean[col].fillna(0)
+
+    return clean, quarantine, pd.DataFrame(report, columns=REPORT_COLUMNS)
@@ -0,0 +1,87 @@
+import threading
+import traceback
+from datetime import datetime
+
+from ledger_store import files_version
+
+
+# ✅ Background reload of the ledgers
+# A daemon thread polls the workbook versions (mtime + size). When a version
+# changes and stays the same for one more poll (Excel writes in several steps),
+# the dataset is rebuilt in the thread and swapped in with one reference
+# assignment. Sessions keep reading the previous version until then, so no rerun
+# waits for ingestion; only the very first load blocks. A failed reload keeps
+# the previous version and is retried on the next change.
+class LedgerWatcher:
+    def __init__(self, paths, build, interval=2.0):
+        self.paths = dict(paths)
+        self.build = build
+        self.interval = interval
+        self.loaded_at = None
+        self.last_error = None
+        self.reloading = False
+        self._store = None
+        self._pending = None
+        self._failed = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ledger-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def store(self, timeout=None):
+        # The current version; blocks only until the first load has finished
+        if self._store is None:
+            self._ready.wait(timeout)
+            if self._store is None:
+                raise RuntimeError(f"Ledgers could not be loaded: {self.last_error}")
+        return self._store
+
+    def _run(self):
+        self._reload(self._version())
+        while not self._stop.wait(self.interval):
+            self._poll()
+
+    def _poll(self):
+        version = self._version()
+        if version is None or version == self._store_version() or version == self._failed:
+            self._pending = None
+            return
+        if version != self._pending:
+            # Changed since the last poll: wait until the files settle
+            self._pending = version
+            return
+        self._reload(version)
+        self._pending = None
+
+    def _version(self):
+        try:
+            return files_version(self.paths)
+        except OSError:
+            # A workbook is missing for a moment (being replaced): try again later
+            return None
+
+    def _store_version(self):
+        return self._store.version if self._store is not None else None
+
+    def _reload(self, version):
+        self.reloading = True
+        try:
+            store = self.build()
+            self._store = store
+            self._failed = None
+            self.last_error = None
+            self.loaded_at = datetime.now()
+        except Exception:
+            self._failed = version
+            self.last_error = traceback.format_exc(limit=3)
+        finally:
+            self.reloading = False
+            self._ready.set()
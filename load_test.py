@@ -0,0 +1,261 @@
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+
+
+# ✅ Headless load test for main.py
+# N virtual users run in threads of one process, like sessions of one Streamlit
+# server: they share st.cache_resource / st.cache_data, and each rerun is timed.
+#   1. warm-up: one session opens every page once (fills the caches)
+#   2. profile: one session reruns every page alone -> CPU time and RSS per page
+#   3. load:    N sessions click through random pages and date ranges at once
+# Reports latency percentiles per page and can gate against a saved baseline:
+#   python load_test.py --users 8 --iterations 20 --save-baseline load_baseline.json
+#   python load_test.py --users 8 --iterations 20 --baseline load_baseline.json
+
+
+def _install_shared_runtime():
+    # AppTest swaps a process-global mock runtime in and out around every run;
+    # with sessions running in parallel one would clear it under the others,
+    # so all sessions share one mock runtime instead. Each AppTest run also gets
+    # its own script cache, and compiling main.py from several threads at once
+    # trips "AST constructor recursion depth mismatch" on Python 3.11. A real
+    # server compiles once into a shared cache, so the sessions share one too.
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: shared)
+    Runtime.exists = classmethod(lambda cls: True)
+
+    script_cache = ScriptCache()
+    runner_init = LocalScriptRunner.__init__
+
+    def init(self, *args, **kwargs):
+        runner_init(self, *args, **kwargs)
+        self._script_cache = script_cache
+
+    LocalScriptRunner.__init__ = init
+
+
+def rss_mb():
+    # Current resident set size (Linux), peak RSS elsewhere
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Session:
+    def __init__(self, script, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.app = AppTest.from_file(script, default_timeout=timeout)
+        self.timeout = timeout
+
+    def _timed(self, action):
+        started = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - started
+        error = str(self.app.exception[0].value)[:200] if self.app.exception else None
+        return elapsed, error
+
+    def start(self):
+        return self._timed(self.app.run)
+
+    def pages(self):
+        return list(self.app.sidebar.radio[0].options)
+
+    def open(self, page):
+        if not self.app.sidebar.radio:
+            # The last rerun did not get as far as the menu: start over
+            return self._timed(lambda: self.app.run())[0], "menu not rendered"
+        return self._timed(lambda: self.app.sidebar.radio[0].set_value(page).run())
+
+    def change_dates(self, rng):
+        # Pick a random sub-range in every date input of the current page
+        widgets = [w for w in self.app.date_input if w.min is not None and w.max is not None]
+        if not widgets:
+            return None
+        for widget in widgets:
+            low, high = pd.Timestamp(widget.min), pd.Timestamp(widget.max)
+            days = max((high - low).days, 0)
+            first = low + pd.Timedelta(days=rng.randint(0, days))
+            last = first + pd.Timedelta(days=rng.randint(0, (high - first).days))
+            if isinstance(widget.value, tuple):
+                widget.set_value((first.date(), last.date()))
+            elif "End" in (widget.label or ""):
+                widget.set_value(last.date())
+            else:
+                widget.set_value(first.date())
+        return self._timed(self.app.run)
+
+
+def profile_pages(script, pages, timeout):
+    # One session, one page at a time: CPU and memory attributable to the page
+    session = Session(script, timeout)
+    session.start()
+    rows = []
+    for page in pages:
+        cpu, rss = cpu_seconds(), rss_mb()
+        elapsed, error = session.open(page)
+        rows.append({
+            "Page": page,
+            "Solo_ms": round(elapsed * 1000, 1),
+            "CPU_ms": round((cpu_seconds() - cpu) * 1000, 1),
+            "RSS_MB": round(rss_mb(), 1),
+            "RSS_Delta_MB": round(rss_mb() - rss, 1),
+            "Error": error,
+        })
+    return pd.DataFrame(rows)
+
+
+def run_load(script, pages, users, iterations, timeout, seed):
+    samples = []
+    lock = threading.Lock()
+
+    def user(number):
+        rng = random.Random(seed + number)
+        session = Session(script, timeout)
+        elapsed, error = session.start()
+        records = [("(start)", "start", elapsed, error)]
+        for _ in range(iterations):
+            page = rng.choice(pages)
+            elapsed, error = session.open(page)
+            records.append((page, "open", elapsed, error))
+            if rng.random() < 0.5:
+                timed = session.change_dates(rng)
+                if timed is not None:
+                    records.append((page, "dates", *timed))
+        with lock:
+            samples.extend(records)
+
+    cpu, started = cpu_seconds(), time.perf_counter()
+    threads = [threading.Thread(target=user, args=(n,), name=f"user-{n}") for n in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    totals = {
+        "users": users,
+        "reruns": len(samples),
+        "wall_s": round(wall, 2),
+        "reruns_per_s": round(len(samples) / wall, 2) if wall else 0.0,
+        "cpu_utilization": round((cpu_seconds() - cpu) / wall, 2) if wall else 0.0,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    return pd.DataFrame(samples, columns=["Page", "Action", "Seconds", "Error"]), totals
+
+
+def latency_table(samples):
+    def summary(group):
+        ms = group["Seconds"].to_numpy() * 1000
+        return pd.Series({
+            "Reruns": len(ms),
+            "p50_ms": round(float(np.percentile(ms, 50)), 1),
+            "p90_ms": round(float(np.percentile(ms, 90)), 1),
+            "p99_ms": round(float(np.percentile(ms, 99)), 1),
+            "Max_ms": round(float(ms.max()), 1),
+            "Errors": int(group["Error"].notna().sum()),
+        })
+
+    table = samples.groupby("Page", sort=True).apply(summary).reset_index()
+    return table.astype({"Reruns": "int64", "Errors": "int64"})
+
+
+def check_baseline(latency, baseline, tolerance):
+    # A page fails when its p90 grew by more than `tolerance` over the baseline
+    previous = {row["Page"]: row for row in baseline["latency"]}
+    failures = []
+    for row in latency.to_dict("records"):
+        before = previous.get(row["Page"])
+        if before is None:
+            continue
+        limit = before["p90_ms"] * (1 + tolerance)
+        if row["p90_ms"] > limit:
+            failures.append(f"{row['Page']}: p90 {row['p90_ms']:.1f} ms > {limit:.1f} ms (baseline {before['p90_ms']:.1f} ms)")
+        if row["Errors"] > before.get("Errors", 0):
+            failures.append(f"{row['Page']}: {row['Errors']} errors (baseline {before.get('Errors', 0)})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the Streamlit app")
+    parser.add_argument("--script", default="main.py")
+    parser.add_argument("--users", type=int, default=8, help="concurrent sessions")
+    parser.add_argument("--iterations", type=int, default=20, help="page visits per session")
+    parser.add_argument("--pages", nargs="*", help="only these menu entries (default: all)")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds allowed per rerun")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", help="fail if p90 latency regressed against this JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p90 growth over the baseline")
+    parser.add_argument("--save-baseline", help="write this run's report as the new baseline")
+    args = parser.parse_args(argv)
+
+    # Sessions resolve data files and local modules relative to the app
+    app_dir = os.path.dirname(os.path.abspath(args.script))
+    os.chdir(app_dir)
+    sys.path.insert(0, app_dir)
+    script = os.path.basename(args.script)
+    _install_shared_runtime()
+
+    warm = Session(script, args.timeout)
+    warm.start()
+    pages = args.pages or warm.pages()
+    for page in pages:
+        warm.open(page)
+
+    profile = profile_pages(script, pages, args.timeout)
+    samples, totals = run_load(script, pages, args.users, args.iterations, args.timeout, args.seed)
+    latency = latency_table(samples)
+    report = latency.merge(profile[["Page", "Solo_ms", "CPU_ms", "RSS_MB", "RSS_Delta_MB"]], on="Page", how="left")
+
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(report.to_string(index=False))
+    print(json.dumps(totals))
+    errors = samples[samples["Error"].notna()]
+    for page, error in errors[["Page", "Error"]].drop_duplicates().itertuples(index=False):
+        print(f"ERROR {page}: {error}")
+
+    result = {
+        "totals": totals,
+        "latency": latency.to_dict("records"),
+        "profile": profile.drop(columns="Error").to_dict("records"),
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=1, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures = check_baseline(latency, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        return 1 if failures else 0
+    return 1 if not errors.empty else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
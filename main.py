@@ -2,12 +2,24 @@ import streamlit as st
 import pandas as pd
 from io import BytesIO
 import os
-import plotly.express as px
-from PIL import Image
+import numpy as np
 import datetime
 from datetime import datetime as dt
-import matplotlib.pyplot as plt
-
+from ledger_schema import LEDGER_SCHEMAS, compact_frame, memory_report
+from ledger_store import build_store
+from ledger_watcher import LedgerWatcher
+from filter_engine import FilterEngine, as_filter
+from search_index import SearchIndex
+from customer_analytics import CustomerAnalytics
+from anomaly_detection import AnomalyDetector
+from balance_engine import BalanceEngine
+from wallet_import import PROVIDERS, import_statement, wallet_summary, wallet_transactions
+from vat_engine import VatReturnStore, load_rates
+from sales_cube import SALES_HIERARCHIES, build_cubes
+from period_close import PeriodCloseStore, month_bounds
+from forecasting import FORECAST_SERIES, SHORT_HISTORY, ForecastService
+# Chart libraries (plotly.express, matplotlib) are imported by the pages that draw
+# with them, so a cold start and the Home page do not pay for them.
 
 
 # ✅ Excel file paths
@@ -16,6 +28,17 @@ cashbook_data = "cashbook.xlsx"
 bankbook_data = "bankbook.xlsx"
 purchase_data = "purchase_sales_demo.xlsx"
 
+# ✅ Derived data written by the app (wallet ledger, ...)
+warehouse_dir = "warehouse"
+wallet_db = os.path.join(warehouse_dir, "wallet_ledger.sqlite")
+vat_returns_file = os.path.join(warehouse_dir, "vat_returns.csv")
+partition_dir = os.path.join(warehouse_dir, "partitions")
+closed_dir = os.path.join(warehouse_dir, "closed")
+forecast_dir = os.path.join(warehouse_dir, "forecasts")
+
+# ✅ VAT rates per category (edit this file to change rates)
+vat_rates_file = "vat_rates.json"
+
 # Page configuration
 st.set_page_config(
     page_title="Cooperative Store",
@@ -23,29 +46,220 @@ st.set_page_config(
     layout="wide"
 )
 
-# ✅ Load data functions
-@st.cache_data
+# ✅ Shared ledger store
+# Every session reads the same in-memory ledgers (st.cache_resource, no pickling).
+# With copy-on-write the few pages that add or rename columns only copy what they touch.
+# Ledgers are also kept as month partitions, so date-filtered pages only open the
+# months that overlap the selected range.
+pd.set_option("mode.copy_on_write", True)
+
+LEDGER_FILES = {
+    "sales": sales_data,
+    "cashbook": cashbook_data,
+    "bankbook": bankbook_data,
+    "purchase": purchase_data,
+}
+
+@st.cache_resource
+def get_search_index():
+    return SearchIndex()
+
+@st.cache_resource
+def get_customer_analytics():
+    return CustomerAnalytics()
+
+# Cashbook / bankbook alerts, updated with every ingest
+@st.cache_resource
+def get_anomaly_detector():
+    return AnomalyDetector()
+
+# Cash and bank balances per account (sorted prefix sums), updated with every ingest
+@st.cache_resource
+def get_balance_engine():
+    return BalanceEngine()
+
+# Next-month projections, refitted in a process pool when the daily rollups change
+@st.cache_resource
+def get_forecasts():
+    return ForecastService(forecast_dir)
+
+# Closed months: frozen rows, aggregate snapshots and closing balances
+@st.cache_resource
+def get_period_close():
+    return PeriodCloseStore(closed_dir)
+
+def load_store(index, customers, anomalies, balances, forecasts, closing):
+    store = build_store(LEDGER_FILES, partition_dir, closing)
+    # Keep the search index in step with every ingest (only changed rows are re-indexed)
+    for name in store.names():
+        index.sync(name, store.frame(name), store.version)
+    # Per-customer aggregates: appended sales rows are merged, not regrouped
+    customers.sync(store.frame("sales"), store.version)
+    # Anomaly scores and balances: appended rows only touch the days after them
+    for name in ("cashbook", "bankbook"):
+        anomalies.sync(name, store.frame(name), store.version)
+        balances.sync(name, store.frame(name), store.version)
+    # Forecasts: only series sets whose daily rollup changed are refitted
+    forecasts.refresh(store)
+    return store
+
+# ✅ Edited workbooks are picked up by a background watcher, which rebuilds the
+# store off the request path and swaps it in when it is ready. The shared
+# objects are synced before the swap and keep the previous version's results,
+# so pages pass their store version and read results that match their rows.
+# The worker thread runs outside any script run, where st.cache_resource does not
+# hand back the sessions' objects, so it is given the shared ones up front.
+@st.cache_resource
+def get_watcher():
+    shared = get_search_index(), get_customer_analytics(), get_anomaly_detector(), get_balance_engine(), get_forecasts(), get_period_close()
+    return LedgerWatcher(LEDGER_FILES, lambda: load_store(*shared), interval=2.0).start()
+
+# One dataset version per rerun: a swap mid-run shows up on the next rerun
+run_store = get_watcher().store()
+
+def current_store():
+    return run_store
+
+# ✅ Load data functions (compacted to categoricals / Arrow strings / downcast numbers)
 def load_sales():
-    return pd.read_excel(sales_data)
+    return current_store().frame("sales")
 
-@st.cache_data
 def load_cashbook():
-    return pd.read_excel(cashbook_data)
+    return current_store().frame("cashbook")
 
-@st.cache_data
 def load_bankbook():
-    return pd.read_excel(bankbook_data)
+    return current_store().frame("bankbook")
 
-@st.cache_data
 def load_purchase():
-    return pd.read_excel(purchase_data)
+    return current_store().frame("purchase")
+
+# ✅ Date-filtered loads: only the month partitions overlapping [start, end] are read
+def load_range(name, start, end):
+    return current_store().frame_range(name, start, end)
+
+def date_bounds(name):
+    # Min / max date from the partition statistics, without reading any rows
+    min_date, max_date = current_store().date_bounds(name)
+    today = datetime.date.today()
+    return (
+        min_date.date() if pd.notna(min_date) else today,
+        max_date.date() if pd.notna(max_date) else today,
+    )
 
-# ✅ Store data in separate variables
-df_sales = load_sales()
+# ✅ Aggregates by dimension: closed months come from their snapshots,
+# only the open months are grouped from ledger rows
+def period_aggregate(ledger, dimension, start=None, end=None):
+    return get_period_close().aggregate(current_store(), ledger, dimension, start, end)
+
+# ✅ Rows that failed validation at ingest, shown on the pages that use the ledger
+def show_quarantine(name):
+    quarantined = current_store().quarantine(name)
+    if not quarantined.empty:
+        with st.expander(f"⚠️ {len(quarantined)} {name} row(s) quarantined by data-quality checks"):
+            st.dataframe(quarantined, use_container_width=True)
+
+# ✅ Anomaly alerts in the selected date range (precomputed at ingest)
+def show_alerts(name, start, end):
+    alerts = get_anomaly_detector().alerts(name, start, end, version=current_store().version)
+    if alerts.empty:
+        st.caption("🚨 No anomalies flagged in the selected date range.")
+        return
+    with st.expander(f"🚨 {len(alerts)} alert(s): unusual amounts and possible duplicates", expanded=True):
+        counts = alerts["Check"].value_counts()
+        cols = st.columns(len(counts))
+        for col, (check, count) in zip(cols, counts.items()):
+            col.metric(check, int(count))
+        st.dataframe(alerts, use_container_width=True, hide_index=True)
+        st.caption("Amounts are compared with the previous 30 values of the same category "
+                   "(z-score / median absolute deviation); duplicates share amount, date and name.")
+
+# ✅ Sales drill-down cubes, rolled up once per ledger version and date range
+@st.cache_resource(max_entries=8)
+def get_sales_cubes(version, start, end):
+    return build_cubes(load_range("sales", start, end))
+
+# ✅ Columns the Cashbook and Liability pages add to their ledger rows
+def categorize_payment(payment_type):
+    # Broader groups of the payment categories
+    payment_type = str(payment_type).lower()
+    if payment_type in ['sales']:
+        return 'Income'
+    elif payment_type in ['expense', 'payable']:
+        return 'Expenses'
+    elif payment_type in ['receivedable', 'receivable']:
+        return 'Receivables'
+    elif payment_type in ['laibility', 'liability']:
+        return 'Liabilities'
+    else:
+        return 'Other'
 
-df_cash = load_cashbook()
-df_bank = load_bankbook()
-df_purchase = load_purchase()
+def with_cash_columns(cashbook):
+    # Running cash balance after each entry, carried in from before the first row
+    return cashbook.assign(
+        Balance=get_balance_engine().running("cashbook", cashbook, version=current_store().version),
+        Category_Group=cashbook["Payment_category"].apply(categorize_payment),
+    )
+
+def with_purchase_columns(purchase_df):
+    outstanding = purchase_df["Payable"] - purchase_df["Receivedable"]
+    return purchase_df.assign(
+        Outstanding=outstanding,
+        Outstanding_Status=np.select(
+            [outstanding > 0, outstanding == 0],
+            ["With Outstanding", "Fully Paid"],
+            "Overpaid"
+        ),
+    )
+
+FILTER_COLUMNS = {"cashbook": with_cash_columns, "purchase": with_purchase_columns}
+
+# ✅ Compiled multiselect filters over a whole ledger, built once per ledger
+# version and shared by sessions; the page's date range is one more bitmap
+@st.cache_resource(max_entries=8)
+def get_filter_engine(name, version, dimensions, date_column):
+    frame = FILTER_COLUMNS[name](current_store().frame(name))
+    return FilterEngine(frame, list(dimensions), date_column)
+
+# ✅ Wallet ledger queries, cached until the next import touches the database
+def wallet_version():
+    return os.stat(wallet_db).st_mtime_ns if os.path.exists(wallet_db) else 0
+
+@st.cache_data
+def load_wallet_summary(version, start=None, end=None):
+    return wallet_summary(wallet_db, start, end)
+
+# ✅ Monthly VAT returns, computed once per ledger / rate-file / filing version
+@st.cache_resource
+def get_vat_store():
+    return VatReturnStore(vat_returns_file)
+
+def vat_rates_version():
+    return os.stat(vat_rates_file).st_mtime_ns
+
+def vat_filed_version():
+    return os.stat(vat_returns_file).st_mtime_ns if os.path.exists(vat_returns_file) else 0
+
+@st.cache_data
+def load_vat_returns(version, rates_version, filed_version):
+    return get_vat_store().returns(current_store(), load_rates(vat_rates_file))
+
+@st.cache_data
+def load_vat_lines(version, rates_version, filed_version, period):
+    # Filed periods come back exactly as filed, whatever the current rates
+    return get_vat_store().lines(period, current_store(), load_rates(vat_rates_file))
+
+def file_vat_return(period):
+    # Files the month's return once its ledgers are closed; False otherwise
+    return get_vat_store().close(
+        period, current_store(), load_rates(vat_rates_file), get_period_close().closed_periods()
+    )
+
+# ✅ Bytes per dataset before and after compaction, measured once per ledger version
+@st.cache_data(max_entries=1)
+def load_memory_report(version):
+    raw = {name: pd.read_excel(path) for name, path in LEDGER_FILES.items()}
+    compact = {name: compact_frame(df, LEDGER_SCHEMAS[name]) for name, df in raw.items()}
+    return memory_report(raw, compact)
 
 
 # Sidebar navigation
@@ -59,12 +273,40 @@ page = st.sidebar.radio(
         "💵 Cashbook",
         "🧾 Purchase",
         "📉 Liability",
+        "📲 Wallet Import",
         "📈 Profit & Loss",
+        "🔮 Forecast",
+        "🧮 VAT & Tax",
+        "🔒 Period Close",
         "📊 Charts",
         "📚 About",
     )
 )
 
+# --- Global search across every ledger ---
+search_query = st.sidebar.text_input("🔎 Search all ledgers", placeholder="Invoice, voucher, supplier, customer...")
+if search_query.strip():
+    store = current_store()
+    results, counts = get_search_index().search(search_query, version=store.version)
+    st.subheader(f"🔎 Search results for \"{search_query.strip()}\"")
+    if not results:
+        st.info("No matching entries found.")
+    for name, positions in results.items():
+        with st.expander(f"{name.title()} — {counts[name]} match(es)", expanded=True):
+            if counts[name] > len(positions):
+                st.caption(f"Showing the first {len(positions)}; refine the search to see the rest.")
+            st.dataframe(store.frame(name).iloc[positions], use_container_width=True)
+    st.divider()
+
+# --- Data freshness (edited workbooks are reloaded in the background) ---
+watcher = get_watcher()
+if watcher.reloading:
+    st.sidebar.caption("🔄 Reloading edited workbooks in the background...")
+elif watcher.last_error:
+    st.sidebar.warning("⚠️ The last reload failed; showing the previous data.")
+if watcher.loaded_at is not None:
+    st.sidebar.caption(f"📂 Data loaded at {watcher.loaded_at:%H:%M:%S}")
+
 #Show preview depending on menu
 if page == "🏠 Home":
     st.title("🏠 Girls Cooperative Store")
@@ -81,12 +323,14 @@ if page == "🏠 Home":
 
     # --- Date Filter ---
     st.subheader("📅 Select Date Range")
-    start_date = st.date_input("Start Date", pd.to_datetime(df_sales["date"]).min())
-    end_date = st.date_input("End Date", pd.to_datetime(df_sales["date"]).max())
+    min_date, max_date = date_bounds("sales")
+    start_date = st.date_input("Start Date", min_date)
+    end_date = st.date_input("End Date", max_date)
 
     # Filter data
-    df_sales["date"] = pd.to_datetime(df_sales["date"])
-    sales_filtered = df_sales[(df_sales["date"] >= pd.to_datetime(start_date)) & (df_sales["date"] <= pd.to_datetime(end_date))]
+    sales_filtered = load_range("sales", start_date, end_date)
+    cash_totals = period_aggregate("cashbook", "Payment_category")
+    bank_totals = period_aggregate("bankbook", "fund_source")
 
     # --- KPIs ---
     col1, col2, col3 = st.columns(3)
@@ -95,13 +339,23 @@ if page == "🏠 Home":
     col3.metric("📊 Transactions", f"{len(sales_filtered)} invoices")
 
     col4, col5, col6 = st.columns(3)
-    col4.metric("💵 Total Income", f"{df_cash['Cash_In'].sum():,.2f}") 
-    col5.metric("📉 Total Expense", f"{(df_cash['Cash_In'][df_cash['Payment_category']=='Expense']).sum():,.2f}" if "Payment_category" in df_cash else "Need 'Payment_category' column")
-    col6.metric("🏦 Bank Deposit", f"{df_bank['Deposit_Amount'].sum():,.2f}" if "Deposit_Amount" in df_bank else "Need 'Deposit_Amount' column")
+    col4.metric("💵 Total Income", f"{cash_totals['Cash_In'].sum():,.2f}") 
+    col5.metric("📉 Total Expense", f"{(cash_totals['Cash_In'][cash_totals['Payment_category']=='Expense']).sum():,.2f}")
+    col6.metric("🏦 Bank Deposit", f"{bank_totals['Deposit_Amount'].sum():,.2f}")
 
     col7, col8 = st.columns(2)
-    col7.metric("🏦 Bank Withdrawal", f"{df_bank['Withdrawal_Amount'].sum():,.2f}" if "Withdrawal_Amount" in df_bank else "Need 'Withdrawal_Amount' column")
-    col8.metric("📱 Mobile Banking", f"{sales_filtered.loc[sales_filtered['payment_method'].isin(['bKash','Nagad','Rocket']), 'total_amount'].sum():,.2f}")
+    col7.metric("🏦 Bank Withdrawal", f"{bank_totals['Withdrawal_Amount'].sum():,.2f}")
+    mobile_sales = sales_filtered['payment_method'].isin(PROVIDERS) | sales_filtered['bank_name'].isin(PROVIDERS)
+    col8.metric("📱 Mobile Banking", f"{sales_filtered.loc[mobile_sales, 'total_amount'].sum():,.2f}")
+
+    # --- Wallet statements (imported bKash / Nagad / Rocket ledgers) ---
+    wallet_totals = load_wallet_summary(wallet_version(), start_date, end_date)
+    col9, col10 = st.columns(2)
+    col9.metric("📲 Wallet Receipts", f"{wallet_totals['Received'].sum():,.2f}")
+    col10.metric("📲 Wallet Payouts", f"{wallet_totals['Paid_Out'].sum():,.2f}")
+    if not wallet_totals.empty:
+        with st.expander("📲 Wallet statement breakdown"):
+            st.dataframe(wallet_totals, use_container_width=True, hide_index=True)
 
     # --- Sales Trend Chart ---
     st.subheader("📈 Sales Trend")
@@ -111,12 +365,13 @@ if page == "🏠 Home":
     # --- Payment Method Distribution ---
     st.subheader("💳 Payment Method Distribution")
     payment_counts = sales_filtered['payment_method'].value_counts()
+    payment_counts = payment_counts[payment_counts > 0]
     st.bar_chart(payment_counts)
 
     # --- Top 5 Products ---
     if 'product_name' in sales_filtered:
         st.subheader("🏆 Top 5 Products Sold")
-        top_products = sales_filtered.groupby('product_name')['total_amount'].sum().sort_values(ascending=False).head(5)
+        top_products = sales_filtered.groupby('product_name', observed=True)['total_amount'].sum().sort_values(ascending=False).head(5)
         st.dataframe(top_products)
 
     # --- Download Filtered Sales Data ---
@@ -130,23 +385,28 @@ if page == "🏠 Home":
     )
 
 elif page == "📍 Dashboard":
+    import plotly.express as px
+
     st.title("📍 Dashboard Overview")
+    df_bank = load_bankbook()
+
+    # Closed months come from their snapshots, open months are aggregated live
+    cat_sales = period_aggregate("sales", "category").rename(columns={"Total_Sales": "total_amount"})
 
     # --- Sales KPIs ---
     col1, col2, col3 = st.columns(3)
-    col1.metric("💸 Total Sales", f"{df_sales['total_amount'].sum():,.2f}")
-    col2.metric("📦 Total Products Sold", f"{df_sales['quantity'].sum():,.0f}")
-    col3.metric("🧾 Total Invoices", len(df_sales))
+    col1.metric("💸 Total Sales", f"{cat_sales['total_amount'].sum():,.2f}")
+    col2.metric("📦 Total Products Sold", f"{cat_sales['Total_Quantity'].sum():,.0f}")
+    col3.metric("🧾 Total Invoices", int(cat_sales["Invoices"].sum()))
 
     # --- Category-wise Product Sales ---
     st.subheader("📊 Category-wise Product Sales")
-    cat_sales = df_sales.groupby("category")["total_amount"].sum().reset_index().sort_values("total_amount", ascending=False)
     fig1 = px.bar(cat_sales, x="category", y="total_amount", color="category", title="Sales by Category")
     st.plotly_chart(fig1, use_container_width=True)
 
     # --- Cashbook Analysis (Income vs Expense by Category) ---
     st.subheader("💵 Cashbook: Income & Expense by Category")
-    cash_summary = df_cash.groupby("Payment_category")[["Cash_In","Cash_Out"]].sum().reset_index()
+    cash_summary = period_aggregate("cashbook", "Payment_category")[["Payment_category", "Cash_In", "Cash_Out"]]
 
     fig2 = px.bar(
         cash_summary.melt(id_vars="Payment_category", value_vars=["Cash_In","Cash_Out"]),
@@ -158,7 +418,7 @@ elif page == "📍 Dashboard":
     # --- Bankbook Analysis (Deposit vs Withdrawal by Category) ---
     if "Cash_In" in df_bank.columns and "Cash_Out" in df_bank.columns:
         st.subheader("🏦 Bankbook: Deposit vs Withdrawal by Category")
-        bank_summary = df_bank.groupby("Payment_category")[["Cash_In","Cash_Out"]].sum().reset_index()
+        bank_summary = df_bank.groupby("Payment_category", observed=True)[["Cash_In","Cash_Out"]].sum().reset_index()
 
         fig3 = px.bar(
             bank_summary.melt(id_vars="Payment_category", value_vars=["Cash_In","Cash_Out"]),
@@ -170,36 +430,59 @@ elif page == "📍 Dashboard":
     # --- Extra Insights ---
     st.subheader("📈 Additional Insights")
     col4, col5 = st.columns(2)
-    top_customer = df_sales.groupby("customer_name")["total_amount"].sum().reset_index().sort_values("total_amount", ascending=False).head(1)
-    col4.metric("👤 Top Customer", f"{top_customer.iloc[0]['customer_name']} ({top_customer.iloc[0]['total_amount']:,.2f})")
+    customers = get_customer_analytics()
+    top_customer = customers.top(1, version=current_store().version)
+    col4.metric("👤 Top Customer", f"{top_customer.iloc[0]['customer_name']} ({top_customer.iloc[0]['Monetary']:,.2f})")
 
-    top_product = df_sales.groupby("product_name")["total_amount"].sum().reset_index().sort_values("total_amount", ascending=False).head(1)
+    top_product = period_aggregate("sales", "product_name").rename(columns={"Total_Sales": "total_amount"}).head(1)
     col5.metric("⭐ Best Product", f"{top_product.iloc[0]['product_name']} ({top_product.iloc[0]['total_amount']:,.2f})")
 
+    # --- Customer Analytics (RFM) ---
+    st.subheader("👥 Customer Segments (RFM)")
+    segments = customers.segments(version=current_store().version)
+    col6, col7 = st.columns(2)
+    with col6:
+        fig4 = px.bar(segments, x="Segment", y="Customers", color="Segment", title="Customers per Segment")
+        st.plotly_chart(fig4, use_container_width=True)
+    with col7:
+        st.dataframe(segments, use_container_width=True, hide_index=True)
+
+    top_n = st.slider("Top customers by lifetime value", min_value=5, max_value=50, value=10, step=5)
+    st.dataframe(
+        customers.top(top_n, version=current_store().version)[[
+            "customer_name", "Segment", "Recency_Days", "Frequency", "Monetary",
+            "Outstanding", "Preferred_Method", "Last_Purchase"
+        ]],
+        use_container_width=True,
+        hide_index=True
+    )
+
 
 # ----------------- SALES ANALYSIS PAGE -----------------
 elif page == "💸 Sales Analysis":
+    import plotly.express as px
+
     st.header("💸 Sales Analysis")
 
     # ---- Date Range Filter ----
-    df_sales['date'] = pd.to_datetime(df_sales['date'], errors='coerce')
-    min_date, max_date = df_sales['date'].min(), df_sales['date'].max()
+    min_date, max_date = date_bounds("sales")
     start_date, end_date = st.date_input(
         "Select Date Range", [min_date, max_date]
     )
-    mask = (df_sales['date'] >= pd.to_datetime(start_date)) & (df_sales['date'] <= pd.to_datetime(end_date))
-    filtered_df = df_sales.loc[mask]
+    # Closed months come from their snapshots, open months are aggregated live
+    cat_sales = period_aggregate("sales", "category", start_date, end_date)
 
-    if filtered_df.empty:
+    if cat_sales.empty:
         st.warning("No sales records found for this date range.")
     else:
         # ---- Total Sales ----
-        total_sales = filtered_df['total_amount'].sum() 
+        total_sales = cat_sales['Total_Sales'].sum() 
         st.metric("💰 Total Sales", f"{total_sales:,.2f}")
 
         # ---- Sold_by Wise Sales ----
-        if "Sold_By" in filtered_df.columns:
-            sold_by_sales = filtered_df.groupby("Sold_By")['total_amount'].sum().reset_index()
+        sold_by_sales = period_aggregate("sales", "Sold_By", start_date, end_date)
+        if not sold_by_sales.empty:
+            sold_by_sales = sold_by_sales[["Sold_By", "Total_Sales"]].rename(columns={"Total_Sales": "total_amount"})
             st.subheader("👨‍💼 Sales by Modarator & Executive")
             st.dataframe(sold_by_sales)
 
@@ -207,39 +490,46 @@ elif page == "💸 Sales Analysis":
             st.plotly_chart(fig, use_container_width=True)
 
         # ---- Category Wise Product Sales & Income ----
-        if "Category" in filtered_df.columns and "quantity" in filtered_df.columns:
-            cat_sales = filtered_df.groupby("category").agg(
-                Total_Sales=("total_amount", "sum"),
-                Total_Quantity=("quantity", "sum")
-            ).reset_index()
+        cat_sales = cat_sales[["category", "Total_Sales", "Total_Quantity"]]
 
-            st.subheader("📦 Category-wise Sales & Income")
-            st.dataframe(cat_sales)
+        st.subheader("📦 Category-wise Sales & Income")
+        st.dataframe(cat_sales)
 
-            # Bar chart for Sales
-            fig1 = px.bar(cat_sales, x="category", y="Total_Sales",
-                          title="Category-wise Total Sales", text_auto=True)
-            st.plotly_chart(fig1, use_container_width=True)
+        # Bar chart for Sales
+        fig1 = px.bar(cat_sales, x="category", y="Total_Sales",
+                      title="Category-wise Total Sales", text_auto=True)
+        st.plotly_chart(fig1, use_container_width=True)
 
-            # Bar chart for Quantity
-            fig2 = px.bar(cat_sales, x="category", y="Total_Quantity",
-                          title="Category-wise Total Quantity Sold", text_auto=True)
-            st.plotly_chart(fig2, use_container_width=True)
+        # Bar chart for Quantity
+        fig2 = px.bar(cat_sales, x="category", y="Total_Quantity",
+                      title="Category-wise Total Quantity Sold", text_auto=True)
+        st.plotly_chart(fig2, use_container_width=True)
 
-        # ---- Drill-Down Button ----
+        # ---- Drill-Down Report ----
+        # Each level is picked from the precomputed cube: choosing a value drills in,
+        # setting a level back to "All" drills out again.
         st.subheader("🔍 Drill-Down Report")
-        drill = st.selectbox("Select Drill-Down Dimension", ["category", "Sold_By", "Date"])
-        
-        if drill:
-            drill_df = filtered_df.groupby(drill).agg(
-                Total_Sales=("total_amount", "sum"),
-                Total_Quantity=("quantity", "sum")
-            ).reset_index()
-            st.dataframe(drill_df)
-
-            fig3 = px.bar(drill_df, x=drill, y="Total_Sales",
-                          title=f"{drill}-wise Sales Drilldown", text_auto=True)
-            st.plotly_chart(fig3, use_container_width=True)
+        hierarchy = st.selectbox("Select Drill-Down Path", list(SALES_HIERARCHIES))
+        cube = get_sales_cubes(current_store().version, start_date, end_date)[hierarchy]
+
+        path = []
+        for level in cube.levels[:-1]:
+            options = cube.children(path)[level].tolist()
+            choice = st.selectbox(level.replace("_", " ").title(), ["All"] + options, key=f"drill_{hierarchy}_{level}")
+            if choice == "All":
+                break
+            path.append(choice)
+
+        drill_df = cube.children(path)
+        drill = cube.levels[len(path)]
+        totals = cube.total(path)
+        st.caption(" → ".join(["All sales"] + [str(p) for p in path])
+                   + f" — ৳{totals['Total_Sales']:,.2f} from {int(totals['Invoices'])} invoice(s)")
+        st.dataframe(drill_df)
+
+        fig3 = px.bar(drill_df, x=drill, y="Total_Sales",
+                      title=f"{drill}-wise Sales Drilldown", text_auto=True)
+        st.plotly_chart(fig3, use_container_width=True)
 
 
 
@@ -247,30 +537,28 @@ elif page == "💸 Sales Analysis":
 
 # 🏦 Bankbook Page
 elif page == "🏦 Bankbook":
-    st.title("🏦 Bankbook Analysis")
+    import matplotlib.pyplot as plt
 
-    # Load Bankbook
-    @st.cache_data
-    def load_bankbook():
-        df = pd.read_excel(bankbook_data)
-        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-        return df
-
-    bank_df = load_bankbook()
+    st.title("🏦 Bankbook Analysis")
 
     # 📅 Date filter
+    min_date, max_date = date_bounds("bankbook")
     col1, col2 = st.columns(2)
     with col1:
-        start_date = st.date_input("Start Date", bank_df["Date"].min())
+        start_date = st.date_input("Start Date", min_date)
     with col2:
-        end_date = st.date_input("End Date", bank_df["Date"].max())
+        end_date = st.date_input("End Date", max_date)
 
-    mask = (bank_df["Date"] >= pd.to_datetime(start_date)) & (bank_df["Date"] <= pd.to_datetime(end_date))
-    bank_df = bank_df.loc[mask]
+    # Load Bankbook (only the months in range)
+    bank_df = load_range("bankbook", start_date, end_date)
+    # Per-fund totals: closed months come from their snapshots
+    fund_summary = period_aggregate("bankbook", "fund_source", start_date, end_date).rename(
+        columns={"Deposit_Amount": "Deposits", "Withdrawal_Amount": "Withdrawals"}
+    )[["fund_source", "Deposits", "Withdrawals"]]
 
     # 📊 Metrics
-    total_deposit = bank_df["Deposit_Amount"].sum()
-    total_withdrawal = bank_df["Withdrawal_Amount"].sum()
+    total_deposit = fund_summary["Deposits"].sum()
+    total_withdrawal = fund_summary["Withdrawals"].sum()
     net_balance = total_deposit - total_withdrawal
 
     c1, c2, c3 = st.columns(3)
@@ -278,21 +566,34 @@ elif page == "🏦 Bankbook":
     c2.metric("💸 Total Withdrawals", f"{total_withdrawal:,.0f}")
     c3.metric("📌 Net Cashflow", f"{net_balance:,.0f}")
 
+    # 🏦 Balances per fund source at the start and end of the range (prefix-sum lookups)
+    balances = get_balance_engine()
+    fund_balances = balances.opening_closing("bankbook", start_date, end_date, version=current_store().version).set_index("Account")
+    c1, c2 = st.columns(2)
+    c1.metric("🏦 Opening Balance", f"{fund_balances['Opening_Balance'].sum():,.0f}")
+    c2.metric("🏦 Closing Balance", f"{fund_balances['Closing_Balance'].sum():,.0f}")
+    bank_df["Balance"] = balances.running("bankbook", bank_df, version=current_store().version)
+
+    # 🚨 Alerts
+    show_alerts("bankbook", start_date, end_date)
+
     # 🔍 Fund Source Wise Summary
     st.subheader("📍 Fund Source Breakdown")
-    fund_summary = bank_df.groupby("fund_source").agg(
-        Deposits=("Deposit_Amount", "sum"),
-        Withdrawals=("Withdrawal_Amount", "sum"),
-        Net=("Balance", "last")
-    ).reset_index()
+    funds = fund_summary["fund_source"].astype(str)
+    fund_summary["Opening_Balance"] = funds.map(fund_balances["Opening_Balance"]).fillna(0)
+    fund_summary["Closing_Balance"] = funds.map(fund_balances["Closing_Balance"]).fillna(0)
 
     st.dataframe(fund_summary)
 
     # 📊 Bar Charts
     st.subheader("📊 Deposits vs Withdrawals by Fund Source")
-    fig, ax = plt.subplots()
-    fund_summary.set_index("fund_source")[["Deposits", "Withdrawals"]].plot(kind="bar", ax=ax)
-    st.pyplot(fig)
+    if fund_summary.empty:
+        st.info("No bank transactions in the selected date range.")
+    else:
+        fig, ax = plt.subplots()
+        fund_summary.set_index("fund_source")[["Deposits", "Withdrawals"]].plot(kind="bar", ax=ax)
+        st.pyplot(fig)
+        plt.close(fig)
 
     # 📈 Trend Over Time
     st.subheader("📈 Bank Transactions Over Time")
@@ -307,6 +608,7 @@ elif page == "🏦 Bankbook":
     ax2.legend()
     ax2.set_title("Daily Bank Transactions")
     st.pyplot(fig2)
+    plt.close(fig2)
 
     # 📂 Drill-down
     with st.expander("🔎 View Detailed Transactions"):
@@ -315,56 +617,12 @@ elif page == "🏦 Bankbook":
 
 
 elif page == "💵 Cashbook":
-    st.title("💵 Cashbook")
-
-    # Load data
-    cashbook = load_cashbook()
-    
-    # Debug: Show available columns
-    st.write("📊 Available columns:", list(cashbook.columns))
-
-    # Ensure all required columns exist, if not create them
-    required_cols = ["Date", "Voucher_No", "Description", "Name", "Payment_category", "Reference", "Cash_In", "Cash_Out"]
-    
-    for col in required_cols:
-        if col not in cashbook.columns:
-            if col in ["Cash_In", "Cash_Out"]:
-                cashbook[col] = 0.0
-            else:
-                cashbook[col] = ""
-
-    # Ensure correct datetime format
-    cashbook["Date"] = pd.to_datetime(cashbook["Date"], errors="coerce")
-
-    # Fill NaN values in category column with "Uncategorized"
-    cashbook["Payment_category"] = cashbook["Payment_category"].fillna("Uncategorized")
-
-    # Convert numeric columns safely
-    cashbook["Cash_In"] = pd.to_numeric(cashbook["Cash_In"], errors="coerce").fillna(0)
-    cashbook["Cash_Out"] = pd.to_numeric(cashbook["Cash_Out"], errors="coerce").fillna(0)
-
-    # Calculate Balance
-    cashbook["Balance"] = cashbook["Cash_In"] - cashbook["Cash_Out"]
-
-    # Categorize the categories into broader groups for better analysis
-    def categorize_payment(payment_type):
-        payment_type = str(payment_type).lower()
-        if payment_type in ['sales']:
-            return 'Income'
-        elif payment_type in ['expense', 'payable']:
-            return 'Expenses'
-        elif payment_type in ['receivedable', 'receivable']:
-            return 'Receivables'
-        elif payment_type in ['laibility', 'liability']:
-            return 'Liabilities'
-        else:
-            return 'Other'
+    import plotly.express as px
 
-    cashbook["Category_Group"] = cashbook["Payment_category"].apply(categorize_payment)
+    st.title("💵 Cashbook")
 
     # Date filter
-    min_date = cashbook["Date"].min().date() if not cashbook.empty else datetime.date.today()
-    max_date = cashbook["Date"].max().date() if not cashbook.empty else datetime.date.today()
+    min_date, max_date = date_bounds("cashbook")
     
     col1, col2 = st.columns(2)
     with col1:
@@ -382,36 +640,43 @@ elif page == "💵 Cashbook":
             max_value=max_date
         )
 
-    # Filter by date range
-    mask = (cashbook["Date"] >= pd.to_datetime(start_date)) & (cashbook["Date"] <= pd.to_datetime(end_date))
-    filtered = cashbook.loc[mask]
+    # Load data (only the months in range)
+    # Columns, types and the "Uncategorized" fill are checked once at ingest
+    cashbook = load_range("cashbook", start_date, end_date)
+    show_quarantine("cashbook")
+    show_alerts("cashbook", start_date, end_date)
+
+    # Running cash balance after each entry and the broader category groups
+    balances = get_balance_engine()
+    cashbook = with_cash_columns(cashbook)
+
+    filtered = cashbook
 
     if not filtered.empty:
-        # ✅ Detailed Category-wise summary
+        # ✅ Detailed Category-wise summary (closed months come from their snapshots)
         st.subheader("📊 Detailed Category-wise Analysis")
         
-        cat_summary = filtered.groupby("Payment_category").agg({
-            "Cash_In": "sum",
-            "Cash_Out": "sum",
-            "Date": "count"
-        }).rename(columns={"Date": "Transaction_Count"}).reset_index()
+        cat_summary = period_aggregate("cashbook", "Payment_category", start_date, end_date).rename(
+            columns={"Transactions": "Transaction_Count"}
+        )
 
         cat_summary["Net_Cash_Flow"] = cat_summary["Cash_In"] - cat_summary["Cash_Out"]
         cat_summary = cat_summary.sort_values("Net_Cash_Flow", ascending=False)
 
-        # ✅ Broad Category Group summary
-        group_summary = filtered.groupby("Category_Group").agg({
+        # ✅ Broad Category Group summary, rolled up from the categories
+        groups = cat_summary["Payment_category"].apply(categorize_payment).rename("Category_Group")
+        group_summary = cat_summary.groupby(groups).agg({
             "Cash_In": "sum",
             "Cash_Out": "sum",
-            "Date": "count"
-        }).rename(columns={"Date": "Transaction_Count"}).reset_index()
+            "Transaction_Count": "sum"
+        }).reset_index()
 
         group_summary["Net_Cash_Flow"] = group_summary["Cash_In"] - group_summary["Cash_Out"]
         group_summary = group_summary.sort_values("Net_Cash_Flow", ascending=False)
 
         # Show metrics
-        total_in = filtered["Cash_In"].sum()
-        total_out = filtered["Cash_Out"].sum()
+        total_in = cat_summary["Cash_In"].sum()
+        total_out = cat_summary["Cash_Out"].sum()
         net_balance = total_in - total_out
 
         st.subheader("💰 Overall Cash Flow Summary")
@@ -419,7 +684,13 @@ elif page == "💵 Cashbook":
         col1.metric("Total Cash In", f"৳{total_in:,.2f}")
         col2.metric("Total Cash Out", f"৳{total_out:,.2f}")
         col3.metric("Net Balance", f"৳{net_balance:,.2f}")
-        col4.metric("Total Transactions", f"{len(filtered)}")
+        col4.metric("Total Transactions", f"{cat_summary['Transaction_Count'].sum()}")
+
+        opening_cash = balances.balance("cashbook", "Cash", start_date - datetime.timedelta(days=1), version=current_store().version)
+        closing_cash = balances.balance("cashbook", "Cash", end_date, version=current_store().version)
+        col1, col2 = st.columns(2)
+        col1.metric("Opening Cash Balance", f"৳{opening_cash:,.2f}")
+        col2.metric("Closing Cash Balance", f"৳{closing_cash:,.2f}", delta=f"{closing_cash - opening_cash:,.2f}")
 
         # Display both summaries side by side
         col1, col2 = st.columns(2)
@@ -500,32 +771,43 @@ elif page == "💵 Cashbook":
         
         col1, col2, col3 = st.columns(3)
         
+        category_options = filtered["Payment_category"].unique().tolist()
+        group_options = filtered["Category_Group"].unique().tolist()
+        name_options = filtered["Name"].unique().tolist()
+
         with col1:
             selected_categories = st.multiselect(
                 "Filter by Payment Category",
-                options=filtered["Payment_category"].unique(),
-                default=filtered["Payment_category"].unique()
+                options=category_options,
+                default=category_options
             )
         
         with col2:
             selected_groups = st.multiselect(
                 "Filter by Category Group",
-                options=filtered["Category_Group"].unique(),
-                default=filtered["Category_Group"].unique()
+                options=group_options,
+                default=group_options
             )
         
         with col3:
             selected_names = st.multiselect(
                 "Filter by Name",
-                options=filtered["Name"].unique(),
-                default=filtered["Name"].unique()
+                options=name_options,
+                default=name_options
             )
         
-        detailed_view = filtered[
-            (filtered["Payment_category"].isin(selected_categories)) &
-            (filtered["Category_Group"].isin(selected_groups)) &
-            (filtered["Name"].isin(selected_names))
-        ]
+        # Compiled filter: "select all" dimensions are skipped, the rest are bitmap lookups
+        cash_filter = get_filter_engine(
+            "cashbook", current_store().version, ("Payment_category", "Category_Group", "Name"), "Date"
+        )
+        detailed_view = cash_filter.filter(
+            {
+                "Payment_category": as_filter(selected_categories, category_options),
+                "Category_Group": as_filter(selected_groups, group_options),
+                "Name": as_filter(selected_names, name_options),
+            },
+            (start_date, end_date),
+        )
         
         if not detailed_view.empty:
             # Format display
@@ -603,50 +885,15 @@ elif page == "💵 Cashbook":
 
 
 elif page == "📉 Liability":
-    st.title("📉 Liability Management")
+    import plotly.express as px
 
-    # Load purchase data
-    purchase_df = load_purchase()
-
-    # Ensure required columns exist
-    required_cols = [
-        "Date", "Vouchar_no", "Supplier_name", "Product_name", "Product_Category",
-        "Payment_cetagory", "Purchase_rate", "Discount", "Amount", "Payable", "Receivedable"
-    ]
-    for col in required_cols:
-        if col not in purchase_df.columns:
-            if col in ["Purchase_rate", "Discount", "Amount", "Payable", "Receivedable"]:
-                purchase_df[col] = 0.0
-            else:
-                purchase_df[col] = ""
-
-    # Clean and convert data types
-    purchase_df["Date"] = pd.to_datetime(purchase_df["Date"], format="%d-%m-%Y", errors="coerce")
-    numeric_cols = ["Purchase_rate", "Discount", "Amount", "Payable", "Receivedable"]
-    for col in numeric_cols:
-        purchase_df[col] = pd.to_numeric(purchase_df[col], errors="coerce").fillna(0)
-
-    # Calculate outstanding amount
-    purchase_df["Outstanding"] = purchase_df["Payable"] - purchase_df["Receivedable"]
+    st.title("📉 Liability Management")
 
     # ---------------- FILTER OPTIONS ----------------
     st.sidebar.header("🔍 Filter Options")
 
-    # Safe min/max dates
-    if not purchase_df["Date"].isnull().all():
-        min_date_val = purchase_df["Date"].min()
-        max_date_val = purchase_df["Date"].max()
-        if pd.isna(min_date_val):
-            min_date_val = datetime.date.today()
-        if pd.isna(max_date_val):
-            max_date_val = datetime.date.today()
-        min_date = min_date_val.date()
-        max_date = max_date_val.date()
-    else:
-        min_date = datetime.date.today()
-        max_date = datetime.date.today()
-
-    # Date filter
+    # Date filter (bounds from partition statistics)
+    min_date, max_date = date_bounds("purchase")
     start_date, end_date = st.sidebar.date_input(
         "Select Date Range",
         value=(min_date, max_date),
@@ -654,18 +901,29 @@ elif page == "📉 Liability":
         max_value=max_date
     )
 
+    # Load purchase data (only the months in range)
+    # Columns, %d-%m-%Y dates and amounts are checked once at ingest
+    purchase_df = load_range("purchase", start_date, end_date)
+    show_quarantine("purchase")
+
+    # Calculate outstanding amount
+    purchase_df = with_purchase_columns(purchase_df)
+
+    # ---------------- SUPPLIER & CATEGORY FILTERS ----------------
     # Supplier filter
+    supplier_options = purchase_df["Supplier_name"].dropna().unique().tolist()
     suppliers = st.sidebar.multiselect(
         "Select Suppliers",
-        options=purchase_df["Supplier_name"].dropna().unique().tolist(),
-        default=purchase_df["Supplier_name"].dropna().unique().tolist()
+        options=supplier_options,
+        default=supplier_options
     )
 
     # Category filter
+    category_options = purchase_df["Product_Category"].dropna().unique().tolist()
     categories = st.sidebar.multiselect(
         "Select Product Categories",
-        options=purchase_df["Product_Category"].dropna().unique().tolist(),
-        default=purchase_df["Product_Category"].dropna().unique().tolist()
+        options=category_options,
+        default=category_options
     )
 
     # Outstanding status filter
@@ -674,19 +932,16 @@ elif page == "📉 Liability":
         options=["All", "With Outstanding", "Fully Paid", "Overpaid"]
     )
 
-    # Apply filters
-    filtered_df = purchase_df[
-        (purchase_df["Date"] >= pd.to_datetime(start_date)) &
-        (purchase_df["Date"] <= pd.to_datetime(end_date)) &
-        (purchase_df["Supplier_name"].isin(suppliers)) &
-        (purchase_df["Product_Category"].isin(categories))
-    ]
-    if outstanding_filter == "With Outstanding":
-        filtered_df = filtered_df[filtered_df["Outstanding"] > 0]
-    elif outstanding_filter == "Fully Paid":
-        filtered_df = filtered_df[filtered_df["Outstanding"] == 0]
-    elif outstanding_filter == "Overpaid":
-        filtered_df = filtered_df[filtered_df["Outstanding"] < 0]
+    # Apply filters (compiled once per widget state, "select all" skips the dimension)
+    purchase_filter = get_filter_engine(
+        "purchase", current_store().version, ("Supplier_name", "Product_Category", "Outstanding_Status"), "Date"
+    )
+    purchase_selections = {
+        "Supplier_name": as_filter(suppliers, supplier_options),
+        "Product_Category": as_filter(categories, category_options),
+        "Outstanding_Status": None if outstanding_filter == "All" else [outstanding_filter],
+    }
+    filtered_df = purchase_filter.filter(purchase_selections, (start_date, end_date))
 
     # ---------------- FINANCIAL OVERVIEW ----------------
     st.header("💰 Financial Overview")
@@ -707,12 +962,20 @@ elif page == "📉 Liability":
 
     # ---------------- SUPPLIER SUMMARY ----------------
     st.header("📊 Supplier-wise Summary")
-    supplier_summary = filtered_df.groupby("Supplier_name").agg({
-        "Payable": "sum",
-        "Receivedable": "sum",
-        "Outstanding": "sum",
-        "Vouchar_no": "count"
-    }).rename(columns={"Vouchar_no": "Transaction_Count"}).reset_index()
+    if all(selected is None for selected in purchase_selections.values()):
+        # Nothing narrowed: closed months come from their snapshots
+        supplier_summary = period_aggregate("purchase", "Supplier_name", start_date, end_date).rename(
+            columns={"Lines": "Transaction_Count"}
+        )
+        supplier_summary["Outstanding"] = supplier_summary["Payable"] - supplier_summary["Receivedable"]
+        supplier_summary = supplier_summary[["Supplier_name", "Payable", "Receivedable", "Outstanding", "Transaction_Count"]]
+    else:
+        supplier_summary = filtered_df.groupby("Supplier_name", observed=True).agg({
+            "Payable": "sum",
+            "Receivedable": "sum",
+            "Outstanding": "sum",
+            "Vouchar_no": "size"
+        }).rename(columns={"Vouchar_no": "Transaction_Count"}).reset_index()
     supplier_summary = supplier_summary.sort_values("Outstanding", ascending=False)
 
     st.dataframe(
@@ -739,9 +1002,7 @@ elif page == "📉 Liability":
         )
         st.plotly_chart(fig1, use_container_width=True)
     with col2:
-        status_counts = filtered_df["Outstanding"].apply(
-            lambda x: "Fully Paid" if x == 0 else ("Overpaid" if x < 0 else "With Outstanding")
-        ).value_counts()
+        status_counts = filtered_df["Outstanding_Status"].value_counts()
         fig2 = px.pie(
             values=status_counts.values,
             names=status_counts.index,
@@ -778,18 +1039,54 @@ elif page == "📉 Liability":
     st.header("💳 Record Payment")
 
 
-elif page == "📈 Profit & Loss":
-    st.title("📈 Profit & Loss Analysis")
+elif page == "📲 Wallet Import":
+    st.title("📲 Mobile Wallet Statements")
+    st.write("Import bKash, Nagad or Rocket merchant statement exports (CSV or XLSX). "
+             "Files are read in chunks and transactions already imported are skipped by transaction ID.")
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        provider = st.selectbox("Wallet", ["Auto-detect"] + PROVIDERS)
+    with col2:
+        statements = st.file_uploader("Statement files", type=["csv", "xlsx"], accept_multiple_files=True)
+
+    if statements and st.button("📥 Import Statements"):
+        for statement in statements:
+            try:
+                stats = import_statement(
+                    statement, statement.name,
+                    None if provider == "Auto-detect" else provider,
+                    wallet_db
+                )
+                st.success(
+                    f"{statement.name} ({stats['provider']}): {stats['imported']:,} imported, "
+                    f"{stats['duplicates']:,} duplicates skipped, {stats['rejected']:,} rejected rows"
+                )
+            except ValueError as e:
+                st.error(str(e))
+
+    # ---------------- WALLET LEDGER ----------------
+    st.header("📒 Wallet Ledger")
+    wallet_totals = load_wallet_summary(wallet_version())
+    if wallet_totals.empty:
+        st.info("No wallet statements imported yet.")
+    else:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Total Received", f"৳{wallet_totals['Received'].sum():,.2f}")
+        col2.metric("Total Paid Out", f"৳{wallet_totals['Paid_Out'].sum():,.2f}")
+        col3.metric("Transactions", f"{wallet_totals['Transactions'].sum():,}")
+        st.dataframe(wallet_totals, use_container_width=True, hide_index=True)
 
-    # Load sales data
-    sales_df = load_sales()
+        st.subheader("🧾 Latest Transactions")
+        st.dataframe(wallet_transactions(wallet_db, limit=500), use_container_width=True, height=400)
+
+elif page == "📈 Profit & Loss":
+    import plotly.express as px
 
-    # Ensure date column is in datetime format
-    sales_df["date"] = pd.to_datetime(sales_df["date"], errors="coerce")
+    st.title("📈 Profit & Loss Analysis")
 
     # Filter by date range
-    min_date = sales_df["date"].min().date() if not sales_df.empty else datetime.date.today()
-    max_date = sales_df["date"].max().date() if not sales_df.empty else datetime.date.today()
+    min_date, max_date = date_bounds("sales")
 
     col1, col2 = st.columns(2)
     with col1:
@@ -797,8 +1094,9 @@ elif page == "📈 Profit & Loss":
     with col2:
         end_date = st.date_input("End Date", value=max_date, min_value=min_date, max_value=max_date)
 
-    mask = (sales_df["date"] >= pd.to_datetime(start_date)) & (sales_df["date"] <= pd.to_datetime(end_date))
-    filtered_sales = sales_df.loc[mask]
+    # Load sales data (only the months in range)
+    filtered_sales = load_range("sales", start_date, end_date)
+    df_cash = load_cashbook()
 
     if filtered_sales.empty:
         st.warning("No sales records found for this date range.")
@@ -817,47 +1115,174 @@ elif page == "📈 Profit & Loss":
         col3.metric("Profit/Loss", f"৳{profit_loss:,.2f}", delta_color="inverse" if profit_loss < 0 else "normal")
 
         # Category-wise income analysis
-        category_income = filtered_sales.groupby("category")["total_amount"].sum().reset_index().sort_values("total_amount", ascending=False)
+        category_income = filtered_sales.groupby("category", observed=True)["total_amount"].sum().reset_index().sort_values("total_amount", ascending=False)
 
         st.subheader("📊 Category-wise Income Analysis")
         fig1 = px.bar(category_income, x="category", y="total_amount", color="category", title="Income by Category")
         st.plotly_chart(fig1, use_container_width=True)
 
+elif page == "🔮 Forecast":
+    import plotly.express as px
+
+    st.title("🔮 Sales & Cash Forecast")
+    st.caption("Seasonal naive and exponential smoothing fitted per member; the model with the lower "
+               "error on the last 4 weeks is kept. Fits are refreshed in the background when new data lands.")
+
+    forecasts = get_forecasts()
+    series = st.selectbox("Series", list(FORECAST_SERIES))
+    # Only waits while the very first fit of this series is running
+    with st.spinner("Fitting forecasts..."):
+        result = forecasts.result(series, wait=60)
+    if forecasts.error(series):
+        st.warning("⚠️ The last refit failed; showing the previous forecast.")
+    if result is None:
+        st.info("No data to forecast yet.")
+    else:
+        if forecasts.pending(series):
+            st.caption("🔄 New data landed: refitting in the background.")
+        summary, daily, month = result["summary"], result["daily"], result["month"]
+
+        c1, c2 = st.columns(2)
+        c1.metric(f"Forecast for {month.strftime('%B %Y')}", f"৳{summary['Next_Month'].sum():,.2f}")
+        c2.metric("Last 30 Days (actual)", f"৳{summary['Last_30_Days'].sum():,.2f}")
+
+        st.subheader(f"📋 Projection by member ({month.strftime('%B %Y')})")
+        st.dataframe(
+            summary.style.format({
+                "Alpha": "{:.2f}", "Backtest_MAE": "৳{:,.2f}",
+                "Last_30_Days": "৳{:,.2f}", "Next_Month": "৳{:,.2f}",
+            }, na_rep="–"),
+            use_container_width=True, hide_index=True,
+        )
+        if (summary["Model"] == SHORT_HISTORY).any():
+            st.caption(f"⚠️ {SHORT_HISTORY}: under 4 days of data, so the model could not be backtested; "
+                       "these rows only carry the latest level forward.")
+        fig1 = px.bar(summary, x="Member", y=["Last_30_Days", "Next_Month"], barmode="group",
+                      title="Last 30 days vs next month")
+        st.plotly_chart(fig1, use_container_width=True)
+
+        st.subheader("📈 Daily history and forecast")
+        member = st.selectbox("Member", summary["Member"].tolist())
+        path = daily[daily["Member"] == member]
+        last_actual = path.loc[path["Kind"] == "Actual", "Date"].max()
+        path = path[path["Date"] > last_actual - pd.Timedelta(days=90)]
+        fig2 = px.line(path, x="Date", y="Value", color="Kind", title=f"{series}: {member}")
+        st.plotly_chart(fig2, use_container_width=True)
+
+        csv_forecast = daily[daily["Kind"] == "Forecast"].to_csv(index=False)
+        st.download_button("📥 Download Forecast", data=csv_forecast, file_name="forecast.csv", mime="text/csv")
+
+elif page == "🧮 VAT & Tax":
+    import plotly.express as px
+
+    st.title("🧮 VAT & Tax (Bangladesh)")
+    st.caption(f"Rates by category from `{vat_rates_file}`. Closed periods are filed with their lines "
+               "and never recomputed.")
+
+    vat_returns = load_vat_returns(current_store().version, vat_rates_version(), vat_filed_version())
+
+    if vat_returns.empty:
+        st.warning("No dated sales or purchase records to compute VAT from.")
+    else:
+        # ---------------- FILING PERIOD ----------------
+        periods = vat_returns["Period"].tolist()
+        period = st.selectbox("Filing Period", periods[::-1])
+        vat_return = vat_returns[vat_returns["Period"] == period].iloc[0]
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Output VAT (Sales)", f"৳{vat_return['Output_VAT']:,.2f}")
+        col2.metric("Input VAT (Purchases)", f"৳{vat_return['Input_VAT']:,.2f}")
+        col3.metric("Net VAT Payable", f"৳{vat_return['Net_VAT_Payable']:,.2f}")
+        col4.metric("Status", "🔒 Closed" if vat_return["Status"] == "Closed" else "🟢 Open")
+
+        if vat_return["Status"] != "Closed":
+            if period not in get_period_close().closed_periods():
+                st.caption(f"Close {period} on the 🔒 Period Close page before filing its return.")
+            elif st.button(f"🔒 Close period {period}"):
+                file_vat_return(period)
+                st.rerun()
+
+        # ---------------- MONTHLY RETURNS ----------------
+        st.header("📅 Monthly VAT Returns")
+        st.dataframe(
+            vat_returns.style.format({
+                "Sales_Base": "৳{:,.2f}",
+                "Output_VAT": "৳{:,.2f}",
+                "Purchase_Base": "৳{:,.2f}",
+                "Input_VAT": "৳{:,.2f}",
+                "Net_VAT_Payable": "৳{:,.2f}"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        fig = px.bar(vat_returns, x="Period", y=["Output_VAT", "Input_VAT"], barmode="group",
+                     title="Output vs Input VAT by Month")
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.download_button(
+            label="📥 Download VAT Returns",
+            data=vat_returns.to_csv(index=False),
+            file_name="vat_returns.csv",
+            mime="text/csv"
+        )
+
+        # ---------------- LINE DETAIL ----------------
+        sales_lines, purchase_lines = load_vat_lines(
+            current_store().version, vat_rates_version(), vat_filed_version(), period
+        )
+        with st.expander(f"🧾 Sales VAT lines — {period} ({len(sales_lines)})"):
+            st.dataframe(sales_lines, use_container_width=True, hide_index=True)
+        with st.expander(f"📦 Purchase VAT lines — {period} ({len(purchase_lines)})"):
+            st.dataframe(purchase_lines, use_container_width=True, hide_index=True)
+
+elif page == "🔒 Period Close":
+    st.title("🔒 Period Close")
+    st.caption("Closing a month freezes its ledger rows and stores its aggregates and closing balances. "
+               "Months close in order, oldest first.")
+
+    closing = get_period_close()
+    store = current_store()
+
+    # ---------------- NEXT PERIOD ----------------
+    next_period = closing.next_period(store)
+    if next_period is None:
+        st.info("No finished month is waiting to be closed.")
+    else:
+        st.subheader(f"📅 Next period to close: {next_period}")
+        month_start, month_end = month_bounds(next_period)
+        month_rows = pd.DataFrame({
+            "Ledger": store.names(),
+            "Rows": [len(store.frame_range(name, month_start, month_end)) for name in store.names()],
+        })
+        st.dataframe(month_rows, hide_index=True)
+
+        if st.button(f"🔒 Close {next_period}"):
+            closing.close(next_period, store)
+            # The month's VAT return is filed together with its ledgers
+            file_vat_return(next_period)
+            st.rerun()
+
+    # ---------------- CLOSED PERIODS ----------------
+    closed_periods = closing.periods()
+    if closed_periods.empty:
+        st.info("No closed periods yet.")
+    else:
+        st.subheader("🗄️ Closed Periods")
+        st.dataframe(closed_periods, hide_index=True)
+
+        st.subheader("💰 Closing Balances")
+        balances = closing.balances().pivot(index="Account", columns="Period", values="Balance")
+        st.dataframe(balances.style.format("৳{:,.2f}"), use_container_width=True)
+
 elif page == "📊 Charts":
+    import plotly.express as px
+
     st.title("📊 Charts & Visualizations")
 
-    # Load all data
-    sales_df = load_sales()
-    cash_df = load_cashbook()
-    bank_df = load_bankbook()
-    purchase_df = load_purchase()
-
-    # Standardize date columns
-    if "date" in sales_df.columns:
-        sales_df.rename(columns={"date": "Date"}, inplace=True)
-    if "date" in bank_df.columns:
-        bank_df.rename(columns={"date": "Date"}, inplace=True)
-    if "date" in cash_df.columns:
-        cash_df.rename(columns={"date": "Date"}, inplace=True)
-    if "date" in purchase_df.columns:
-        purchase_df.rename(columns={"date": "Date"}, inplace=True)
-
-    # Ensure Date columns are datetime
-    for df in [sales_df, cash_df, bank_df, purchase_df]:
-        if "Date" in df.columns:
-            df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-
-    # Handle empty datasets safely
-    min_date = min(
-        d.min() for d in [
-            sales_df["Date"], cash_df["Date"], bank_df["Date"], purchase_df["Date"]
-        ] if not d.empty
-    ).date()
-    max_date = max(
-        d.max() for d in [
-            sales_df["Date"], cash_df["Date"], bank_df["Date"], purchase_df["Date"]
-        ] if not d.empty
-    ).date()
+    # Date bounds across all ledgers, from the partition statistics
+    bounds = [date_bounds(name) for name in ("sales", "cashbook", "bankbook", "purchase")]
+    min_date = min(b[0] for b in bounds)
+    max_date = max(b[1] for b in bounds)
 
     # Date range filter
     col1, col2 = st.columns(2)
@@ -866,11 +1291,12 @@ elif page == "📊 Charts":
     with col2:
         end_date = st.date_input("End Date", value=max_date, min_value=min_date, max_value=max_date)
 
-    # Filter data by date range
-    sales_filtered = sales_df[(sales_df["Date"] >= pd.to_datetime(start_date)) & (sales_df["Date"] <= pd.to_datetime(end_date))]
-    cash_filtered = cash_df[(cash_df["Date"] >= pd.to_datetime(start_date)) & (cash_df["Date"] <= pd.to_datetime(end_date))]
-    bank_filtered = bank_df[(bank_df["Date"] >= pd.to_datetime(start_date)) & (bank_df["Date"] <= pd.to_datetime(end_date))]
-    purchase_filtered = purchase_df[(purchase_df["Date"] >= pd.to_datetime(start_date)) & (purchase_df["Date"] <= pd.to_datetime(end_date))]
+    # Load data by date range (only the months in range)
+    sales_filtered = load_range("sales", start_date, end_date).rename(columns={"date": "Date"})
+    cash_filtered = load_range("cashbook", start_date, end_date)
+    bank_filtered = load_range("bankbook", start_date, end_date)
+    purchase_filtered = load_range("purchase", start_date, end_date)
+    bank_df = load_bankbook()
 
     if sales_filtered.empty and cash_filtered.empty and bank_filtered.empty and purchase_filtered.empty:
         st.warning("No data found for the selected date range.")
@@ -878,7 +1304,10 @@ elif page == "📊 Charts":
         # ------------------- SALES -------------------
         if not sales_filtered.empty:
             st.subheader("📈 Sales Overview")
-            sales_summary = sales_filtered.groupby("category")["total_amount"].sum().reset_index().sort_values("total_amount", ascending=False)
+            # Per-member totals: closed months come from their snapshots
+            sales_summary = period_aggregate("sales", "category", start_date, end_date)[["category", "Total_Sales"]].rename(
+                columns={"Total_Sales": "total_amount"}
+            )
             fig_sales = px.bar(sales_summary, x="category", y="total_amount",
                                color="category", title="Sales by Category")
             st.plotly_chart(fig_sales, use_container_width=True)
@@ -888,10 +1317,7 @@ elif page == "📊 Charts":
         # ------------------- CASHBOOK -------------------
         if not cash_filtered.empty:
             st.subheader("💵 Cashbook Overview")
-            cash_summary = cash_filtered.groupby("Payment_category").agg(
-                Cash_In=("Cash_In", "sum"),
-                Cash_Out=("Cash_Out", "sum")
-            ).reset_index()
+            cash_summary = period_aggregate("cashbook", "Payment_category", start_date, end_date)[["Payment_category", "Cash_In", "Cash_Out"]]
             cash_summary["Net_Cash_Flow"] = cash_summary["Cash_In"] - cash_summary["Cash_Out"]
             fig_cash = px.bar(cash_summary, x="Payment_category", y=["Cash_In", "Cash_Out"],
                               barmode="group", title="Cashbook Income vs Expense by Category")
@@ -904,10 +1330,9 @@ elif page == "📊 Charts":
         # ------------------- BANKBOOK -------------------
         if not bank_df.empty:
             st.subheader("🏦 Bankbook Overview")
-            bank_summary = bank_df.groupby("fund_source").agg(
-                Cash_In=("Deposit_Amount", "sum"),
-                Cash_Out=("Withdrawal_Amount", "sum")
-            ).reset_index()
+            bank_summary = period_aggregate("bankbook", "fund_source").rename(
+                columns={"Deposit_Amount": "Cash_In", "Withdrawal_Amount": "Cash_Out"}
+            )[["fund_source", "Cash_In", "Cash_Out"]]
             bank_summary["Net_Cash_Flow"] = bank_summary["Cash_In"] - bank_summary["Cash_Out"]
             fig_bank = px.bar(bank_summary, x="fund_source", y=["Cash_In", "Cash_Out"],
                               barmode="group", title="Bankbook Deposit vs Withdrawal by Category")
@@ -916,11 +1341,9 @@ elif page == "📊 Charts":
         # ------------------- PURCHASE -------------------
         if not purchase_filtered.empty:
             st.subheader("📦 Purchase Overview")
-            purchase_summary = purchase_filtered.groupby("Product_Category").agg(
-                Total_Purchase=("Amount", "sum"),
-                Total_Payable=("Payable", "sum"),
-                Total_Receivedable=("Receivedable", "sum")
-            ).reset_index()
+            purchase_summary = period_aggregate("purchase", "Product_Category", start_date, end_date).rename(
+                columns={"Amount": "Total_Purchase", "Payable": "Total_Payable", "Receivedable": "Total_Receivedable"}
+            )[["Product_Category", "Total_Purchase", "Total_Payable", "Total_Receivedable"]]
             purchase_summary["Outstanding"] = purchase_summary["Total_Payable"] - purchase_summary["Total_Receivedable"]
             fig_purchase = px.bar(purchase_summary, x="Product_Category", y=["Total_Purchase", "Total_Payable"],
                                   barmode="group", title="Purchase by Category")
@@ -961,10 +1384,7 @@ elif page == "📊 Charts":
 
         # ------------------- SELLER-WISE SALES -------------------
         if "Sold_By" in sales_filtered.columns and "total_amount" in sales_filtered.columns:
-            seller_sales = sales_filtered.groupby("Sold_By").agg(
-                Total_Sales=("total_amount", "sum"),
-                Total_Quantity=("quantity", "sum")
-            ).reset_index()
+            seller_sales = period_aggregate("sales", "Sold_By", start_date, end_date)[["Sold_By", "Total_Sales", "Total_Quantity"]]
 
             st.subheader("👨‍💼 Seller-wise Sales & Income")
             st.dataframe(seller_sales)
@@ -981,7 +1401,7 @@ elif page == "📊 Charts":
         st.subheader("🔍 Sales Drill-Down Report")
         drill = st.selectbox("Select Drill-down Category", options=["None"] + list(sales_filtered.columns))
         if drill != "None":
-            drill_df = sales_filtered.groupby(drill).agg(
+            drill_df = sales_filtered.groupby(drill, observed=True).agg(
                 Total_Sales=("total_amount", "sum")
             ).reset_index()
 
@@ -1002,6 +1422,7 @@ elif page == "📚 About":
     - **Bankbook Overview**: Keep track of deposits and withdrawals with visual insights.
     - **Liability Management**: Manage supplier payments and outstanding amounts efficiently.
     - **Profit & Loss Analysis**: Gain insights into overall financial health with income and expense tracking.
+    - **Forecast**: Next-month sales and cash projections by category and payment method.
     - **Charts & Visualizations**: Interactive charts for better understanding of financial data.
 
     ### Technologies Used:
@@ -1018,6 +1439,18 @@ elif page == "📚 About":
     Thank you for using V2TAFA! For any issues or feature requests, please contact the development team.
     """)
 
+    # --- Data quality ---
+    with st.expander("🧪 Data Quality (checks run once at ingest)"):
+        quality = current_store().quality_report()
+        if quality.empty:
+            st.success("All ledgers passed the data-quality checks.")
+        else:
+            st.dataframe(quality, use_container_width=True)
+
+    # --- Dataset memory footprint ---
+    with st.expander("🧠 Dataset Memory (bytes before / after compaction)"):
+        st.dataframe(load_memory_report(current_store().version), use_container_width=True)
+
 
 # Add a caption (small text under content)
 st.markdown(
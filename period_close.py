@@ -0,0 +1,246 @@
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from ledger_schema import LEDGER_SCHEMAS, compact_frame
+
+
+# ✅ Aggregates kept per closed month: (ledger, dimension) -> measures
+AGGREGATES = {
+    ("sales", "category"): {
+        "Total_Sales": ("total_amount", "sum"),
+        "Total_Quantity": ("quantity", "sum"),
+        "Invoices": ("total_amount", "size"),
+    },
+    ("sales", "product_name"): {
+        "Total_Sales": ("total_amount", "sum"),
+        "Total_Quantity": ("quantity", "sum"),
+        "Invoices": ("total_amount", "size"),
+    },
+    ("sales", "Sold_By"): {
+        "Total_Sales": ("total_amount", "sum"),
+        "Total_Quantity": ("quantity", "sum"),
+        "Invoices": ("total_amount", "size"),
+    },
+    ("cashbook", "Payment_category"): {
+        "Cash_In": ("Cash_In", "sum"),
+        "Cash_Out": ("Cash_Out", "sum"),
+        "Transactions": ("Cash_In", "size"),
+    },
+    ("bankbook", "fund_source"): {
+        "Deposit_Amount": ("Deposit_Amount", "sum"),
+        "Withdrawal_Amount": ("Withdrawal_Amount", "sum"),
+        "Transactions": ("Deposit_Amount", "size"),
+    },
+    ("purchase", "Supplier_name"): {
+        "Amount": ("Amount", "sum"),
+        "Payable": ("Payable", "sum"),
+        "Receivedable": ("Receivedable", "sum"),
+        "Lines": ("Amount", "size"),
+    },
+    ("purchase", "Product_Category"): {
+        "Amount": ("Amount", "sum"),
+        "Payable": ("Payable", "sum"),
+        "Receivedable": ("Receivedable", "sum"),
+        "Lines": ("Amount", "size"),
+    },
+}
+
+UNCATEGORIZED = "Uncategorized"    # member of rows whose dimension is blank
+
+PERIOD_COLUMNS = ["Period", "Closed_At"]
+SNAPSHOT_COLUMNS = ["Period", "Ledger", "Dimension", "Member", "Measure", "Value"]
+BALANCE_COLUMNS = ["Period", "Account", "Balance"]
+
+
+def month_bounds(period):
+    start = pd.Period(period, freq="M").start_time
+    return start, start + pd.offsets.MonthBegin(1) - pd.Timedelta(1, "ns")
+
+
+def aggregate_rows(frame, ledger, dimension):
+    # Rows without a member are kept under UNCATEGORIZED, so totals match the ledger
+    measures = AGGREGATES[(ledger, dimension)]
+    table = frame.groupby(dimension, observed=True, dropna=False).agg(**measures)
+    table.index = table.index.astype(object).where(table.index.notna(), UNCATEGORIZED).astype(str)
+    return table.groupby(level=0).sum()
+
+
+def _open_spans(start, end, covered):
+    # Date spans of [start, end] not covered by a closed month snapshot
+    spans = []
+    cursor = start
+    for period in covered:
+        month_start, month_end = month_bounds(period)
+        if cursor is None or cursor < month_start:
+            spans.append((cursor, month_start - pd.Timedelta(1, "ns")))
+        cursor = month_end + pd.Timedelta(1, "ns")
+    if cursor is None or end is None or cursor <= end:
+        spans.append((cursor, end))
+    return spans
+
+
+# ✅ Period close: warehouse/closed/
+#   periods.csv              closed months, written last when a month is closed
+#   snapshots.parquet        per-month aggregates for every entry in AGGREGATES
+#   balances.csv             closing cash, bank and supplier outstanding balances
+#   <ledger>/<YYYY-MM>.parquet   the frozen ledger rows of the month
+# Closed months are immutable: build_store swaps their rows for the frozen copy,
+# and aggregate() reads them from the snapshot, so only the open months are
+# aggregated from rows (and closed months snapshotted before an AGGREGATES entry
+# was added, from their frozen rows). Months close in order, oldest first.
+class PeriodCloseStore:
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.RLock()
+        self._snapshot = None
+        self._snapshot_mtime = None
+
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def _read_csv(self, filename, columns):
+        path = self._path(filename)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=columns)
+        return pd.read_csv(path, dtype={"Period": str, "Closed_At": str, "Account": str})
+
+    def _write(self, table, filename):
+        path = self._path(filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        if filename.endswith(".parquet"):
+            table.to_parquet(tmp, index=False)
+        else:
+            table.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+
+    # --- closed periods ---
+    def periods(self):
+        return self._read_csv("periods.csv", PERIOD_COLUMNS)
+
+    def closed_periods(self):
+        return sorted(self.periods()["Period"])
+
+    def balances(self):
+        return self._read_csv("balances.csv", BALANCE_COLUMNS)
+
+    def version(self):
+        path = self._path("periods.csv")
+        return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+    def snapshot(self):
+        path = self._path("snapshots.parquet")
+        mtime = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+        with self._lock:
+            if self._snapshot is None or self._snapshot_mtime != mtime:
+                self._snapshot = pd.read_parquet(path) if mtime is not None else pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+                self._snapshot_mtime = mtime
+            return self._snapshot
+
+    def next_period(self, store):
+        # Oldest month with rows in any ledger that is not closed yet, if it is over
+        closed = set(self.closed_periods())
+        current = pd.Timestamp.today().strftime("%Y-%m")
+        months = sorted(set().union(*(store.months(name) for name in store.names())))
+        for month in months:
+            if month not in closed:
+                return month if month < current else None
+        return None
+
+    # --- close ---
+    def close(self, period, store):
+        with self._lock:
+            closed = self._read_csv("periods.csv", PERIOD_COLUMNS)
+            if period in set(closed["Period"]):
+                return False
+            month_start, month_end = month_bounds(period)
+
+            snapshot = []
+            for name in store.names():
+                self._write(store.frame_range(name, month_start, month_end), os.path.join(name, f"{period}.parquet"))
+            for (ledger, dimension) in AGGREGATES:
+                table = aggregate_rows(store.frame_range(ledger, month_start, month_end), ledger, dimension)
+                long = table.rename_axis("Member").reset_index().melt(
+                    id_vars="Member", var_name="Measure", value_name="Value"
+                )
+                long.insert(0, "Period", period)
+                long.insert(1, "Ledger", ledger)
+                long.insert(2, "Dimension", dimension)
+                snapshot.append(long)
+
+            # Closing balances are cumulative up to the last instant of the month
+            cash = store.frame_range("cashbook", None, month_end)
+            bank = store.frame_range("bankbook", None, month_end)
+            purchase = store.frame_range("purchase", None, month_end)
+            supplier = (purchase["Payable"] - purchase["Receivedable"]).groupby(
+                purchase["Supplier_name"], observed=True
+            ).sum()
+            balances = pd.DataFrame({
+                "Account": ["Cash", "Bank"] + [f"Supplier: {s}" for s in supplier.index],
+                "Balance": [
+                    float(cash["Cash_In"].sum() - cash["Cash_Out"].sum()),
+                    float(bank["Deposit_Amount"].sum() - bank["Withdrawal_Amount"].sum()),
+                ] + supplier.astype(float).tolist(),
+            })
+            balances.insert(0, "Period", period)
+
+            old_snapshot = self.snapshot()
+            parts = [df for df in [old_snapshot] + snapshot if not df.empty]
+            new_snapshot = pd.concat(parts, ignore_index=True)[SNAPSHOT_COLUMNS] if parts else pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+            new_snapshot["Value"] = new_snapshot["Value"].astype("float64")
+            self._write(new_snapshot, "snapshots.parquet")
+            old_balances = self._read_csv("balances.csv", BALANCE_COLUMNS)
+            self._write(pd.concat([df for df in (old_balances, balances) if not df.empty], ignore_index=True), "balances.csv")
+            # periods.csv last: a month only counts as closed once everything above is on disk
+            row = pd.DataFrame({"Period": [period], "Closed_At": [datetime.now().isoformat(timespec="seconds")]})
+            self._write(pd.concat([df for df in (closed, row) if not df.empty], ignore_index=True), "periods.csv")
+            return True
+
+    # --- frozen rows ---
+    def freeze(self, name, frame, date_column):
+        closed = [p for p in self.closed_periods() if os.path.exists(self._path(name, f"{p}.parquet"))]
+        if not closed:
+            return frame
+        months = frame[date_column].dt.strftime("%Y-%m")
+        frozen = [pd.read_parquet(self._path(name, f"{p}.parquet")) for p in closed]
+        live = frame[~months.isin(closed)]
+        parts = [part for part in [live] + frozen if not part.empty]
+        if not parts:
+            return frame
+        if len(parts) == 1 and parts[0] is live:
+            return live.reset_index(drop=True)
+        # Frozen and live rows carry different category sets, and months frozen
+        # under an older schema other number types; re-apply the schema
+        return compact_frame(pd.concat(parts, ignore_index=True), LEDGER_SCHEMAS[name])
+
+    # --- queries ---
+    def aggregate(self, store, ledger, dimension, start=None, end=None):
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(1, "ns") if end is not None else None
+        snap = self.snapshot()
+        snap = snap[(snap["Ledger"] == ledger) & (snap["Dimension"] == dimension)]
+        snapshotted = set(snap["Period"])
+        covered = [
+            p for p in self.closed_periods()
+            if p in snapshotted
+            and (start is None or month_bounds(p)[0] >= start) and (end is None or month_bounds(p)[1] <= end)
+        ]
+        measures = list(AGGREGATES[(ledger, dimension)])
+        parts = []
+        if covered:
+            rows = snap[snap["Period"].isin(covered)]
+            parts.append(rows.pivot_table(index="Member", columns="Measure", values="Value", aggfunc="sum"))
+        for span_start, span_end in _open_spans(start, end, covered):
+            parts.append(aggregate_rows(store.frame_range(ledger, span_start, span_end), ledger, dimension))
+        parts = [part for part in parts if not part.empty]
+        if not parts:
+            return pd.DataFrame(columns=[dimension] + measures)
+        table = pd.concat(parts).groupby(level=0).sum()[measures]
+        for measure, (_, how) in AGGREGATES[(ledger, dimension)].items():
+            if how == "size":
+                table[measure] = table[measure].astype("int64")
+        table = table.sort_values(measures[0], ascending=False, kind="stable")
+        return table.rename_axis(index=dimension, columns=None).reset_index()
@@ -0,0 +1,86 @@
+import pandas as pd
+
+
+# ✅ Drill-down paths on the Sales Analysis page (top level first)
+SALES_HIERARCHIES = {
+    "Category → Product → Day": ["category", "product_name", "day"],
+    "Seller → Customer": ["Sold_By", "customer_name"],
+}
+
+MEASURES = {
+    "Total_Sales": ("total_amount", "sum"),
+    "Total_Quantity": ("quantity", "sum"),
+    "Invoices": ("total_amount", "size"),
+}
+
+BLANK = "(blank)"    # member of rows whose level value is empty
+
+
+# ✅ Precomputed aggregation cube for one hierarchy
+# Every level is rolled up once when the cube is built, and the rollup is split
+# by parent path, so drilling in or out is a dict lookup that returns only the
+# children of the selected node instead of a new groupby over the sales rows.
+# Rows with an empty level value are kept under BLANK, so the children of every
+# node add up to the node.
+class SalesCube:
+    def __init__(self, frame, levels):
+        self.levels = list(levels)
+        frame = _with_blanks(frame.assign(day=frame["date"].dt.normalize()), self.levels)
+        self._children = {}
+        self._totals = {(): pd.Series({name: _total(frame, col, how) for name, (col, how) in MEASURES.items()})}
+        for depth in range(len(self.levels)):
+            rollup = frame.groupby(self.levels[:depth + 1], observed=True, sort=True, dropna=False).agg(**MEASURES)
+            for path, children in _split(rollup, depth):
+                children = children.droplevel(list(range(depth))) if depth else children
+                # Days read best in calendar order, every other level by sales
+                if self.levels[depth] == "day":
+                    children = children.sort_index()
+                else:
+                    children = children.sort_values("Total_Sales", ascending=False, kind="stable")
+                self._children[path] = children
+                for child, row in children.iterrows():
+                    self._totals[path + (child,)] = row
+
+    def children(self, path=()):
+        path = tuple(path)
+        level = self.levels[len(path)] if len(path) < len(self.levels) else None
+        table = self._children.get(path)
+        if level is None or table is None:
+            return pd.DataFrame(columns=list(MEASURES))
+        return table.rename_axis(level).reset_index()
+
+    def total(self, path=()):
+        return self._totals.get(tuple(path), pd.Series(0, index=list(MEASURES)))
+
+
+def _with_blanks(frame, levels):
+    # Days without a date stay NaT, which sorts after the calendar days
+    filled = {}
+    for level in levels:
+        col = frame[level]
+        if level == "day" or not col.isna().any():
+            continue
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            if BLANK not in col.cat.categories:
+                col = col.cat.add_categories([BLANK])
+            filled[level] = col.fillna(BLANK)
+        else:
+            filled[level] = col.astype(object).where(col.notna(), BLANK)
+    return frame.assign(**filled)
+
+
+def _total(frame, col, how):
+    return len(frame) if how == "size" else frame[col].sum()
+
+
+def _split(rollup, depth):
+    if depth == 0:
+        yield (), rollup
+        return
+    parents = list(range(depth)) if depth > 1 else 0
+    for key, children in rollup.groupby(level=parents, observed=True, sort=False, dropna=False):
+        yield (key if isinstance(key, tuple) else (key,)), children
+
+
+def build_cubes(frame):
+    return {name: SalesCube(frame, levels) for name, levels in SALES_HIERARCHIES.items()}
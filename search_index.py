@@ -0,0 +1,147 @@
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+
+# ✅ Text columns indexed per ledger
+SEARCH_COLUMNS = {
+    "sales": ["invoice_id", "customer_name", "product_id", "product_name", "category", "Sold_By", "payment_method", "bank_name"],
+    "cashbook": ["Voucher_No", "Description", "Name", "Reference", "Payment_category"],
+    "bankbook": ["Cheque_No", "Particulars", "fund_source", "Bank_Ref"],
+    "purchase": ["Vouchar_no", "Supplier_name", "Product_code", "Product_name", "Product_Category"],
+}
+
+# Latin letters, digits and Bengali script
+TOKEN_RE = re.compile(r"[0-9a-zঀ-৿]+")
+
+
+def normalize(text):
+    return unicodedata.normalize("NFKC", str(text)).lower()
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+
+def _trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+# ✅ In-process inverted index over all ledgers
+#   token   -> rows (ledger, position)     exact matches
+#   sorted tokens + bisect                 prefix matches ("rah" -> "rahim")
+#   trigram -> tokens                      substring matches ("1042" in "pur001042")
+# Rows are fingerprinted with hash_pandas_object, so a sync after a reload
+# only re-tokenizes rows that were added or changed.
+class SearchIndex:
+    def __init__(self, columns=SEARCH_COLUMNS):
+        self.columns = columns
+        self._postings = {}
+        self._trigrams = {}
+        self._row_tokens = {}
+        self._row_hashes = {}
+        self._versions = {}
+        self._sorted_tokens = []
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    # --- ingest ---
+    def sync(self, ledger, frame, version):
+        if self._versions.get(ledger) == version:
+            return 0
+        cols = [c for c in self.columns.get(ledger, []) if c in frame.columns]
+        text = frame[cols].astype("string").fillna("")
+        hashes = pd.util.hash_pandas_object(text, index=False).to_numpy()
+        with self._lock:
+            old = self._row_hashes.get(ledger)
+            if old is None:
+                changed = list(range(len(hashes)))
+            else:
+                common = min(len(old), len(hashes))
+                changed = np.flatnonzero(old[:common] != hashes[:common]).tolist()
+                changed.extend(range(common, max(len(old), len(hashes))))
+            rows = text.to_numpy()
+            for pos in changed:
+                self._remove_row((ledger, pos))
+                if pos < len(rows):
+                    self._add_row((ledger, pos), " ".join(rows[pos]))
+            self._row_hashes[ledger] = hashes
+            self._versions[ledger] = version
+        return len(changed)
+
+    def _add_row(self, key, text):
+        tokens = set(tokenize(text))
+        self._row_tokens[key] = tokens
+        for token in tokens:
+            rows = self._postings.get(token)
+            if rows is None:
+                rows = self._postings[token] = set()
+                for gram in _trigrams(token):
+                    self._trigrams.setdefault(gram, set()).add(token)
+                self._dirty = True
+            rows.add(key)
+
+    def _remove_row(self, key):
+        for token in self._row_tokens.pop(key, ()):
+            rows = self._postings.get(token)
+            if rows is None:
+                continue
+            rows.discard(key)
+            if not rows:
+                del self._postings[token]
+                for gram in _trigrams(token):
+                    self._trigrams[gram].discard(token)
+                self._dirty = True
+
+    # --- lookup ---
+    def _tokens_for(self, term):
+        if self._dirty:
+            self._sorted_tokens = sorted(self._postings)
+            self._dirty = False
+        matches = set()
+        if term in self._postings:
+            matches.add(term)
+        start = bisect_left(self._sorted_tokens, term)
+        for token in self._sorted_tokens[start:]:
+            if not token.startswith(term):
+                break
+            matches.add(token)
+        if len(term) >= 3:
+            grams = [self._trigrams.get(g, set()) for g in _trigrams(term)]
+            candidates = set.intersection(*grams) if grams else set()
+            matches.update(t for t in candidates if term in t)
+        return matches
+
+    def _term_rows(self, term):
+        rows = set()
+        for token in self._tokens_for(term):
+            rows |= self._postings[token]
+        return rows
+
+    def search(self, query, limit=200, version=None):
+        # "rahim 1042" -> rows matching both terms, "invoice 1042 or rahim" -> either clause.
+        # A term that occurs nowhere in the ledgers leaves its clause without hits.
+        # With `version`, ledgers indexed from another data version are left out,
+        # since their row positions belong to frames the caller does not have.
+        # Returns {ledger: first `limit` positions} and {ledger: number of matches}.
+        with self._lock:
+            hits = set()
+            for clause in re.split(r"\s+or\s+|\|", normalize(query)):
+                terms = tokenize(clause)
+                if terms:
+                    hits |= set.intersection(*(self._term_rows(term) for term in terms))
+            if version is not None:
+                hits = {hit for hit in hits if self._versions.get(hit[0]) == version}
+        grouped, counts = {}, {}
+        for ledger, pos in sorted(hits):
+            counts[ledger] = counts.get(ledger, 0) + 1
+            if counts[ledger] <= limit:
+                grouped.setdefault(ledger, []).append(pos)
+        return grouped, counts
+
+    def __len__(self):
+        return len(self._row_tokens)
@@ -0,0 +1,189 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+
+# ✅ Startup profile for main.py
+# Every measurement runs in a fresh interpreter, like a cold container boot:
+#   1. imports: `python -X importtime` over the module-level imports of the app,
+#      summed per top-level package (what every cold start pays before rendering)
+#   2. render:  interpreter start -> first rerun finished (time to first render),
+#      then a warm rerun and, optionally, the first visit of every page, which
+#      is where the deferred chart libraries get imported
+# Reports both tables and can gate against a saved report:
+#   python startup_profile.py --save-baseline startup_baseline.json
+#   python startup_profile.py --baseline startup_baseline.json
+# Run it once with an empty warehouse/ to see the ingest cost of a first boot.
+
+HEAVY_MODULES = ["plotly.express", "matplotlib.pyplot", "PIL.Image"]
+
+RENDER_PROBE = r"""
+import json, sys, time
+started = time.time()
+from streamlit.testing.v1 import AppTest
+script, timeout, pages, heavy = sys.argv[1], float(sys.argv[2]), json.loads(sys.argv[3]), json.loads(sys.argv[4])
+app = AppTest.from_file(script, default_timeout=timeout)
+ready = time.time()
+app.run()
+first = time.time()
+result = {
+    "started": started,
+    "streamlit_import_s": ready - started,
+    "first_render_s": first - ready,
+    "error": str(app.exception[0].value)[:200] if app.exception else None,
+    "loaded_after_first_render": [m for m in heavy if m in sys.modules],
+}
+app.run()
+result["warm_rerun_s"] = time.time() - first
+visits = []
+# null: every menu entry; a list (empty for --no-pages): just those
+if pages is None:
+    pages = list(app.sidebar.radio[0].options) if app.sidebar.radio else []
+for page in pages:
+    t = time.time()
+    app.sidebar.radio[0].set_value(page).run()
+    visits.append({
+        "Page": page,
+        "First_Visit_ms": round((time.time() - t) * 1000, 1),
+        "Error": str(app.exception[0].value)[:200] if app.exception else None,
+    })
+result["pages"] = visits
+result["loaded_at_end"] = [m for m in heavy if m in sys.modules]
+print(json.dumps(result))
+"""
+
+
+def app_imports(script):
+    # Module-level imports of the app; imports inside page branches are deferred
+    with open(script, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def import_breakdown(modules):
+    code = "".join(f"import {name}\n" for name in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, self_us, name = line.split("|", 2)
+        try:
+            self_us = int(self_us)
+        except ValueError:
+            continue  # header line
+        rows.append((name.strip().split(".")[0], self_us))
+    table = pd.DataFrame(rows, columns=["Package", "Self_us"])
+    table = table.groupby("Package", sort=False).agg(Modules=("Self_us", "size"), Self_us=("Self_us", "sum"))
+    table["Import_ms"] = (table.pop("Self_us") / 1000).round(1)
+    table = table.sort_values("Import_ms", ascending=False, kind="stable").reset_index()
+    table["Share"] = (table["Import_ms"] / table["Import_ms"].sum()).round(3)
+    return table
+
+
+def render_profile(script, timeout, pages):
+    launched = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-c", RENDER_PROBE, script, str(timeout), json.dumps(pages), json.dumps(HEAVY_MODULES)],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "render probe failed")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["interpreter_start_s"] = result.pop("started") - launched
+    result["time_to_first_render_s"] = result["interpreter_start_s"] + result["streamlit_import_s"] + result["first_render_s"]
+    return result
+
+
+def check_baseline(totals, baseline, tolerance):
+    # Fails when time to first render or the app's import time grew by more than `tolerance`
+    failures = []
+    for key in ("time_to_first_render_s", "import_ms"):
+        before = baseline["totals"].get(key)
+        if not before:
+            continue
+        limit = before * (1 + tolerance)
+        if totals[key] > limit:
+            failures.append(f"{key}: {totals[key]:.3f} > {limit:.3f} (baseline {before:.3f})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start profile for the Streamlit app")
+    parser.add_argument("--script", default="main.py")
+    parser.add_argument("--pages", nargs="*", help="time the first visit of these menu entries (default: all)")
+    parser.add_argument("--no-pages", action="store_true", help="only profile the first render")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds allowed per rerun")
+    parser.add_argument("--top", type=int, default=15, help="packages shown in the import breakdown")
+    parser.add_argument("--baseline", help="fail if startup regressed against this JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed growth over the baseline")
+    parser.add_argument("--save-baseline", help="write this run's report as the new baseline")
+    args = parser.parse_args(argv)
+
+    # The app resolves data files and local modules relative to its directory
+    app_dir = os.path.dirname(os.path.abspath(args.script))
+    os.chdir(app_dir)
+    script = os.path.basename(args.script)
+
+    imports = import_breakdown(app_imports(script))
+    render = render_profile(script, args.timeout, [] if args.no_pages else args.pages)
+    pages = pd.DataFrame(render.pop("pages"), columns=["Page", "First_Visit_ms", "Error"])
+
+    totals = {
+        "import_ms": round(float(imports["Import_ms"].sum()), 1),
+        "interpreter_start_s": round(render["interpreter_start_s"], 3),
+        "streamlit_import_s": round(render["streamlit_import_s"], 3),
+        "first_render_s": round(render["first_render_s"], 3),
+        "time_to_first_render_s": round(render["time_to_first_render_s"], 3),
+        "warm_rerun_s": round(render["warm_rerun_s"], 3),
+        "loaded_after_first_render": render["loaded_after_first_render"],
+        "loaded_at_end": render["loaded_at_end"],
+    }
+
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(imports.head(args.top).to_string(index=False))
+        print()
+        if not pages.empty:
+            print(pages.drop(columns="Error").to_string(index=False))
+            print()
+    print(json.dumps(totals))
+    errors = [f"(first render): {render['error']}"] if render["error"] else []
+    errors += [f"{page}: {error}" for page, error in pages.dropna(subset=["Error"])[["Page", "Error"]].itertuples(index=False)]
+    for error in errors:
+        print(f"ERROR {error}")
+
+    result = {
+        "totals": totals,
+        "imports": imports.to_dict("records"),
+        "pages": pages.drop(columns="Error").to_dict("records"),
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=1, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures = check_baseline(totals, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        return 1 if failures else 0
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
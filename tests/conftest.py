@@ -0,0 +1,46 @@
+import os
+import shutil
+import sys
+
+import pandas as pd
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The app runs with copy-on-write enabled (main.py); the modules rely on it
+pd.set_option("mode.copy_on_write", True)
+
+WORKBOOKS = {
+    "sales": "sales_register.xlsx",
+    "cashbook": "cashbook.xlsx",
+    "bankbook": "bankbook.xlsx",
+    "purchase": "purchase_sales_demo.xlsx",
+}
+
+
+@pytest.fixture
+def workbooks(tmp_path):
+    # Copies of the demo workbooks, so tests can edit or touch them
+    paths = {}
+    for name, filename in WORKBOOKS.items():
+        paths[name] = str(tmp_path / filename)
+        shutil.copy2(os.path.join(ROOT, filename), paths[name])
+    return paths
+
+
+@pytest.fixture
+def read_excel_calls(monkeypatch):
+    # Counts workbook reads done by ledger_store.build_store
+    import ledger_store
+
+    calls = []
+    real = pd.read_excel
+
+    def counting(path, *args, **kwargs):
+        calls.append(path)
+        return real(path, *args, **kwargs)
+
+    monkeypatch.setattr(ledger_store.pd, "read_excel", counting)
+    return calls
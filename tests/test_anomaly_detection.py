@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from anomaly_detection import AnomalyDetector
+
+
+def _bankbook(days=40, skip=30):
+    # One steady deposit a day, none on day `skip`
+    dates = pd.date_range("2024-01-01", periods=days, freq="D").delete(skip)
+    return pd.DataFrame({
+        "Date": dates,
+        "Particulars": [f"Takings {i}" for i in range(len(dates))],
+        "fund_source": "Shop",
+        "Deposit_Amount": 1000 + 50 * (np.arange(len(dates)) % 3),
+        "Withdrawal_Amount": 0,
+        "Bank_Ref": [f"BR-{i:03d}" for i in range(len(dates))],
+    })
+
+
+def test_day_without_deposits_is_a_drop():
+    detector = AnomalyDetector()
+    detector.sync("bankbook", _bankbook(), 1)
+    alerts = detector.alerts("bankbook")
+    drops = alerts[alerts["Check"] == "Daily drop"]
+    assert set(drops["Date"]) == {pd.Timestamp("2024-01-31")}
+    assert (drops["Amount"] == 0).all() and (drops["Expected"] > 0).all()
+    assert not (alerts["Check"] == "Daily spike").any()
+
+
+def test_incremental_sync_matches_a_full_scan():
+    frame = _bankbook()
+    frame.loc[35, "Deposit_Amount"] = 9000
+    incremental = AnomalyDetector()
+    incremental.sync("bankbook", frame.iloc[:20], 1)
+    incremental.sync("bankbook", frame.iloc[:32], 2)
+    incremental.sync("bankbook", frame, 3)
+    full = AnomalyDetector()
+    full.sync("bankbook", frame, 1)
+    pd.testing.assert_frame_equal(incremental.alerts("bankbook"), full.alerts("bankbook"))
+    assert {"Daily drop", "Daily spike", "Unusual entry"} <= set(full.alerts("bankbook")["Check"])
+
+
+def test_previous_version_is_kept_for_its_readers():
+    frame = _bankbook()
+    detector = AnomalyDetector()
+    detector.sync("bankbook", frame.iloc[:25], "v1")
+    before = detector.alerts("bankbook", version="v1")
+    detector.sync("bankbook", frame, "v2")
+    pd.testing.assert_frame_equal(detector.alerts("bankbook", version="v1"), before)
+    assert (detector.alerts("bankbook", version="v2")["Check"] == "Daily drop").any()
+    assert not (before["Check"] == "Daily drop").any()
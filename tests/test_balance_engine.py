@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from balance_engine import BalanceEngine
+
+
+def _bankbook(rows, seed=3):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Date": pd.to_datetime("2025-01-01") + pd.to_timedelta(rng.integers(0, 90, rows), unit="D"),
+        "fund_source": rng.choice(["Shop", "Online", None], rows),
+        "Deposit_Amount": rng.integers(0, 5000, rows),
+        "Withdrawal_Amount": rng.integers(0, 3000, rows),
+    })
+
+
+def test_incremental_sync_matches_a_full_recompute():
+    frame = _bankbook(300)
+    # Appended batches, the later ones back-dated into earlier days
+    incremental = BalanceEngine()
+    for version, end in enumerate([100, 180, 181, 300], start=1):
+        incremental.sync("bankbook", frame.iloc[:end], version)
+    full = BalanceEngine()
+    full.sync("bankbook", frame, 1)
+
+    assert incremental.accounts("bankbook") == full.accounts("bankbook") == ["(none)", "Online", "Shop"]
+    for start, end in [(None, None), ("2025-02-01", "2025-02-28"), ("2025-03-15", "2025-03-15")]:
+        pd.testing.assert_frame_equal(
+            incremental.opening_closing("bankbook", start, end), full.opening_closing("bankbook", start, end)
+        )
+    running = incremental.running("bankbook", frame)
+    pd.testing.assert_series_equal(running, full.running("bankbook", frame))
+    net = frame["Deposit_Amount"] - frame["Withdrawal_Amount"]
+    assert full.balance("bankbook", "Shop") == pytest.approx(net[frame["fund_source"] == "Shop"].sum())
+
+
+def test_previous_version_is_kept_for_its_readers():
+    frame = _bankbook(200)
+    engine = BalanceEngine()
+    engine.sync("bankbook", frame.iloc[:120], "v1")
+    before = engine.opening_closing("bankbook", version="v1")
+    engine.sync("bankbook", frame, "v2")
+
+    pd.testing.assert_frame_equal(engine.opening_closing("bankbook", version="v1"), before)
+    assert engine.balance("bankbook", "Shop", version="v2") != engine.balance("bankbook", "Shop", version="v1")
+    # Unknown versions read the latest ingest
+    assert engine.balance("bankbook", "Shop", version="v0") == engine.balance("bankbook", "Shop", version="v2")
+
+    engine.sync("bankbook", frame, "v3")
+    assert engine.balance("bankbook", "Shop", version="v1") == engine.balance("bankbook", "Shop", version="v3")
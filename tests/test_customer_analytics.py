@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from customer_analytics import CustomerAnalytics
+
+
+def _sales():
+    return pd.DataFrame({
+        "date": pd.to_datetime(["2025-05-01", "2025-05-03", "2025-05-09", "2025-06-02", "2025-06-05", "2025-06-07"]),
+        "customer_name": ["Asha", "Bina", "Asha", "Chaya", "Bina", "Bina"],
+        "total_amount": [500.0, 200.0, 700.0, 300.0, 900.0, 400.0],
+        "payment_status": ["Paid", "Due", "Paid", "Paid", "Due", "Paid"],
+        "payment_method": ["Cash", "bKash", "Cash", "Card", "bKash", "Cash"],
+    })
+
+
+def test_previous_version_is_kept_for_its_readers():
+    sales = _sales()
+    customers = CustomerAnalytics()
+    customers.sync(sales.iloc[:3], "v1")
+    before = customers.top(5, version="v1")
+    customers.sync(sales, "v2")
+
+    pd.testing.assert_frame_equal(customers.top(5, version="v1"), before)
+    assert before["customer_name"].tolist() == ["Asha", "Bina"]
+    assert customers.top(5, version="v2")["customer_name"].tolist() == ["Bina", "Asha", "Chaya"]
+    assert customers.segments(version="v2")["Customers"].sum() == 3
+
+
+def test_missing_payment_methods_do_not_win():
+    sales = _sales()
+    sales["payment_method"] = ["Cash", "bKash", None, None, None, None]
+    customers = CustomerAnalytics()
+    customers.sync(sales.iloc[:4], 1)
+    customers.sync(sales, 2)
+    preferred = customers.top(5).set_index("customer_name")["Preferred_Method"]
+    assert preferred["Asha"] == "Cash"
+    assert preferred["Bina"] == "bKash"
+    assert pd.isna(preferred["Chaya"])
+
+
+def test_no_payment_methods_at_all():
+    sales = _sales().assign(payment_method=np.nan)
+    customers = CustomerAnalytics()
+    customers.sync(sales, 1)
+    assert customers.top(5)["Preferred_Method"].isna().all()
@@ -0,0 +1,69 @@
+import datetime
+import threading
+
+import numpy as np
+import pandas as pd
+
+from filter_engine import FilterEngine, as_filter
+
+
+def _frame():
+    rng = np.random.default_rng(7)
+    dates = pd.to_datetime("2025-01-01") + pd.to_timedelta(rng.integers(0, 120, 500), unit="D")
+    return pd.DataFrame({
+        "Date": dates.where(rng.random(500) > 0.02),
+        "Supplier": rng.choice(["Acme", "Bolt", "Crest", None], 500),
+        "Status": rng.choice(["Paid", "Open"], 500),
+    })
+
+
+def test_date_range_is_applied_with_the_selections():
+    frame = _frame()
+    engine = FilterEngine(frame, ["Supplier", "Status"], "Date")
+    start, end = datetime.date(2025, 2, 1), datetime.date(2025, 3, 15)
+
+    result = engine.filter({"Supplier": ["Acme", "Crest"], "Status": None}, (start, end))
+    expected = frame[
+        frame["Supplier"].isin(["Acme", "Crest"])
+        & (frame["Date"] >= pd.Timestamp(start)) & (frame["Date"] <= pd.Timestamp(end))
+    ]
+    pd.testing.assert_frame_equal(result, expected)
+
+    in_range = engine.filter({"Supplier": None}, (start, end))
+    assert in_range["Date"].between(pd.Timestamp(start), pd.Timestamp(end)).all()
+    assert len(in_range) == frame["Date"].between(pd.Timestamp(start), pd.Timestamp(end)).sum()
+    assert len(engine.filter({"Supplier": None})) == len(frame)
+
+
+def test_every_option_ticked_is_no_filter():
+    assert as_filter(["a", "b"], ["b", "a"]) is None
+    assert as_filter(["a"], ["a", "b"]) == ["a"]
+
+
+def test_concurrent_sessions_share_one_bitmap_per_value():
+    frame = _frame()
+    engine = FilterEngine(frame, ["Supplier", "Status"])
+    choices = [["Acme"], ["Bolt"], ["Acme", "Bolt"], ["Crest"], ["Bolt", "Crest"]]
+    barrier = threading.Barrier(len(choices))
+    results, errors = {}, []
+
+    def session(suppliers):
+        try:
+            barrier.wait()
+            results[tuple(suppliers)] = engine.select({"Supplier": suppliers, "Status": ["Open"]})
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=session, args=(suppliers,)) for suppliers in choices]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    for suppliers, rows in results.items():
+        expected = np.flatnonzero(frame["Supplier"].isin(suppliers) & (frame["Status"] == "Open"))
+        assert rows.tolist() == expected.tolist()
+    cached = dict(engine._bitmaps["Supplier"])
+    for code, bitmap in cached.items():
+        assert engine._value_bitmap("Supplier", code) is bitmap
@@ -0,0 +1,99 @@
+import sys
+import threading
+import time
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecast_worker import SHORT_HISTORY, fit_batch
+from forecasting import FORECAST_SERIES, ForecastService
+
+
+class _Store:
+    def __init__(self, days):
+        dates = pd.date_range("2025-06-01", periods=days, freq="D")
+        amount = 100.0 + 10 * (np.arange(days) % 7)
+        self.frames = {
+            "sales": pd.DataFrame({"date": dates, "category": "Food", "payment_method": "Cash", "total_amount": amount}),
+            "cashbook": pd.DataFrame({"Date": dates, "Payment_category": "Sales", "Cash_In": amount, "Cash_Out": 0.0}),
+        }
+
+    def frame(self, name):
+        return self.frames[name]
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = ForecastService(str(tmp_path / "forecasts"), workers=1)
+    yield service
+    if service._pool is not None:
+        service._pool.shutdown()
+
+
+def _fit(service, store):
+    service.refresh(store)
+    return {name: service.result(name, wait=60) for name in FORECAST_SERIES}
+
+
+def test_short_history_is_flagged():
+    short = fit_batch(np.array([[5.0, 7.0, 6.0]]), horizon=10)
+    assert list(short["model"]) == [SHORT_HISTORY]
+    assert np.isnan(short["alpha"]).all() and np.isnan(short["mae"]).all()
+    assert short["forecast"].shape == (1, 10)
+
+    full = fit_batch(np.tile(np.arange(60.0) % 7, (2, 1)), horizon=10)
+    assert SHORT_HISTORY not in full["model"] and not np.isnan(full["mae"]).any()
+
+
+def test_workers_do_not_run_the_page_script(service, tmp_path, monkeypatch):
+    marker = tmp_path / "ran"
+    script = tmp_path / "page.py"
+    script.write_text(f"open({str(marker)!r}, 'w').close()\n", encoding="utf-8")
+    page = types.ModuleType("__main__")
+    page.__file__ = str(script)
+    monkeypatch.setitem(sys.modules, "__main__", page)
+
+    results = _fit(service, _Store(40))
+    assert all(result is not None for result in results.values())
+    assert not marker.exists()
+    assert sys.modules["__main__"] is page
+
+
+def test_submit_never_replaces_main(service, monkeypatch):
+    page = types.ModuleType("__main__")
+    monkeypatch.setitem(sys.modules, "__main__", page)
+    seen = set()
+    done = threading.Event()
+
+    def watch():
+        # Another script thread reading __main__ while workers start
+        while not done.is_set():
+            seen.add(id(sys.modules["__main__"]))
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    try:
+        _fit(service, _Store(40))
+    finally:
+        done.set()
+        watcher.join()
+    assert seen == {id(page)}
+
+
+def test_pool_is_replaced_after_a_worker_dies(service):
+    _fit(service, _Store(40))
+    broken = service._pool
+    for process in list(broken._processes.values()):
+        process.kill()
+        process.join()
+    # The pool's manager thread marks it broken once it sees the dead worker
+    for _ in range(100):
+        if broken._broken:
+            break
+        time.sleep(0.05)
+    results = _fit(service, _Store(45))
+    assert service._pool is not broken
+    assert all(service.error(name) is None for name in FORECAST_SERIES)
+    assert all(result["daily"]["Date"].max() > pd.Timestamp("2025-07-14") for result in results.values())
@@ -0,0 +1,40 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from ledger_schema import compact_frame
+from ledger_validation import validate_frame
+
+
+SCHEMA = {"columns": {"Date": ("date", "%d-%m-%Y"), "Amount": "money"}}
+
+
+def test_only_real_dates_bypass_the_format():
+    raw = pd.DataFrame({
+        "Date": ["03-04-2025", "2025-04-05", "04/05/2025", datetime.datetime(2025, 4, 6), pd.Timestamp("2025-04-07"),
+                 datetime.date(2025, 4, 8), None],
+        "Amount": [100, 200, 300, 400, 500, 600, 700],
+    })
+    frame = compact_frame(raw, SCHEMA)
+    assert frame["Date"].tolist()[:1] == [pd.Timestamp("2025-04-03")]
+    assert frame["Date"].iloc[1:3].isna().all()
+    assert frame["Date"].iloc[3:6].tolist() == [pd.Timestamp(f"2025-04-0{day}") for day in (6, 7, 8)]
+
+    clean, quarantine, _ = validate_frame("purchase", raw, frame, SCHEMA)
+    assert quarantine["Excel_Row"].tolist() == [3, 4]
+    assert set(quarantine["Issues"]) == {"bad_date:Date"}
+    assert clean["Amount"].tolist() == [100, 400, 500, 600, 700]
+
+
+def test_money_is_never_downcast():
+    schema = {"columns": {"Amount": "money", "Rate": "money", "Quantity": "int"}}
+    raw = pd.DataFrame({"Amount": [1_500_000_000, 2_000_000_000], "Rate": [0.5, 2.25], "Quantity": [1, 3]})
+    frame = compact_frame(raw, schema)
+    assert frame["Amount"].dtype == np.int64
+    assert frame["Rate"].dtype == np.float64
+    assert frame["Quantity"].dtype == np.int8
+    assert (frame["Amount"] * frame["Quantity"]).tolist() == [1_500_000_000, 6_000_000_000]
+
+    clean, _, _ = validate_frame("test", raw.drop(columns=["Amount"]), frame.drop(columns=["Amount"]), schema)
+    assert clean["Amount"].dtype == np.int64
@@ -0,0 +1,89 @@
+import gc
+import json
+import os
+
+import pandas as pd
+
+from ledger_partitions import PartitionedLedger
+from ledger_store import LEDGER_DATE_COLUMNS, build_store, files_version
+
+
+def test_source_version_round_trips_through_the_manifest(workbooks, tmp_path):
+    build_store(workbooks, str(tmp_path / "partitions"))
+    ledger = PartitionedLedger(str(tmp_path / "partitions" / "sales"), LEDGER_DATE_COLUMNS["sales"])
+    assert ledger.source_version == files_version({"sales": workbooks["sales"]})
+
+
+def test_second_build_skips_the_workbooks(workbooks, tmp_path, read_excel_calls):
+    root = str(tmp_path / "partitions")
+    first = build_store(workbooks, root)
+    assert len(read_excel_calls) == len(workbooks)
+
+    read_excel_calls.clear()
+    second = build_store(workbooks, root)
+    assert read_excel_calls == []
+    for name in workbooks:
+        pd.testing.assert_frame_equal(second.frame(name), first.frame(name))
+    pd.testing.assert_frame_equal(second.quality_report(), first.quality_report())
+
+
+def test_edited_workbook_is_read_again(workbooks, tmp_path, read_excel_calls):
+    root = str(tmp_path / "partitions")
+    build_store(workbooks, root)
+    frame = pd.read_excel(workbooks["cashbook"])
+    frame.to_excel(workbooks["cashbook"], index=False)
+
+    read_excel_calls.clear()
+    build_store(workbooks, root)
+    assert read_excel_calls == [workbooks["cashbook"]]
+
+
+def test_partitions_from_an_older_schema_are_rebuilt(workbooks, tmp_path, read_excel_calls):
+    root = str(tmp_path / "partitions")
+    build_store(workbooks, root)
+    path = os.path.join(root, "cashbook", "_manifest.json")
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["schema_version"] = 1
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    read_excel_calls.clear()
+    store = build_store(workbooks, root)
+    assert read_excel_calls == [workbooks["cashbook"]]
+    assert store.frame("cashbook")["Cash_In"].dtype.itemsize == 8
+
+
+def _month(frame, start, end):
+    dates = frame["date"]
+    return frame[(dates >= start) & (dates <= end)].reset_index(drop=True)
+
+
+def test_previous_store_keeps_reading_its_own_months(workbooks, tmp_path):
+    root = str(tmp_path / "partitions")
+    old = build_store(workbooks, root)
+    # The new data doubles June and drops July altogether
+    sales = pd.read_excel(workbooks["sales"])
+    dates = pd.to_datetime(sales["date"])
+    june = dates.dt.strftime("%Y-%m") == "2025-06"
+    sales.loc[june, "total_amount"] *= 2
+    sales = sales[dates.dt.strftime("%Y-%m") != "2025-07"]
+    sales.to_excel(workbooks["sales"], index=False)
+
+    new = build_store(workbooks, root)
+    for start, end in [("2025-06-01", "2025-06-30"), ("2025-07-01", "2025-07-31")]:
+        pd.testing.assert_frame_equal(
+            old.frame_range("sales", start, end).reset_index(drop=True), _month(old.frame("sales"), start, end)
+        )
+    june = ("2025-06-01", "2025-06-30")
+    pd.testing.assert_frame_equal(new.frame_range("sales", *june).reset_index(drop=True), _month(new.frame("sales"), *june))
+    assert new.frame_range("sales", "2025-07-01", "2025-07-31").empty
+    assert "2025-07" in old.months("sales") and "2025-07" not in new.months("sales")
+
+    # Once the old store is gone, the next write drops the files only it read
+    del old
+    gc.collect()
+    build_store(workbooks, root)
+    ledger = PartitionedLedger(os.path.join(root, "sales"), LEDGER_DATE_COLUMNS["sales"])
+    files = {name for name in os.listdir(ledger.root) if name.endswith(".parquet")}
+    assert files == {entry["file"] for entry in ledger.manifest["partitions"].values()}
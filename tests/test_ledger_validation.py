@@ -0,0 +1,108 @@
+import pandas as pd
+import pytest
+
+from ledger_schema import compact_frame
+from ledger_store import _load_quality, _save_quality
+from ledger_validation import REPORT_COLUMNS, validate_frame
+
+
+SCHEMA = {
+    "columns": {
+        "Date": ("date", "%Y-%m-%d"),
+        "Voucher": "string",
+        "Name": "category",
+        "Quantity": "int",
+        "Amount": "money",
+    },
+    "fill": {"Name": "Unknown"},
+    "nonnegative": ["Quantity", "Amount"],
+    "unique": "Voucher",
+}
+
+
+def _validate(raw):
+    return validate_frame("test", raw, compact_frame(raw, SCHEMA), SCHEMA)
+
+
+def _raw(**changes):
+    raw = pd.DataFrame({
+        "Date": ["2025-04-01", "2025-04-02", "2025-04-03", "2025-04-04"],
+        "Voucher": ["V1", "V2", "V3", "V4"],
+        "Name": ["Ana", "Bo", None, "Cy"],
+        "Quantity": [1, 2, 3, 4],
+        "Amount": [100, 200, 300, 400],
+    })
+    for col, (row, value) in changes.items():
+        raw[col] = raw[col].astype(object)
+        raw.loc[row, col] = value
+    return raw
+
+
+def _report(report):
+    return {(check, col): rows for _, check, col, rows in report.itertuples(index=False)}
+
+
+def test_clean_rows_pass():
+    clean, quarantine, report = _validate(_raw())
+    assert len(clean) == 4 and quarantine.empty and report.empty
+    assert clean["Name"].tolist()[2] == "Unknown"
+
+
+def test_missing_column_is_added_without_quarantine():
+    clean, quarantine, report = _validate(_raw().drop(columns=["Quantity"]))
+    assert _report(report) == {("missing_column", "Quantity"): 4}
+    assert quarantine.empty
+    assert clean["Quantity"].tolist() == [0, 0, 0, 0]
+
+
+@pytest.mark.parametrize("col, value", [("Amount", "12,5x"), ("Quantity", "two")])
+def test_bad_number_is_quarantined(col, value):
+    clean, quarantine, report = _validate(_raw(**{col: (1, value)}))
+    assert _report(report) == {("bad_number", col): 1}
+    assert quarantine["Excel_Row"].tolist() == [3]
+    assert quarantine["Issues"].tolist() == [f"bad_number:{col}"]
+    assert quarantine[col].tolist() == [value]
+    assert clean["Voucher"].tolist() == ["V1", "V3", "V4"]
+
+
+@pytest.mark.parametrize("value", ["03-04-2025", "not a date"])
+def test_bad_date_is_quarantined_not_swapped(value):
+    clean, quarantine, report = _validate(_raw(Date=(2, value)))
+    assert _report(report) == {("bad_date", "Date"): 1}
+    assert quarantine["Excel_Row"].tolist() == [4]
+    assert quarantine["Date"].tolist() == [value]
+    # Neither 3 April nor 4 March makes it into the clean rows
+    assert clean["Date"].tolist() == [pd.Timestamp(day) for day in ("2025-04-01", "2025-04-02", "2025-04-04")]
+
+
+def test_negative_amount_is_quarantined():
+    clean, quarantine, report = _validate(_raw(Amount=(3, -50)))
+    assert _report(report) == {("negative_amount", "Amount"): 1}
+    assert quarantine["Excel_Row"].tolist() == [5]
+    assert (clean["Amount"] >= 0).all() and len(clean) == 3
+
+
+def test_duplicate_key_keeps_the_first_row():
+    clean, quarantine, report = _validate(_raw(Voucher=(3, "V1")))
+    assert _report(report) == {("duplicate_key", "Voucher"): 1}
+    assert quarantine["Excel_Row"].tolist() == [5]
+    assert clean["Voucher"].tolist() == ["V1", "V2", "V3"]
+
+
+def test_a_row_failing_several_checks_lists_them_all():
+    raw = _raw(Amount=(1, -5))
+    raw.loc[1, "Voucher"] = "V1"
+    _, quarantine, _ = _validate(raw)
+    assert quarantine["Issues"].tolist() == ["negative_amount:Amount; duplicate_key:Voucher"]
+
+
+def test_quarantine_report_survives_save_and_load(tmp_path):
+    raw = _raw(Amount=(1, "abc"), Date=(2, "03-04-2025"))
+    _, quarantine, report = _validate(raw)
+    _save_quality(str(tmp_path), quarantine, report)
+    loaded, loaded_report = _load_quality(str(tmp_path))
+
+    pd.testing.assert_frame_equal(loaded[["Excel_Row", "Issues"]], quarantine[["Excel_Row", "Issues"]])
+    assert loaded["Excel_Row"].tolist() == [3, 4]
+    assert loaded["Issues"].tolist() == ["bad_number:Amount", "bad_date:Date"]
+    pd.testing.assert_frame_equal(loaded_report[REPORT_COLUMNS], report, check_dtype=False)
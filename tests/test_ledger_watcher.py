@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+import ledger_watcher
+from ledger_watcher import LedgerWatcher
+
+
+class _Store:
+    def __init__(self, version):
+        self.version = version
+
+
+class _Files:
+    # Stands in for files_version and for the store build
+    def __init__(self, version):
+        self.version = version
+        self.fail = False
+        self.builds = []
+        self.built = threading.Event()
+
+    def files_version(self, paths):
+        return self.version
+
+    def build(self):
+        self.builds.append(self.version)
+        self.built.set()
+        if self.fail:
+            raise ValueError("broken workbook")
+        return _Store(self.version)
+
+
+@pytest.fixture
+def files(monkeypatch):
+    files = _Files("v1")
+    monkeypatch.setattr(ledger_watcher, "files_version", files.files_version)
+    return files
+
+
+def test_reload_waits_for_the_version_to_settle(files):
+    watcher = LedgerWatcher({"sales": "sales.xlsx"}, files.build)
+    watcher._reload(watcher._version())
+    first = watcher.store()
+
+    files.version = "v2"
+    watcher._poll()
+    assert files.builds == ["v1"] and watcher.store() is first
+    files.version = "v3"  # still being written
+    watcher._poll()
+    assert files.builds == ["v1"] and watcher.store() is first
+    watcher._poll()
+    assert files.builds == ["v1", "v3"]
+    assert watcher.store() is not first and watcher.store().version == "v3"
+    watcher._poll()
+    assert files.builds == ["v1", "v3"]
+
+
+def test_failed_reload_keeps_the_previous_store(files):
+    watcher = LedgerWatcher({"sales": "sales.xlsx"}, files.build)
+    watcher._reload(watcher._version())
+    first = watcher.store()
+
+    files.version, files.fail = "v2", True
+    watcher._poll()
+    watcher._poll()
+    assert watcher.store() is first and watcher.store().version == "v1"
+    assert "broken workbook" in watcher.last_error
+    # The same broken version is not retried; the next edit is
+    watcher._poll()
+    watcher._poll()
+    assert files.builds == ["v1", "v2"]
+    files.version, files.fail = "v3", False
+    watcher._poll()
+    watcher._poll()
+    assert watcher.store().version == "v3" and watcher.last_error is None
+
+
+def test_failed_first_load_raises(files):
+    files.fail = True
+    watcher = LedgerWatcher({"sales": "sales.xlsx"}, files.build, interval=60).start()
+    try:
+        with pytest.raises(RuntimeError, match="broken workbook"):
+            watcher.store(timeout=5)
+    finally:
+        watcher.stop()
+
+
+def test_store_is_the_same_object_until_the_swap(files):
+    watcher = LedgerWatcher({"sales": "sales.xlsx"}, files.build, interval=0.01).start()
+    try:
+        first = watcher.store(timeout=5)
+        assert all(watcher.store() is first for _ in range(20))
+        files.built.clear()
+        files.version = "v2"
+        assert files.built.wait(5)
+        for _ in range(500):
+            if watcher.store() is not first:
+                break
+            time.sleep(0.01)
+        assert watcher.store().version == "v2"
+        assert files.builds == ["v1", "v2"]
+    finally:
+        watcher.stop()
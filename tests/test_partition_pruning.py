@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from ledger_partitions import PartitionedLedger
+from ledger_store import build_store
+from period_close import PeriodCloseStore
+
+
+@pytest.fixture
+def part_reads(monkeypatch):
+    # (ledger directory name, month key) of every partition opened
+    reads = []
+    real = PartitionedLedger._read_part
+
+    def counting(self, key, keep=True):
+        reads.append((self.root.rsplit("/", 1)[-1].rsplit("\\", 1)[-1], key))
+        return real(self, key, keep)
+
+    monkeypatch.setattr(PartitionedLedger, "_read_part", counting)
+    return reads
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_range_reads_only_open_overlapping_months(workbooks, tmp_path, part_reads, warm):
+    root = str(tmp_path / "partitions")
+    if warm:
+        build_store(workbooks, root)
+    store = build_store(workbooks, root)
+    # The ingest hooks (search index, analytics, ...) load every ledger in full
+    for name in store.names():
+        store.frame(name)
+    part_reads.clear()
+
+    june = store.frame_range("sales", "2025-06-01", "2025-06-30")
+    assert part_reads == [("sales", "2025-06")]
+    full = store.frame("sales")
+    expected = full[(full["date"] >= "2025-06-01") & (full["date"] <= "2025-06-30")]
+    pd.testing.assert_frame_equal(june.reset_index(drop=True), expected.reset_index(drop=True))
+
+
+def test_aggregate_skips_closed_months(workbooks, tmp_path, part_reads):
+    store = build_store(workbooks, str(tmp_path / "partitions"))
+    closing = PeriodCloseStore(str(tmp_path / "closed"))
+    for period in ["2025-04", "2025-05", "2025-06"]:
+        assert closing.close(period, store)
+    part_reads.clear()
+
+    table = closing.aggregate(store, "sales", "category")
+    assert {key for ledger, key in part_reads if ledger == "sales"} == {"2025-07", "2025-08"}
+    sales = store.frame("sales")
+    assert table["Total_Sales"].sum() == pytest.approx(sales["total_amount"].sum())
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+import period_close
+from ledger_store import build_store
+from period_close import AGGREGATES, UNCATEGORIZED, PeriodCloseStore, aggregate_rows
+
+
+def test_blank_members_are_kept_as_uncategorized():
+    frame = pd.DataFrame({
+        "Payment_category": pd.Categorical(["Sales", None, "Expense", None, UNCATEGORIZED]),
+        "Cash_In": [100, 20, 0, 5, 1],
+        "Cash_Out": [0, 0, 40, 0, 2],
+    })
+    table = aggregate_rows(frame, "cashbook", "Payment_category")
+    assert table.loc[UNCATEGORIZED].tolist() == [26, 2, 3]
+    assert table["Cash_In"].sum() == frame["Cash_In"].sum()
+    assert table["Transactions"].sum() == len(frame)
+
+
+def test_totals_match_the_ledger_with_blank_categories(workbooks, tmp_path):
+    sales = pd.read_excel(workbooks["sales"])
+    sales.loc[::7, "category"] = None
+    sales.to_excel(workbooks["sales"], index=False)
+    store = build_store(workbooks, str(tmp_path / "partitions"))
+    closing = PeriodCloseStore(str(tmp_path / "closed"))
+    assert closing.close("2025-05", store)
+
+    ledger = store.frame("sales")
+    assert ledger["category"].isna().any()
+    for start, end in [(None, None), ("2025-05-01", "2025-06-30")]:
+        table = closing.aggregate(store, "sales", "category", start, end)
+        rows = store.frame_range("sales", start, end)
+        assert table["Total_Sales"].sum() == pytest.approx(rows["total_amount"].sum())
+        assert table["Invoices"].sum() == len(rows)
+        assert UNCATEGORIZED in set(table["category"])
+
+
+@pytest.mark.parametrize("ledger, dimension", [("sales", "Sold_By"), ("purchase", "Product_Category")])
+def test_page_aggregates_match_the_ledger(workbooks, tmp_path, ledger, dimension):
+    store = build_store(workbooks, str(tmp_path / "partitions"))
+    closing = PeriodCloseStore(str(tmp_path / "closed"))
+    assert closing.close("2025-05", store)
+    measures = AGGREGATES[(ledger, dimension)]
+
+    for start, end in [(None, None), ("2025-05-01", "2025-06-30")]:
+        table = closing.aggregate(store, ledger, dimension, start, end).set_index(dimension)
+        expected = aggregate_rows(store.frame_range(ledger, start, end), ledger, dimension)
+        pd.testing.assert_frame_equal(
+            table.sort_index()[list(measures)], expected.sort_index()[list(measures)],
+            check_dtype=False, check_names=False,
+        )
+
+
+def test_months_closed_before_an_aggregate_existed_use_their_rows(workbooks, tmp_path, monkeypatch):
+    store = build_store(workbooks, str(tmp_path / "partitions"))
+    closing = PeriodCloseStore(str(tmp_path / "closed"))
+    older = {key: value for key, value in AGGREGATES.items() if key != ("sales", "Sold_By")}
+    monkeypatch.setattr(period_close, "AGGREGATES", older)
+    assert closing.close("2025-05", store)
+    monkeypatch.undo()
+
+    assert not (closing.snapshot()["Dimension"] == "Sold_By").any()
+    table = closing.aggregate(store, "sales", "Sold_By", "2025-05-01", "2025-05-31")
+    rows = store.frame_range("sales", "2025-05-01", "2025-05-31")
+    assert not rows.empty
+    assert table["Total_Sales"].sum() == pytest.approx(rows["total_amount"].sum())
+    assert table["Invoices"].sum() == len(rows)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sales_cube import BLANK, MEASURES, SALES_HIERARCHIES, SalesCube, build_cubes
+
+
+def _sales():
+    rows = 60
+    rng = np.random.default_rng(7)
+    frame = pd.DataFrame({
+        "date": pd.Timestamp("2025-05-01") + pd.to_timedelta(rng.integers(0, 20, rows), unit="D"),
+        "category": pd.Categorical(rng.choice(["Saree", "Kurti", None], rows)),
+        "product_name": pd.Categorical(rng.choice(["Red", "Blue", "Green", None], rows)),
+        "Sold_By": pd.Categorical(rng.choice(["Asha", "Rafi", None], rows)),
+        "customer_name": pd.Series(rng.choice(["C1", "C2", "C3", None], rows), dtype="string[pyarrow]"),
+        "quantity": rng.integers(1, 5, rows),
+        "total_amount": rng.integers(100, 1000, rows).astype("float64"),
+    })
+    frame.loc[[3, 11], "date"] = pd.NaT
+    return frame
+
+
+def _check_node(cube, path, depth):
+    children = cube.children(path)
+    if depth == len(cube.levels):
+        return
+    parent = cube.total(path)
+    for measure in MEASURES:
+        assert children[measure].sum() == pytest.approx(parent[measure]), (path, measure)
+    for member in children[cube.levels[depth]]:
+        _check_node(cube, tuple(path) + (member,), depth + 1)
+
+
+@pytest.mark.parametrize("hierarchy", list(SALES_HIERARCHIES))
+def test_children_add_up_to_the_parent_at_every_level(hierarchy):
+    frame = _sales()
+    cube = build_cubes(frame)[hierarchy]
+    root = cube.total()
+    assert root["Total_Sales"] == pytest.approx(frame["total_amount"].sum())
+    assert root["Invoices"] == len(frame)
+    _check_node(cube, (), 0)
+
+
+def test_blank_members_are_listed():
+    frame = _sales()
+    cube = SalesCube(frame, ["category", "product_name"])
+    top = cube.children().set_index("category")
+    blank = frame["category"].isna()
+    assert top.loc[BLANK, "Total_Sales"] == pytest.approx(frame.loc[blank, "total_amount"].sum())
+    assert BLANK in set(cube.children([BLANK])["product_name"])
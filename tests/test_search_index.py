@@ -0,0 +1,40 @@
+import pandas as pd
+
+from search_index import SearchIndex
+
+
+def _index():
+    index = SearchIndex()
+    index.sync("cashbook", pd.DataFrame({
+        "Voucher_No": [f"CB-{i:03d}" for i in range(6)],
+        "Description": ["rent", "salary", "rent", "tea", "rent", "rent"],
+        "Name": ["Rahim", "Karim", "Rahim", "Rahim", "Salma", "Rahim"],
+        "Reference": "",
+        "Payment_category": "Expense",
+    }), 1)
+    index.sync("bankbook", pd.DataFrame({
+        "Cheque_No": ["CHQ-1", "CHQ-2"],
+        "Particulars": ["Rahim deposit", "Karim deposit"],
+        "fund_source": "Shop",
+        "Bank_Ref": ["BR-1", "BR-2"],
+    }), 1)
+    return index
+
+
+def test_every_term_must_match():
+    index = _index()
+    assert index.search("rahim rent") == ({"cashbook": [0, 2, 5]}, {"cashbook": 3})
+    # An unknown word leaves its clause empty instead of being dropped
+    assert index.search("rahim invoice") == ({}, {})
+    assert index.search("rahim invoice or karim deposit") == ({"bankbook": [1]}, {"bankbook": 1})
+
+
+def test_counts_report_matches_past_the_limit():
+    results, counts = _index().search("rahim", limit=2)
+    assert results == {"bankbook": [0], "cashbook": [0, 2]}
+    assert counts == {"bankbook": 1, "cashbook": 4}
+
+
+def test_other_versions_are_left_out():
+    index = _index()
+    assert index.search("rahim", version=2) == ({}, {})
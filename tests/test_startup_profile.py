@@ -0,0 +1,23 @@
+import pytest
+
+from startup_profile import render_profile
+
+
+APP = """
+import streamlit as st
+menu = st.sidebar.radio("Menu", ["Home", "Report"])
+st.write(menu)
+"""
+
+
+@pytest.mark.parametrize("pages, visited", [
+    (None, ["Home", "Report"]),
+    (["Report"], ["Report"]),
+    ([], []),
+])
+def test_render_probe_visits_the_requested_pages(tmp_path, monkeypatch, pages, visited):
+    (tmp_path / "app.py").write_text(APP, encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    render = render_profile("app.py", 60, pages)
+    assert render["error"] is None
+    assert [visit["Page"] for visit in render["pages"]] == visited
@@ -0,0 +1,138 @@
+import os
+
+import pandas as pd
+import pytest
+
+import vat_engine
+from conftest import ROOT
+from ledger_store import LedgerStore, build_store
+from vat_engine import VatReturnStore, load_rates
+
+
+def _frames():
+    sales = pd.DataFrame({
+        "date": pd.to_datetime(["2025-05-03", "2025-05-20", "2025-06-02", "2025-06-15"]),
+        "invoice_id": ["INV-1", "INV-2", "INV-3", "INV-4"],
+        "category": ["Saree", "Kurti", "Saree", None],
+        "total_amount": [1150.0, 2300.0, 575.0, 115.0],
+    })
+    purchase = pd.DataFrame({
+        "Date": pd.to_datetime(["2025-05-05", "2025-05-09", "2025-06-07"]),
+        "Vouchar_no": ["PV-1", "PV-2", "PV-3"],
+        "Supplier_name": ["Acme", "Acme", "Bolt"],
+        "Product_Category": ["Shirt", "Kids", "Shirt"],
+        "Amount": [460.0, 0.0, 230.0],
+    })
+    return sales, purchase
+
+
+def _ledgers(version=1, sales=None):
+    default_sales, purchase = _frames()
+    return LedgerStore({"sales": default_sales if sales is None else sales, "purchase": purchase}, version)
+
+
+def _rates(rate):
+    return {"prices_include_vat": True, "default_rate": rate, "sales": {"Saree": rate}, "purchase": {"Shirt": rate}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return VatReturnStore(str(tmp_path / "warehouse" / "vat_returns.csv"))
+
+
+def test_reads_do_not_write(store):
+    ledgers = _ledgers()
+    table = store.returns(ledgers, _rates(0.15))
+    assert list(table["Status"]) == ["Open", "Open"]
+    assert not os.path.exists(store.path)
+
+
+def test_closed_period_is_stable_after_a_rate_change(store):
+    ledgers = _ledgers()
+    assert store.close("2025-05", ledgers, _rates(0.15), {"2025-05"})
+    filed = store.returns(ledgers, _rates(0.15))
+    filed_lines = store.lines("2025-05", ledgers, _rates(0.15))
+
+    changed = store.returns(ledgers, _rates(0.075))
+    may = changed[changed["Period"] == "2025-05"]
+    pd.testing.assert_frame_equal(may, filed[filed["Period"] == "2025-05"])
+    assert may["Output_VAT"].iloc[0] == pytest.approx(150 + 300)
+    assert may["Status"].iloc[0] == "Closed"
+    for before, after in zip(filed_lines, store.lines("2025-05", ledgers, _rates(0.075))):
+        pd.testing.assert_frame_equal(after, before)
+    assert len(filed_lines[1]) == 1  # the purchase line without an amount is not filed
+
+    # The open month follows the new rates
+    june = changed[changed["Period"] == "2025-06"].iloc[0]
+    assert june["Status"] == "Open"
+    assert june["Output_VAT"] == pytest.approx(round(690 - 690 / 1.075, 2))
+
+
+def test_close_needs_the_ledgers_closed(store):
+    ledgers = _ledgers()
+    assert not store.close("2025-06", ledgers, _rates(0.15), {"2025-05"})
+    assert store.closed_periods() == set()
+    assert store.close("2025-06", ledgers, _rates(0.15), {"2025-05", "2025-06"})
+    assert not store.close("2025-06", ledgers, _rates(0.15), {"2025-05", "2025-06"})
+    assert store.closed_periods() == {"2025-06"}
+
+
+def test_a_category_rate_changes_the_return(store):
+    ledgers = _ledgers()
+    flat = store.returns(ledgers, _rates(0.15))
+    reduced = dict(_rates(0.15), sales={"Saree": 0.05})
+    table = store.returns(ledgers, reduced)
+
+    may, flat_may = table.iloc[0], flat.iloc[0]
+    # Saree 1150 at 5% and Kurti 2300 at the default 15%
+    assert may["Output_VAT"] == pytest.approx(round(1150 - 1150 / 1.05, 2) + 300)
+    assert may["Output_VAT"] < flat_may["Output_VAT"]
+    assert may["Input_VAT"] == flat_may["Input_VAT"]
+
+
+def test_only_changed_months_are_recomputed(store, monkeypatch):
+    computed = []
+    real = vat_engine.period_lines
+
+    def counting(period, *args):
+        computed.append(period)
+        return real(period, *args)
+
+    monkeypatch.setattr(vat_engine, "period_lines", counting)
+    sales, _ = _frames()
+    store.returns(_ledgers(1), _rates(0.15))
+    assert computed == ["2025-05", "2025-06"]
+
+    computed.clear()
+    store.returns(_ledgers(2), _rates(0.15))
+    assert computed == []
+
+    sales.loc[3, "total_amount"] = 230.0
+    table = store.returns(_ledgers(3, sales=sales), _rates(0.15))
+    assert computed == ["2025-06"]
+    assert table.iloc[1]["Output_VAT"] == pytest.approx(75 + 30)
+
+    computed.clear()
+    store.returns(_ledgers(3, sales=sales), _rates(0.075))
+    assert computed == ["2025-05", "2025-06"]
+
+
+def test_rate_file_names_categories_found_in_the_ledgers():
+    rates = load_rates(os.path.join(ROOT, "vat_rates.json"))
+    sales = pd.read_excel(os.path.join(ROOT, "sales_register.xlsx"))
+    purchase = pd.read_excel(os.path.join(ROOT, "purchase_sales_demo.xlsx"))
+    assert set(rates["sales"]) == set(sales["category"].dropna())
+    assert set(rates["purchase"]) == set(purchase["Product_Category"].dropna())
+
+
+def test_partitioned_store_gives_the_same_returns(workbooks, tmp_path):
+    partitioned = build_store(workbooks, str(tmp_path / "partitions"))
+    in_memory = LedgerStore({name: partitioned.frame(name) for name in ("sales", "purchase")}, partitioned.version)
+    assert partitioned.month_hashes("sales") == in_memory.month_hashes("sales")
+
+    rates = _rates(0.15)
+    columns = [col for col in vat_engine.RETURN_COLUMNS if col != "Computed_At"]
+    first = VatReturnStore(str(tmp_path / "a" / "vat_returns.csv")).returns(partitioned, rates)[columns]
+    second = VatReturnStore(str(tmp_path / "b" / "vat_returns.csv")).returns(in_memory, rates)[columns]
+    assert len(first) > 1
+    pd.testing.assert_frame_equal(first, second)
@@ -0,0 +1,42 @@
+import io
+import sqlite3
+import threading
+
+from wallet_import import import_statement, wallet_summary
+
+
+def _statement(first, count):
+    lines = ["Merchant statement", "Transaction ID,Date,Amount,Type,Fee"]
+    lines += [f"TX{i:05d},2025-08-01 10:{i % 60:02d}:00,{100 + i},Payment,0" for i in range(first, first + count)]
+    return io.BytesIO("\n".join(lines).encode())
+
+
+def test_concurrent_imports_keep_every_transaction_once(tmp_path):
+    db_path = str(tmp_path / "wallet.sqlite")
+    # Overlapping statements imported from several sessions at once
+    ranges = [(0, 400), (200, 400), (400, 400), (0, 800)]
+    stats, errors = [], []
+
+    def run(first, count):
+        try:
+            stats.append(import_statement(_statement(first, count), "bkash.csv", None, db_path, chunk_rows=25))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run, args=span) for span in ranges]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sum(s["imported"] for s in stats) == 800
+    assert sum(s["imported"] + s["duplicates"] for s in stats) == sum(count for _, count in ranges)
+    con = sqlite3.connect(db_path)
+    try:
+        tables = {row[0] for row in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert con.execute("SELECT COUNT(DISTINCT txn_id), COUNT(*) FROM wallet_txn").fetchone() == (800, 800)
+    finally:
+        con.close()
+    assert tables == {"wallet_txn"}
+    assert wallet_summary(db_path)["Received"].sum() == sum(100 + i for i in range(800))
@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from period_close import month_bounds
+
+
+RETURN_COLUMNS = [
+    "Period", "Sales_Base", "Output_VAT", "Purchase_Base", "Input_VAT",
+    "Net_VAT_Payable", "Sales_Lines", "Purchase_Lines", "Status", "Computed_At", "Closed_At",
+]
+
+
+def load_rates(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def period_of(dates):
+    return dates.dt.strftime("%Y-%m")
+
+
+# ✅ VAT per line, vectorized: rate looked up per category, NaN category -> default rate
+def line_vat(amount, category, rates, default_rate, inclusive=True):
+    rate = category.astype(object).map(rates).astype("float64").fillna(default_rate)
+    amount = amount.astype("float64").fillna(0.0)
+    if inclusive:
+        base = amount / (1 + rate)
+        vat = amount - base
+    else:
+        base = amount
+        vat = amount * rate
+    return rate, base, vat
+
+
+def sales_vat_lines(sales, config):
+    rate, base, vat = line_vat(
+        sales["total_amount"], sales["category"], config.get("sales", {}),
+        config["default_rate"], config.get("prices_include_vat", True)
+    )
+    return pd.DataFrame({
+        "Date": sales["date"],
+        "Period": period_of(sales["date"]),
+        "Invoice": sales["invoice_id"],
+        "Category": sales["category"],
+        "Amount": sales["total_amount"],
+        "VAT_Rate": rate,
+        "Taxable_Base": base.round(2),
+        "VAT": vat.round(2),
+    })
+
+
+def purchase_vat_lines(purchase, config):
+    rate, base, vat = line_vat(
+        purchase["Amount"], purchase["Product_Category"], config.get("purchase", {}),
+        config["default_rate"], config.get("prices_include_vat", True)
+    )
+    return pd.DataFrame({
+        "Date": purchase["Date"],
+        "Period": period_of(purchase["Date"]),
+        "Voucher": purchase["Vouchar_no"],
+        "Supplier": purchase["Supplier_name"],
+        "Category": purchase["Product_Category"],
+        "Amount": purchase["Amount"],
+        "VAT_Rate": rate,
+        "Taxable_Base": base.round(2),
+        "VAT": vat.round(2),
+    })
+
+
+def monthly_returns(sales_lines, purchase_lines):
+    output = sales_lines.groupby("Period").agg(
+        Sales_Base=("Taxable_Base", "sum"),
+        Output_VAT=("VAT", "sum"),
+        Sales_Lines=("VAT", "size"),
+    )
+    purchased = purchase_lines[purchase_lines["Amount"] != 0]
+    input_ = purchased.groupby("Period").agg(
+        Purchase_Base=("Taxable_Base", "sum"),
+        Input_VAT=("VAT", "sum"),
+        Purchase_Lines=("VAT", "size"),
+    )
+    table = output.join(input_, how="outer").fillna(0)
+    table["Net_VAT_Payable"] = table["Output_VAT"] - table["Input_VAT"]
+    table = table.round(2)
+    for col in ["Sales_Lines", "Purchase_Lines"]:
+        table[col] = table[col].astype("int64")
+    return table.reset_index()
+
+
+def period_lines(period, store, config):
+    # VAT lines of one month (only its partitions are read); purchase lines
+    # without an amount are not part of a return
+    start, end = month_bounds(period)
+    sales = store.frame_range("sales", start, end)
+    purchase = store.frame_range("purchase", start, end)
+    purchase = purchase[purchase["Amount"] != 0]
+    return sales_vat_lines(sales, config), purchase_vat_lines(purchase, config)
+
+
+# ✅ Filed monthly returns (warehouse/vat_returns.csv, warehouse/vat_lines/)
+# Open periods are computed from the ledgers and the current rates and never
+# written. Each open month's return is kept in memory with the content hashes
+# of its sales and purchase partitions and the rates it used, so a new ledger
+# version or rate file only recomputes the months whose rows or rates changed.
+# Closing a period files its return and its VAT lines once; from then on both
+# are read back as filed, whatever the rate file says. Only a month whose
+# ledgers are closed (period_close) can be filed, so its rows cannot change
+# under the return either.
+class VatReturnStore:
+    def __init__(self, path):
+        self.path = path
+        self.lines_dir = os.path.join(os.path.dirname(path), "vat_lines")
+        self._lock = threading.Lock()
+        self._open = {}    # period -> (sales hash, purchase hash, rates), return row
+
+    def load(self):
+        # Filed returns; rows left "Open" by older versions are recomputed instead
+        if not os.path.exists(self.path):
+            return pd.DataFrame(columns=RETURN_COLUMNS)
+        table = pd.read_csv(self.path, dtype={col: str for col in ["Period", "Status", "Computed_At", "Closed_At"]})
+        return table[table["Status"] == "Closed"].reset_index(drop=True)
+
+    def _write(self, table):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        table[RETURN_COLUMNS].to_csv(tmp, index=False)
+        os.replace(tmp, self.path)
+
+    def _lines_paths(self, period):
+        base = os.path.join(self.lines_dir, period)
+        return base + ".sales.parquet", base + ".purchase.parquet"
+
+    def closed_periods(self):
+        return set(self.load()["Period"])
+
+    def returns(self, store, config):
+        frozen = self.load()
+        closed = set(frozen["Period"])
+        sales_hashes = store.month_hashes("sales")
+        purchase_hashes = store.month_hashes("purchase")
+        rates = json.dumps(config, sort_keys=True)
+        periods = sorted((set(sales_hashes) | set(purchase_hashes)) - closed)
+        fresh = []
+        with self._lock:
+            for period in periods:
+                key = (sales_hashes.get(period), purchase_hashes.get(period), rates)
+                cached = self._open.get(period)
+                if cached is None or cached[0] != key:
+                    row = monthly_returns(*period_lines(period, store, config))
+                    row["Status"] = "Open"
+                    row["Computed_At"] = datetime.now().isoformat(timespec="seconds")
+                    row["Closed_At"] = None
+                    cached = self._open[period] = (key, row)
+                fresh.append(cached[1])
+            for period in set(self._open) - set(periods):
+                del self._open[period]
+        parts = [df for df in [frozen] + fresh if not df.empty]
+        table = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=RETURN_COLUMNS)
+        return table.sort_values("Period").reset_index(drop=True)[RETURN_COLUMNS]
+
+    def lines(self, period, store, config):
+        # (sales lines, purchase lines) as filed; returns filed before the lines
+        # were kept, and open periods, are computed with the current rates
+        sales_path, purchase_path = self._lines_paths(period)
+        if period in self.closed_periods() and os.path.exists(sales_path) and os.path.exists(purchase_path):
+            return pd.read_parquet(sales_path), pd.read_parquet(purchase_path)
+        return period_lines(period, store, config)
+
+    def close(self, period, store, config, ledgers_closed):
+        # `ledgers_closed`: months closed by period_close
+        if period not in ledgers_closed:
+            return False
+        with self._lock:
+            filed = self.load()
+            if period in set(filed["Period"]):
+                return False
+            sales_lines, purchase_lines = period_lines(period, store, config)
+            table = monthly_returns(sales_lines, purchase_lines)
+            if table.empty:
+                return False
+            now = datetime.now().isoformat(timespec="seconds")
+            table["Status"] = "Closed"
+            table["Computed_At"] = now
+            table["Closed_At"] = now
+            os.makedirs(self.lines_dir, exist_ok=True)
+            for lines, path in zip((sales_lines, purchase_lines), self._lines_paths(period)):
+                lines.to_parquet(path + ".tmp", index=False)
+                os.replace(path + ".tmp", path)
+            # The return last: a period only counts as filed once its lines are on disk
+            parts = [df for df in (filed, table) if not df.empty]
+            self._write(pd.concat(parts, ignore_index=True).sort_values("Period").reset_index(drop=True))
+            return True
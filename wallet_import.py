@@ -0,0 +1,269 @@
+import argparse
+import csv
+import io
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+
+PROVIDERS = ["bKash", "Nagad", "Rocket"]
+
+# ✅ Header spellings seen in merchant statement exports -> wallet ledger column
+COLUMN_ALIASES = {
+    "txn_id": ["transaction id", "transaction_id", "trxid", "trx id", "txnid", "txn id", "txn_id", "transaction no", "trans id"],
+    "date": ["date", "transaction date", "txn date", "date time", "datetime", "date & time", "transaction time", "time"],
+    "amount": ["amount", "transaction amount", "txn amount", "amount (bdt)", "amount(bdt)"],
+    "type": ["type", "transaction type", "txn type", "service", "description"],
+    "counterparty": ["from", "sender", "customer", "customer no", "account", "account no", "wallet no", "counterparty", "msisdn", "to", "receiver"],
+    "fee": ["fee", "charge", "service charge", "commission"],
+    "reference": ["reference", "ref", "purpose", "note", "remarks"],
+}
+
+# Transaction types that take money out of the merchant wallet
+OUTGOING_TYPES = ("cash out", "send money", "withdraw", "payment to", "transfer to", "b2b", "bill pay", "refund")
+
+LEDGER_COLUMNS = ["key", "provider", "txn_id", "date", "direction", "amount", "fee", "counterparty", "reference", "source_file", "imported_at"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wallet_txn (
+    key INTEGER PRIMARY KEY,      -- 64-bit hash of provider + transaction id
+    provider TEXT NOT NULL,
+    txn_id TEXT NOT NULL,
+    date TEXT,
+    direction TEXT,
+    amount REAL,
+    fee REAL,
+    counterparty TEXT,
+    reference TEXT,
+    source_file TEXT,
+    imported_at TEXT
+);
+CREATE INDEX IF NOT EXISTS wallet_txn_date ON wallet_txn (date);
+"""
+
+
+def connect(db_path):
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    # Imports from other sessions may hold the write lock for a chunk
+    con = sqlite3.connect(db_path, timeout=30)
+    con.executescript(SCHEMA)
+    return con
+
+
+def detect_provider(filename):
+    name = filename.lower()
+    for provider in PROVIDERS:
+        if provider.lower() in name:
+            return provider
+    return None
+
+
+def _header_map(header):
+    mapping = {}
+    cleaned = [str(h).strip().lower() if h is not None else "" for h in header]
+    for target, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in cleaned and cleaned.index(alias) not in mapping.values():
+                mapping[target] = cleaned.index(alias)
+                break
+    return mapping
+
+
+def _is_header(row):
+    mapping = _header_map(row)
+    return "txn_id" in mapping and "amount" in mapping
+
+
+# ✅ Chunk readers: statements often start with a few lines of account info,
+# so the header is the first row that names a transaction id and an amount.
+def _csv_chunks(handle, chunk_rows):
+    reader = csv.reader(io.TextIOWrapper(handle, encoding="utf-8-sig", newline=""))
+    header = None
+    for row in reader:
+        if _is_header(row):
+            header = row
+            break
+    if header is None:
+        return
+    batch = []
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        batch.append(row[:len(header)] + [None] * (len(header) - len(row)))
+        if len(batch) >= chunk_rows:
+            yield header, batch
+            batch = []
+    if batch:
+        yield header, batch
+
+
+def _xlsx_chunks(handle, chunk_rows):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(handle, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header = None
+        for row in rows:
+            if _is_header(row):
+                header = list(row)
+                break
+        if header is None:
+            return
+        batch = []
+        for row in rows:
+            if all(cell is None or str(cell).strip() == "" for cell in row):
+                continue
+            batch.append(list(row[:len(header)]))
+            if len(batch) >= chunk_rows:
+                yield header, batch
+                batch = []
+        if batch:
+            yield header, batch
+    finally:
+        workbook.close()
+
+
+def _money(series):
+    return pd.to_numeric(series.astype("string").str.replace(r"[^0-9.\-]", "", regex=True), errors="coerce")
+
+
+def _dates(series):
+    # ISO timestamps as-is, anything else (01/08/2025 10:15) day-first
+    values = series.astype("string").str.strip()
+    iso = values.str.match(r"^\d{4}-").fillna(False)
+    parsed = pd.to_datetime(values.where(iso), format="ISO8601", errors="coerce")
+    other = pd.to_datetime(values.where(~iso), format="mixed", dayfirst=True, errors="coerce")
+    return parsed.fillna(other)
+
+
+def _normalize(header, batch, provider, source_file):
+    mapping = _header_map(header)
+    raw = pd.DataFrame(batch)
+
+    def column(name, default=None):
+        return raw[mapping[name]] if name in mapping else pd.Series(default, index=raw.index)
+
+    amount = _money(column("amount"))
+    kind = column("type", "").fillna("").astype(str).str.lower()
+    outgoing = kind.str.contains("|".join(OUTGOING_TYPES), regex=True) | (amount < 0)
+
+    ledger = pd.DataFrame({
+        "provider": provider,
+        "txn_id": column("txn_id").astype("string").str.strip(),
+        "date": _dates(column("date")).dt.strftime("%Y-%m-%d %H:%M:%S"),
+        "direction": outgoing.map({True: "Out", False: "In"}),
+        "amount": amount.abs(),
+        "fee": _money(column("fee", 0)).fillna(0.0),
+        "counterparty": column("counterparty").astype("string"),
+        "reference": column("reference").astype("string"),
+        "source_file": source_file,
+        "imported_at": datetime.now().isoformat(timespec="seconds"),
+    })
+    valid = ledger["txn_id"].notna() & (ledger["txn_id"] != "") & ledger["amount"].notna() & ledger["date"].notna()
+    ledger = ledger[valid]
+    # Persistent dedup key: one 64-bit hash per (provider, transaction id)
+    ledger.insert(0, "key", pd.util.hash_pandas_object(ledger[["provider", "txn_id"]], index=False).to_numpy().view("int64"))
+    return ledger, int((~valid).sum())
+
+
+# ✅ Stream a statement into the wallet ledger, chunk by chunk
+def import_statement(handle, filename, provider, db_path, chunk_rows=5000):
+    provider = provider or detect_provider(filename)
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown wallet provider for {filename!r}; choose one of {', '.join(PROVIDERS)}")
+
+    chunks = _xlsx_chunks if filename.lower().endswith((".xlsx", ".xlsm")) else _csv_chunks
+    stats = {"provider": provider, "read": 0, "imported": 0, "duplicates": 0, "rejected": 0}
+    con = connect(db_path)
+    try:
+        for header, batch in chunks(handle, chunk_rows):
+            ledger, rejected = _normalize(header, batch, provider, os.path.basename(filename))
+            # Insert the chunk straight from this connection, and let the primary
+            # key drop transactions already imported (here or by another session)
+            rows = ledger[LEDGER_COLUMNS].astype(object)
+            rows = rows.where(rows.notna(), None)
+            before = con.total_changes
+            con.executemany(
+                f"INSERT OR IGNORE INTO wallet_txn ({', '.join(LEDGER_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(LEDGER_COLUMNS))})",
+                rows.itertuples(index=False, name=None),
+            )
+            inserted = con.total_changes - before
+            con.commit()
+            stats["read"] += len(batch)
+            stats["rejected"] += rejected
+            stats["imported"] += inserted
+            stats["duplicates"] += len(ledger) - inserted
+    finally:
+        con.close()
+    return stats
+
+
+# ✅ Queries used next to the Home "Mobile Banking" metric
+def wallet_summary(db_path, start=None, end=None):
+    if not os.path.exists(db_path):
+        return pd.DataFrame(columns=["provider", "Received", "Paid_Out", "Fees", "Transactions"])
+    con = connect(db_path)
+    try:
+        return pd.read_sql_query(
+            """
+            SELECT provider,
+                   SUM(CASE WHEN direction = 'In' THEN amount ELSE 0 END) AS Received,
+                   SUM(CASE WHEN direction = 'Out' THEN amount ELSE 0 END) AS Paid_Out,
+                   SUM(fee) AS Fees,
+                   COUNT(*) AS Transactions
+            FROM wallet_txn
+            WHERE (:start IS NULL OR date >= :start) AND (:end IS NULL OR date < :end)
+            GROUP BY provider
+            ORDER BY provider
+            """,
+            con,
+            params={"start": _day(start), "end": _day(end, next_day=True)},
+        )
+    finally:
+        con.close()
+
+
+def wallet_transactions(db_path, start=None, end=None, limit=500):
+    if not os.path.exists(db_path):
+        return pd.DataFrame(columns=LEDGER_COLUMNS[1:])
+    con = connect(db_path)
+    try:
+        return pd.read_sql_query(
+            f"""
+            SELECT {', '.join(LEDGER_COLUMNS[1:])} FROM wallet_txn
+            WHERE (:start IS NULL OR date >= :start) AND (:end IS NULL OR date < :end)
+            ORDER BY date DESC LIMIT :limit
+            """,
+            con,
+            params={"start": _day(start), "end": _day(end, next_day=True), "limit": limit},
+            parse_dates=["date"],
+        )
+    finally:
+        con.close()
+
+
+def _day(value, next_day=False):
+    if value is None:
+        return None
+    day = pd.Timestamp(value).normalize()
+    if next_day:
+        day += pd.Timedelta(days=1)
+    return day.strftime("%Y-%m-%d %H:%M:%S")
+
+
+# Command line import for statements too large for the browser upload
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import bKash / Nagad / Rocket merchant statements")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--provider", choices=PROVIDERS)
+    parser.add_argument("--db", default=os.path.join("warehouse", "wallet_ledger.sqlite"))
+    parser.add_argument("--chunk-rows", type=int, default=5000)
+    args = parser.parse_args()
+    for path in args.files:
+        with open(path, "rb") as handle:
+            print(path, import_statement(handle, path, args.provider, args.db, args.chunk_rows))